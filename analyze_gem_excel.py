@@ -1,117 +1,285 @@
-import pandas as pd
+import argparse
+import json
 import re
+from collections import Counter
 
-def analyze_excel_file():
+from gem_reader import COMPANY_COLUMN, DEFAULT_WORKBOOK, EMAIL_COLUMNS
+
+# Batch indicators like "Batch A" or "Group 1" in company names
+PATTERN_HINTS = {
+    "batch": r'batch\s+[a-z0-9]',
+    "group": r'group\s+[a-z0-9]',
+}
+
+# Rows listed per pattern in the report
+HINT_EXAMPLES = 20
+
+_HINT_PATTERN = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in PATTERN_HINTS.items())
+# The same alternation without groups, for the contains() prefilter
+_HINT_FILTER = re.compile('|'.join(PATTERN_HINTS.values()))
+
+
+def _counts(counter, limit=None):
+    return {str(value): int(count) for value, count in counter.most_common(limit)}
+
+
+def profile_reseller_table(path=DEFAULT_WORKBOOK, top_k=10):
     """
-    Analyze the GeM_Resellers.xlsx file to understand its structure
-    and how to create meaningful batches.
+    Profile a reseller workbook with column-wise operations.
+
+    Returns a JSON-serializable dict with the row count, per-column null
+    rate and cardinality, the legal-form distribution, batch/group pattern
+    hits in company names, the states and districts rows name (tagged by
+    the gem_geo gazetteer from company names and email addresses), and the
+    top `top_k` email domains with the domain category mix. The table is
+    read a chunk at a time (gem_cache.iter_table_chunks) and each column of
+    a chunk is scanned once by a vectorized string operation; only the
+    running counts and distinct values are kept between chunks, and
+    classifiers only see distinct values.
     """
-    try:
-        # Read the Excel file
-        df = pd.read_excel('GeM_Resellers.xlsx')
-        
-        # Print the column headers
-        print("Column Headers:")
-        print(df.columns.tolist())
-        
-        # Count total rows
-        total_rows = len(df)
-        print(f"Total rows: {total_rows}")
-        
-        # Check if there are any columns that could be used for batching
-        # (like state, category, or company type)
-        print("\nChecking for potential batch criteria...")
-        
-        # Extract unique values from the Name of Company column to see if we have any patterns
-        if 'Name of Company' in df.columns:
-            # Convert to string and replace NaN with empty string
-            companies = df['Name of Company'].astype(str).replace('nan', '')
-            unique_companies = companies.nunique()
-            print(f"Unique companies: {unique_companies}")
-            
-            # Check for common patterns in company names that could indicate categories
-            company_types = []
-            for company in companies:
-                if "private limited" in company.lower():
-                    company_types.append("Private Limited")
-                elif "ltd" in company.lower():
-                    company_types.append("Limited")
-                elif "llp" in company.lower():
-                    company_types.append("LLP")
-                elif "corporation" in company.lower():
-                    company_types.append("Corporation")
-                else:
-                    company_types.append("Other")
-            
-            # Count by company type
-            from collections import Counter
-            company_type_counts = Counter(company_types)
-            print("\nCompany types detected:")
-            for company_type, count in company_type_counts.items():
-                print(f"  {company_type}: {count}")
-        
-        # Check if we can extract states from any data
-        # Look for common Indian state names in company names or addresses
-        states = [
-            "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
-            "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
-            "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya",
-            "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim",
-            "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand",
-            "West Bengal", "Delhi", "Mumbai", "Bangalore", "Kolkata", "Chennai",
-            "Hyderabad", "Pune", "Ahmedabad", "Jaipur", "Lucknow"
-        ]
-        
-        # Check for hints of batch numbers or categories in the data
-        batch_hints = []
-        for index, row in df.iterrows():
-            company_name = str(row.get('Name of Company', ''))
-            # Check for batch indicators like "Batch A", "Group 1", etc.
-            if re.search(r'batch\s+[a-z0-9]', company_name.lower()):
-                batch_hints.append(f"Batch indicator found in row {index+1}: {company_name}")
-            if re.search(r'group\s+[a-z0-9]', company_name.lower()):
-                batch_hints.append(f"Group indicator found in row {index+1}: {company_name}")
-        
-        if batch_hints:
-            print("\nPossible batch indicators found:")
-            for hint in batch_hints:
-                print(f"  {hint}")
-        else:
-            print("\nNo explicit batch indicators found in company names.")
-            
-        # Check for email domains to potentially group by domain
-        email_domains = []
-        for column in ['Email 1', 'Email 2', 'Email 3']:
-            if column in df.columns:
-                emails = df[column].dropna()
-                for email in emails:
-                    if isinstance(email, str) and '@' in email:
-                        domain = email.split('@')[-1].lower()
-                        email_domains.append(domain)
-        
-        # Count domains
-        domain_counter = Counter(email_domains)
-        print("\nTop 10 email domains:")
-        for domain, count in domain_counter.most_common(10):
-            print(f"  {domain}: {count}")
-            
-        # Create some sample batches based on email domains
-        print("\nSuggested batches based on email domains:")
-        top_domains = [domain for domain, _ in domain_counter.most_common(5)]
-        print(f"Batch 1: Top domains - {', '.join(top_domains)}")
-        print(f"Batch 2: Gmail users")
-        print(f"Batch 3: Yahoo users")
-        print(f"Batch 4: Business domains (company emails)")
-        print(f"Batch 5: Other domains")
-        
-        # Check if there are any other columns we could use
-        print("\nOther potential columns for batching:")
+    import pandas as pd
+    from gem_cache import iter_table_chunks
+    from gem_classify import classify_company_types, domain_categorizer
+    from gem_geo import load_gazetteer
+
+    gazetteer = load_gazetteer()
+    chunks = iter_table_chunks(path)
+    header = next(chunks)
+    rows = 0
+    filled_counts = Counter()
+    distinct_values = {}
+    legal_forms = Counter()
+    pattern_hits = {name: {'rows': 0, 'examples': []} for name in PATTERN_HINTS}
+    states = Counter()
+    districts = Counter()
+    domains = Counter()
+    addresses = 0
+
+    for columns in chunks:
+        df = pd.DataFrame(columns)
         for column in df.columns:
-            if column not in ['Name of Company', 'Email 1', 'Email 2', 'Email 3']:
-                print(f"  {column}")
-                
+            filled = df[column][df[column] != '']
+            filled_counts[column] += len(filled)
+            distinct_values.setdefault(column, set()).update(filled.unique())
+
+        companies = df[COMPANY_COLUMN]
+        legal_forms.update(classify_company_types(companies).value_counts().to_dict())
+
+        # A cheap contains() narrows the patterns to the few matching rows,
+        # then one extractall lists every match with its row label
+        lowered = companies.str.lower()
+        hinted = lowered[lowered.str.contains(_HINT_FILTER)]
+        hints = hinted.str.extractall(_HINT_PATTERN).reindex(columns=list(PATTERN_HINTS))
+        for name in PATTERN_HINTS:
+            hit_rows = hints[name].dropna().index.get_level_values(0).unique()
+            hit = pattern_hits[name]
+            hit['rows'] += int(len(hit_rows))
+            room = HINT_EXAMPLES - len(hit['examples'])
+            hit['examples'].extend(
+                {'row': rows + int(row) + 1, 'company': companies[row]} for row in hit_rows[:max(room, 0)]
+            )
+
+        # One gazetteer scan per row over the company name and email cells
+        email_columns = [df[column] for column in EMAIL_COLUMNS if column in df.columns]
+        for company, *row_emails in zip(companies, *email_columns):
+            state, district = gazetteer.tag(company, row_emails)
+            if state:
+                states[state] += 1
+                if district:
+                    districts[f"{state} / {district}"] += 1
+
+        emails = pd.concat(email_columns, ignore_index=True)
+        emails = emails[emails.str.contains('@', regex=False)]
+        addresses += len(emails)
+        domains.update(emails.str.rpartition('@')[2].str.lower().value_counts().to_dict())
+        rows += len(df)
+
+    column_profiles = {
+        column: {
+            'null_rate': round(1 - filled_counts[column] / rows, 4) if rows else 0.0,
+            'distinct': len(values)
+        }
+        for column, values in distinct_values.items()
+    }
+    domain_counts = pd.Series(dict(domains.most_common()), dtype='int64')
+    categories = domain_counts.groupby(domain_categorizer.categorize_many(domain_counts.index.to_series()).values).sum()
+
+    return {
+        'path': path,
+        'header': header,
+        'rows': rows,
+        'columns': column_profiles,
+        'companies': {
+            'distinct': column_profiles.get(COMPANY_COLUMN, {}).get('distinct', 0),
+            'legal_forms': _counts(legal_forms),
+            'pattern_hits': pattern_hits
+        },
+        'geography': {
+            'tagged_rows': sum(states.values()),
+            'district_rows': sum(districts.values()),
+            'states': _counts(states),
+            'districts': _counts(districts, top_k)
+        },
+        'emails': {
+            'addresses': addresses,
+            'distinct_domains': len(domains),
+            'top_domains': _counts(domains, top_k),
+            'domain_categories': {
+                str(category): int(count) for category, count in categories.sort_values(ascending=False).items()
+            }
+        }
+    }
+
+
+def print_profile(report):
+    """Print a profile from profile_reseller_table in readable form."""
+    print("Column Headers:")
+    print(report['header'])
+    print(f"Total rows: {report['rows']}")
+
+    print("\nColumns:")
+    print(f"  {'column':<18}{'null rate':>10}{'distinct':>10}")
+    for column, profile in report['columns'].items():
+        print(f"  {column:<18}{profile['null_rate']:>10.1%}{profile['distinct']:>10}")
+
+    companies = report['companies']
+    print(f"\nUnique companies: {companies['distinct']}")
+    print("\nCompany types detected:")
+    for company_type, count in companies['legal_forms'].items():
+        print(f"  {company_type}: {count}")
+
+    hits = companies['pattern_hits']
+    if any(hit['rows'] for hit in hits.values()):
+        print("\nPossible batch indicators found:")
+        for name, hit in hits.items():
+            if not hit['rows']:
+                continue
+            print(f"  {name.capitalize()} indicator in {hit['rows']} rows")
+            for example in hit['examples']:
+                print(f"    row {example['row']}: {example['company']}")
+    else:
+        print("\nNo explicit batch indicators found in company names.")
+
+    geography = report['geography']
+    if geography['tagged_rows']:
+        print(f"\nRows tagged with a state: {geography['tagged_rows']} "
+              f"({geography['district_rows']} with a district)")
+        for state, count in geography['states'].items():
+            print(f"  {state}: {count}")
+        print(f"\nTop {len(geography['districts'])} districts:")
+        for district, count in geography['districts'].items():
+            print(f"  {district}: {count}")
+    else:
+        print("\nNo state, district or city names found in company names or email addresses.")
+
+    emails = report['emails']
+    print(f"\nEmail addresses: {emails['addresses']} across {emails['distinct_domains']} domains")
+    print(f"\nTop {len(emails['top_domains'])} email domains:")
+    for domain, count in emails['top_domains'].items():
+        print(f"  {domain}: {count}")
+    print("\nDomain categories:")
+    for category, count in emails['domain_categories'].items():
+        print(f"  {category}: {count}")
+
+    print("\nOther potential columns for batching:")
+    for column in report['header']:
+        if column not in [COMPANY_COLUMN] + EMAIL_COLUMNS:
+            print(f"  {column}")
+
+
+def print_sketch_report(report):
+    """Print a report from ResellerSketch.report in readable form."""
+    distinct = report['distinct']
+    print(f"Total rows: {report['rows']} ({report['addresses']} email addresses)")
+    print(f"\nDistinct (estimated, +/-{distinct['relative_error']:.1%} standard error):")
+    for name in ('companies', 'domains', 'addresses'):
+        print(f"  {name}: ~{distinct[name]}")
+
+    print(f"\nCompany types detected (each at most +{report['category_max_overcount']} "
+          f"with {report['category_confidence']:.0%} confidence):")
+    for company_type, count in report['legal_forms'].items():
+        print(f"  {company_type}: ~{count}")
+
+    print(f"\nTop {len(report['top_domains'])} email domains "
+          f"(each at most {report['top_domains_max_undercount']} below its true count):")
+    for domain, count in report['top_domains'].items():
+        print(f"  {domain}: {count}")
+    print("\nDomain categories:")
+    for category, count in report['domain_categories'].items():
+        print(f"  {category}: ~{count}")
+
+
+def analyze_sketch(sources, workers=None, top_k=10, json_path=None, save_path=None, merge_paths=()):
+    """
+    Analyze any number of workbooks in constant memory with probabilistic sketches.
+
+    Every sheet matched by `sources` is streamed into a gem_sketch
+    ResellerSketch; sketches saved by earlier runs (`merge_paths`) are
+    merged in, and the combined sketch can be saved for later merges.
+    Prints the report; `json_path` works as in analyze_excel_file.
+    """
+    from gem_sketch import ResellerSketch, load_sketch, save_sketch, sketch_sources
+
+    try:
+        sketch, sheets = sketch_sources(sources, workers) if sources else (ResellerSketch(), 0)
+        if not sheets and not merge_paths:
+            raise ValueError(f"no workbooks found in {', '.join(sources) or 'the given sources'}")
+        for path in merge_paths:
+            sketch.merge(load_sketch(path))
+        if save_path:
+            save_sketch(sketch, save_path)
+
+        report = dict(sketch.report(top_k), sheets=sheets, merged_sketches=len(merge_paths))
+        if json_path == '-':
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return report
+        print_sketch_report(report)
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+    except Exception as e:
+        print(f"Error analyzing workbooks: {e}")
+
+
+def analyze_excel_file(path=DEFAULT_WORKBOOK, top_k=10, json_path=None):
+    """
+    Analyze the GeM_Resellers.xlsx file (or another workbook at `path`) to
+    understand its structure and how to create meaningful batches.
+
+    Prints the profiling report; with `json_path` it is also written there
+    as JSON ('-' prints the JSON instead of the readable report).
+    """
+    try:
+        report = profile_reseller_table(path, top_k)
+        if json_path == '-':
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return report
+        print_profile(report)
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
     except Exception as e:
         print(f"Error analyzing Excel file: {e}")
 
 if __name__ == "__main__":
-    analyze_excel_file() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Profile a GeM reseller workbook")
+    parser.add_argument('sources', nargs='*', help="With --sketch: workbook files, directories or glob patterns")
+    parser.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to read")
+    parser.add_argument('--top', type=int, default=10, help="Number of top domains to report")
+    parser.add_argument('--json', help="Also write the report as JSON to this file ('-' for stdout only)")
+    parser.add_argument('--sketch', action='store_true',
+                        help="Stream the sources into constant-memory sketches instead of loading them")
+    parser.add_argument('--workers', type=int, default=None, help="With --sketch: worker processes")
+    parser.add_argument('--save-sketch', help="With --sketch: save the merged sketch to this file")
+    parser.add_argument('--merge-sketch', action='append', default=[], help="With --sketch: merge a saved sketch")
+    args = parser.parse_args()
+
+    if args.sketch:
+        sources = args.sources or ([] if args.merge_sketch else [args.workbook])
+        analyze_sketch(sources, args.workers, args.top, args.json, args.save_sketch, args.merge_sketch)
+    else:
+        analyze_excel_file(args.workbook, args.top, args.json)
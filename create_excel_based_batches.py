@@ -1,6 +1,36 @@
-import pandas as pd
+import argparse
+import hashlib
 import json
+import os
 import re
+from collections import Counter
+
+from gem_batch_planner import load_batch_spec, plan_batches
+from gem_cache import CACHE_DIR, read_cached_frame
+from gem_classify import (
+    classify_company_type,
+    classify_company_types,
+    classify_domain,
+    classify_email_domains,
+    classifier_fingerprint,
+    email_domain,
+)
+from gem_dedup import Deduplicator
+from gem_deliverability import UNDELIVERABLE, UdpResolver, check_domains, mark_deliverability
+from gem_emit import MOCK_DATA_TS, SHARD_DIR, write_mock_data_ts, write_sharded
+from gem_entities import print_entity_report, resolve_companies
+from gem_geo import load_gazetteer
+from gem_metrics import PipelineMetrics
+from gem_reader import COMPANY_COLUMN, DEFAULT_WORKBOOK, EMAIL_COLUMNS
+from gem_store import RecipientStore
+from gem_suppression import SuppressionIndex, filter_batches
+
+# Size of the overall GEM_EMAIL_BATCH sample
+EMAIL_BATCH_SIZE = 100
+
+# Per-row fingerprints and batch assignments of the previous run
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'gem-batches-manifest.json')
+MANIFEST_VERSION = 2
 
 # Email validation regex pattern
 EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
@@ -22,193 +52,409 @@ def is_valid_email(email):
 
 def get_company_type(company_name):
     """Determine the company type based on the company name."""
-    company_name_lower = company_name.lower()
-    if "private limited" in company_name_lower:
-        return "Private Limited"
-    elif "ltd" in company_name_lower or "limited" in company_name_lower:
-        return "Limited"
-    elif "llp" in company_name_lower:
-        return "LLP"
-    elif "corporation" in company_name_lower or "corp" in company_name_lower:
-        return "Corporation"
-    elif "enterprises" in company_name_lower or "enterprise" in company_name_lower:
-        return "Enterprise"
-    elif "industries" in company_name_lower or "industry" in company_name_lower:
-        return "Industry"
-    else:
-        return "Other"
-
-def get_domain_category(email):
-    """Categorize the email domain."""
-    if not is_valid_email(email):
+    return classify_company_type(company_name)
+
+def get_domain_category(email, validated=False):
+    """
+    Categorize the email domain.
+
+    Pass validated=True when the caller has already run is_valid_email.
+    """
+    if not validated and not is_valid_email(email):
         return "Unknown"
     
-    domain = email.split('@')[-1].lower()
-    
-    if domain == "gmail.com":
-        return "Gmail"
-    elif "yahoo" in domain:
-        return "Yahoo"
-    elif domain in ["rediffmail.com", "hotmail.com", "outlook.com"]:
-        return "Other Personal Email"
-    elif domain.endswith(".gov.in") or ".gov." in domain:
-        return "Government"
-    elif domain.endswith(".edu") or domain.endswith(".ac.in"):
-        return "Education"
-    else:
-        return "Business Email"
-
-def create_batches_from_excel():
-    """Create batches based on the data from the Excel file."""
+    return classify_domain(email_domain(email))
+
+# Column-at-a-time versions of the checks above. They take pandas Series
+# and return the same labels as is_valid_email / get_company_type /
+# get_domain_category, without a Python call per cell.
+
+def valid_email_mask(emails):
+    """Vectorized is_valid_email: boolean Series, True where the cell is a valid email."""
+    is_text = emails.map(type).eq(str)
+    stripped = emails.where(is_text, '').astype(str).str.strip()
+    return (
+        is_text
+        & (stripped.str.len() >= 5)
+        & stripped.str.contains('@', regex=False)
+        & stripped.str.match(EMAIL_PATTERN.pattern)
+    )
+
+def get_company_types(company_names):
+    """Vectorized get_company_type over a Series of company names."""
+    return classify_company_types(company_names)
+
+def get_domain_categories(emails, valid=None):
+    """
+    Vectorized get_domain_category over a Series of emails.
+
+    Pass the mask from valid_email_mask as `valid` to avoid validating twice.
+    Each distinct domain is categorized once.
+    """
+    if valid is None:
+        valid = valid_email_mask(emails)
+    return classify_email_domains(emails, valid)
+
+def build_recipient_table(df, keep_position=False):
+    """
+    Build the recipient table for a reseller DataFrame in one vectorized pass.
+
+    Returns a DataFrame with address, name, company_type and domain_category
+    columns: one row per valid Email 1/2/3 cell, in sheet order (row by row,
+    Email 1 before Email 2 before Email 3). With keep_position=True the
+    source row label and email slot are kept as 'row' and 'slot' columns.
+    """
+    import pandas as pd
+
+    company_names = df.get(COMPANY_COLUMN, pd.Series('Unknown Company', index=df.index))
+    company_types = get_company_types(company_names)
+
+    parts = []
+    for slot, column in enumerate(EMAIL_COLUMNS):
+        if column not in df.columns:
+            continue
+        emails = df[column]
+        valid = valid_email_mask(emails)
+        parts.append(pd.DataFrame({
+            'address': emails[valid],
+            'name': company_names[valid],
+            'company_type': company_types[valid],
+            'domain_category': get_domain_categories(emails, valid)[valid],
+            'row': df.index[valid],
+            'slot': slot
+        }))
+
+    if not parts:
+        return pd.DataFrame(columns=['address', 'name', 'company_type', 'domain_category', 'row', 'slot'])
+
+    table = pd.concat(parts).sort_values(['row', 'slot'], kind='stable').reset_index(drop=True)
+    if keep_position:
+        return table
+    return table.drop(columns=['row', 'slot'])
+
+def row_fingerprint(company_name, email1, email2, email3):
+    """Stable fingerprint of a reseller row's cleaned cells."""
+    data = '\x1f'.join((company_name, email1, email2, email3)).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+def load_batch_manifest(path=MANIFEST_PATH):
+    """Load the manifest written by the previous run, or None if there is no usable one."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except ValueError:
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def save_batch_manifest(manifest, path=MANIFEST_PATH):
+    """Write the manifest via a temporary file so a crash never leaves it half-written."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def classify_rows(df, fingerprints, known=None):
+    """
+    Classify the rows of a reseller DataFrame, reusing earlier results.
+
+    Returns ({fingerprint: {'company_type', 'recipients'}}, number of rows
+    classified). Only rows whose fingerprint is missing from `known` are
+    validated and classified; `recipients` is a list of
+    [address, domain_category] pairs in Email 1/2/3 order.
+    """
+    known = known or {}
+    rows = {}
+    delta = []
+    for position, fingerprint in enumerate(fingerprints):
+        if fingerprint in rows:
+            continue
+        if fingerprint in known:
+            rows[fingerprint] = known[fingerprint]
+        else:
+            rows[fingerprint] = {'company_type': None, 'recipients': []}
+            delta.append(position)
+
+    if delta:
+        delta_df = df.iloc[delta]
+        company_types = get_company_types(delta_df[COMPANY_COLUMN])
+        for position, company_type in zip(delta, company_types):
+            rows[fingerprints[position]]['company_type'] = company_type
+
+        table = build_recipient_table(delta_df, keep_position=True)
+        for address, domain_category, position in zip(table['address'], table['domain_category'], table['row']):
+            rows[fingerprints[position]]['recipients'].append([address, domain_category])
+
+    return rows, len(delta)
+
+def tag_rows(df, fingerprints, rows, gazetteer):
+    """
+    Add the 'state' and 'district' named by each row that has none yet.
+
+    Rows carried over from an earlier run keep their tags; each new row's
+    company name and email cells are scanned once by the gazetteer index.
+    Returns the number of rows tagged.
+    """
+    tagged = 0
+    cells = zip(fingerprints, df[COMPANY_COLUMN], *(df[column] for column in EMAIL_COLUMNS))
+    for fingerprint, company_name, *emails in cells:
+        row = rows[fingerprint]
+        if 'state' not in row:
+            row['state'], row['district'] = gazetteer.tag(company_name, emails)
+            tagged += 1
+    return tagged
+
+def collect_recipients(df, fingerprints, rows, company_ids):
+    """
+    Expand classified rows back into recipient dicts in sheet order.
+
+    Each recipient gets a 'key' (fingerprint, occurrence, slot) that stays
+    the same across runs as long as its row is unchanged, and the
+    'company_id' of its row (see gem_entities.resolve_companies).
+    """
+    all_emails = []
+    occurrences = {}
+    for company_name, fingerprint, company_id in zip(df[COMPANY_COLUMN], fingerprints, company_ids):
+        occurrence = occurrences.get(fingerprint, 0)
+        occurrences[fingerprint] = occurrence + 1
+        row = rows[fingerprint]
+        for slot, (address, domain_category) in enumerate(row['recipients']):
+            all_emails.append({
+                'address': address,
+                'name': company_name,
+                'company_type': row['company_type'],
+                'domain_category': domain_category,
+                'state': row['state'],
+                'district': row['district'],
+                'company_id': company_id,
+                'key': f"{fingerprint}:{occurrence}:{slot}"
+            })
+    return all_emails
+
+def _fill_batch(candidates, previous_keys, by_key, limit):
+    """Keep the previous members that are still candidates, then top up in order."""
+    candidate_keys = {email['key'] for email in candidates}
+    kept = [by_key[key] for key in previous_keys or [] if key in candidate_keys]
+    kept_keys = {email['key'] for email in kept}
+    recipients = kept + [email for email in candidates if email['key'] not in kept_keys]
+    return recipients[:limit]
+
+def plan_gem_batches(all_emails, spec=None, previous=None):
+    """
+    Partition the recipients into batches with the batch planner.
+
+    `spec` defaults to gem_batch_planner.DEFAULT_BATCH_SPEC.
+    With `previous` (the manifest of an earlier run) existing members keep
+    their batch and only free slots and new batches take new recipients,
+    so a daily refresh patches the batches instead of reshuffling them.
+    Returns (gem_batches, email_batch, unassigned_count).
+    """
+    previous = previous or {}
+    gem_batches, unassigned = plan_batches(all_emails, spec or load_batch_spec(), previous.get('batches'))
+
+    by_key = {email['key']: email for email in all_emails}
+    email_batch = _fill_batch(all_emails, previous.get('email_batch'), by_key, EMAIL_BATCH_SIZE)
+    return gem_batches, email_batch, unassigned
+
+def create_batches_from_excel(path=DEFAULT_WORKBOOK, incremental=False, spec=None, emit='ts', encoding='objects',
+                              metrics=None, output=MOCK_DATA_TS, shard_dir=SHARD_DIR, domain_check=False, resolver=None,
+                              suppression=None, max_per_company=None, store=None, exclude_contacted_days=None):
+    """
+    Create batches based on the data from the Excel file.
+
+    `spec` is a batch planner spec (see gem_batch_planner.DEFAULT_BATCH_SPEC)
+    setting the segment keys, batch size and maximum number of batches.
+    `emit` selects the output: 'ts' (the module at `output`), 'sharded'
+    (manifest plus one JSON shard per batch under `shard_dir`) or 'both'; with
+    encoding='columnar' recipient lists are written as address arrays plus
+    name references into a dictionary, one per module or per shard (see
+    gem_emit.encode_recipients).
+
+    With incremental=True the manifest from the previous run is reused:
+    only new or edited rows are classified and the existing batch
+    assignments are patched rather than rebuilt.
+
+    With domain_check=True every recipient domain is checked for MX/A
+    records (see gem_deliverability; `resolver` defaults to the system
+    nameserver) and recipients on undeliverable domains are left out.
+
+    `suppression` is a gem_suppression index directory; recipients on it
+    are removed from the planned batches and the loss per batch reported.
+
+    Every row is tagged with the state and district its company name and
+    email addresses point to (see gem_geo), so 'state' and 'district' can
+    be used as segment keys; the reference lists of states and districts
+    come from the same gazetteer.
+
+    Company names are clustered into firms (see gem_entities) and every
+    recipient carries its firm's 'company_id'; with `max_per_company` only
+    that many recipients of each firm are kept, the first in sheet order.
+
+    `store` is a gem_store database path: the deduplicated recipients are
+    upserted into it, flagged when suppressed or on an undeliverable
+    domain so its segments leave them out, and with
+    `exclude_contacted_days` anyone it records as contacted within that
+    many days is left out before batching.
+
+    Each stage (ingest, classify, geo, entities, dedup, domains, store, cap, batch, suppress, emit) is timed by
+    `metrics` (a gem_metrics.PipelineMetrics, by default configured from
+    the GEM_METRICS* environment variables), which is written out even
+    when a stage fails; errors are reported and re-raised.
+    """
+    if exclude_contacted_days is not None and not store:
+        raise ValueError("exclude_contacted_days needs a recipient store to read the send history from")
+    metrics = metrics or PipelineMetrics('create_excel_based_batches')
     try:
-        # Read the Excel file
-        df = pd.read_excel('GeM_Resellers.xlsx')
+        # Load the reseller rows (from the parse cache when the workbook is
+        # unchanged) and fingerprint them
+        with metrics.stage('ingest') as stage:
+            df = read_cached_frame(path)
+            records = zip(*(df[name] for name in [COMPANY_COLUMN] + EMAIL_COLUMNS))
+            fingerprints = [row_fingerprint(*record) for record in records]
+            stage['rows'] = len(fingerprints)
         
-        # Clean up the data
-        # Convert columns to string and replace NaNs with empty strings
-        df = df.astype(object).fillna('')
+        previous = load_batch_manifest() if incremental else None
+        if incremental and previous is None:
+            print("No usable manifest from a previous run, processing every row")
         
-        # Extract valid emails with metadata
-        all_emails = []
-        company_types_set = set()
-        domain_categories_set = set()
+        # Classify new or changed rows a column at a time; results from older
+        # classifier tables (or email validation) are all redone
+        classifier = classifier_fingerprint(EMAIL_PATTERN.pattern)
+        known = previous['rows'] if previous and previous.get('classifier') == classifier else None
+        if previous and known is None:
+            print("Classifier tables changed since the previous run, classifying every row again")
+        with metrics.stage('classify', rows=len(fingerprints)) as stage:
+            rows, classified_count = classify_rows(df, fingerprints, known)
+            stage['caches'] = {'incremental_rows': {
+                'hits': len(rows) - classified_count,
+                'misses': classified_count,
+                'hit_rate': round((len(rows) - classified_count) / len(rows), 4) if rows else 0
+            }}
+        print(f"Rows classified this run: {classified_count} of {len(fingerprints)}")
         
-        for index, row in df.iterrows():
-            company_name = row.get('Name of Company', 'Unknown Company')
-            company_type = get_company_type(str(company_name))
-            company_types_set.add(company_type)
-            
-            # Process Email 1
-            email1 = row.get('Email 1', '')
-            if is_valid_email(email1):
-                domain_category = get_domain_category(email1)
-                domain_categories_set.add(domain_category)
-                all_emails.append({
-                    'address': email1,
-                    'name': company_name,
-                    'company_type': company_type,
-                    'domain_category': domain_category
-                })
-            
-            # Process Email 2
-            email2 = row.get('Email 2', '')
-            if is_valid_email(email2):
-                domain_category = get_domain_category(email2)
-                domain_categories_set.add(domain_category)
-                all_emails.append({
-                    'address': email2,
-                    'name': company_name,
-                    'company_type': company_type,
-                    'domain_category': domain_category
-                })
-            
-            # Process Email 3
-            email3 = row.get('Email 3', '')
-            if is_valid_email(email3):
-                domain_category = get_domain_category(email3)
-                domain_categories_set.add(domain_category)
-                all_emails.append({
-                    'address': email3,
-                    'name': company_name,
-                    'company_type': company_type,
-                    'domain_category': domain_category
-                })
+        # Tag rows with the state and district they name; tags from an older gazetteer are redone
+        gazetteer = load_gazetteer()
+        with metrics.stage('geo', rows=len(rows)) as stage:
+            if previous and previous.get('gazetteer') != gazetteer.fingerprint:
+                for row in rows.values():
+                    row.pop('state', None)
+            stage['rows'] = tag_rows(df, fingerprints, rows, gazetteer)
         
-        print(f"Total valid emails collected: {len(all_emails)}")
-        print(f"Company types found: {sorted(list(company_types_set))}")
-        print(f"Domain categories found: {sorted(list(domain_categories_set))}")
+        # Cluster spelling variants of a firm's name under one company ID, kept stable across runs
+        with metrics.stage('entities', rows=len(fingerprints)):
+            company_ids, companies, entity_stats = resolve_companies(
+                list(df[COMPANY_COLUMN]), previous=previous.get('companies') if previous else None
+            )
+        print_entity_report(entity_stats)
         
-        # Create batches based on company type
-        company_type_batches = {}
-        for email in all_emails:
-            company_type = email['company_type']
-            if company_type not in company_type_batches:
-                company_type_batches[company_type] = []
-            company_type_batches[company_type].append(email)
+        # Extract valid emails with metadata, keeping the first row of each address
+        with metrics.stage('dedup') as stage:
+            deduplicator = Deduplicator()
+            recipients = collect_recipients(df, fingerprints, rows, company_ids)
+            all_emails = [email for email in recipients if deduplicator.add(email['address'], path)]
+            stage['rows'] = len(recipients)
         
-        # Create batches based on domain category
-        domain_category_batches = {}
-        for email in all_emails:
-            domain_category = email['domain_category']
-            if domain_category not in domain_category_batches:
-                domain_category_batches[domain_category] = []
-            domain_category_batches[domain_category].append(email)
+        # Check that recipient domains can receive mail, before the store records the result
+        if domain_check:
+            with metrics.stage('domains', rows=len(all_emails)):
+                statuses = check_domains((email_domain(email['address']) for email in all_emails), resolver)
+                deliverability = mark_deliverability(all_emails, statuses)
+            print(f"Domain check over {len(statuses)} domains, recipients: " +
+                  ", ".join(f"{count} {status}" for status, count in sorted(deliverability.items())))
         
-        # Print batch statistics
-        print("\nBatches by Company Type:")
-        for company_type, emails in company_type_batches.items():
-            print(f"  {company_type}: {len(emails)} emails")
+        index = SuppressionIndex(suppression) if suppression else None
         
-        print("\nBatches by Domain Category:")
-        for domain_category, emails in domain_category_batches.items():
-            print(f"  {domain_category}: {len(emails)} emails")
+        # Record this run's recipients in the store, flagged if suppressed, and leave out anyone contacted too recently
+        if store:
+            with metrics.stage('store', rows=len(all_emails)) as stage, RecipientStore(store) as recipient_store:
+                if index is not None:
+                    flags = index.contains_many(email['address'] for email in all_emails)
+                    for email, suppressed in zip(all_emails, flags):
+                        email['suppressed'] = suppressed
+                stage['written'], stage['deactivated'] = recipient_store.upsert_recipients(all_emails)
+                if exclude_contacted_days is not None:
+                    contacted = recipient_store.recently_contacted(
+                        (email['address'] for email in all_emails), exclude_contacted_days
+                    )
+                    stage['excluded'] = sum(email['address'] in contacted for email in all_emails)
+                    all_emails = [email for email in all_emails if email['address'] not in contacted]
+            print(f"Recipient store {store}: {stage['written']} recipients written, "
+                  f"{stage['deactivated']} no longer in the workbook")
+            if exclude_contacted_days is not None:
+                print(f"Recipients contacted in the last {exclude_contacted_days} days left out: {stage['excluded']}")
         
-        # Create final GeM batches
-        gem_batches = []
+        # Leave out recipients whose domain cannot receive mail
+        if domain_check:
+            all_emails = [email for email in all_emails if email['deliverability'] != UNDELIVERABLE]
         
-        # Batch 1: Private Limited Companies
-        gem_batches.append({
-            "batch_name": "Batch 1: Private Limited Companies",
-            "category": "Company Type",
-            "type": "Private Limited",
-            "recipients": company_type_batches.get("Private Limited", [])[:100],
-            "recipient_count": min(100, len(company_type_batches.get("Private Limited", [])))
-        })
+        # Keep the first recipients of each company
+        if max_per_company:
+            with metrics.stage('cap', rows=len(all_emails)) as stage:
+                per_company = Counter()
+                capped = []
+                for email in all_emails:
+                    company_id = email['company_id']
+                    if company_id is None or per_company[company_id] < max_per_company:
+                        per_company[company_id] += 1
+                        capped.append(email)
+                stage['capped'] = len(all_emails) - len(capped)
+                all_emails = capped
+            print(f"Recipients left out by the cap of {max_per_company} per company: {stage['capped']}")
         
-        # Batch 2: Gmail Users
-        gem_batches.append({
-            "batch_name": "Batch 2: Gmail Users",
-            "category": "Email Domain",
-            "type": "Gmail",
-            "recipients": domain_category_batches.get("Gmail", [])[:100],
-            "recipient_count": min(100, len(domain_category_batches.get("Gmail", [])))
-        })
+        company_types_set = {row['company_type'] for row in rows.values()}
+        domain_categories_set = {email['domain_category'] for email in all_emails}
         
-        # Batch 3: Business Email Users
-        gem_batches.append({
-            "batch_name": "Batch 3: Business Email Users",
-            "category": "Email Domain",
-            "type": "Business Email",
-            "recipients": domain_category_batches.get("Business Email", [])[:100],
-            "recipient_count": min(100, len(domain_category_batches.get("Business Email", [])))
-        })
+        print(f"Total valid emails collected: {len(all_emails)}")
+        print(f"Company types found: {sorted(list(company_types_set))}")
+        print(f"Domain categories found: {sorted(list(domain_categories_set))}")
+        deduplicator.print_report()
         
-        # Batch 4: Limited Companies
-        gem_batches.append({
-            "batch_name": "Batch 4: Limited Companies",
-            "category": "Company Type",
-            "type": "Limited",
-            "recipients": company_type_batches.get("Limited", [])[:100],
-            "recipient_count": min(100, len(company_type_batches.get("Limited", [])))
-        })
+        # Print segment statistics
+        groups = {'company_type': Counter(), 'domain_category': Counter(), 'state': Counter()}
+        for email in all_emails:
+            for field, counts in groups.items():
+                counts[email[field] or "Unknown"] += 1
         
-        # Batch 5: Other Companies (Enterprises, Industries, etc.)
-        combined_other = []
-        for company_type in ["Enterprise", "Industry", "Corporation"]:
-            if company_type in company_type_batches:
-                combined_other.extend(company_type_batches[company_type])
+        print("\nRecipients by Company Type:")
+        for company_type, count in groups['company_type'].items():
+            print(f"  {company_type}: {count} emails")
         
-        gem_batches.append({
-            "batch_name": "Batch 5: Other Companies",
-            "category": "Company Type",
-            "type": "Combined Others",
-            "recipients": combined_other[:100],
-            "recipient_count": min(100, len(combined_other))
-        })
+        print("\nRecipients by Domain Category:")
+        for domain_category, count in groups['domain_category'].items():
+            print(f"  {domain_category}: {count} emails")
+        
+        print("\nRecipients by State:")
+        for state, count in groups['state'].most_common():
+            print(f"  {state}: {count} emails")
+        
+        # Create final GeM batches covering every recipient
+        with metrics.stage('batch', rows=len(all_emails)):
+            gem_batches, email_batch, unassigned = plan_gem_batches(all_emails, spec, previous)
+        
+        # Drop unsubscribed, bounced and complaining recipients from the planned batches
+        if index is not None:
+            with metrics.stage('suppress', rows=sum(batch['recipient_count'] for batch in gem_batches)) as stage:
+                lost, email_lost = filter_batches(index, gem_batches, email_batch)
+                stage['suppressed'] = sum(lost.values()) + email_lost
+            print(f"\nSuppression list ({len(index)} addresses) removed {stage['suppressed']} recipients:")
+            for batch_name, count in lost.items():
+                if count:
+                    print(f"  {batch_name}: -{count}")
+            if email_lost:
+                print(f"  Email batch: -{email_lost}")
         
         print("\nFinal GeM Batches:")
         for batch in gem_batches:
             print(f"  {batch['batch_name']}: {batch['recipient_count']} emails")
+        if unassigned:
+            print(f"Warning: {unassigned} recipients not batched because max_batches was reached")
         
         # Create JavaScript file with the mock data for use in the application
-        gem_states = [
-            "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
-            "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
-            "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya",
-            "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim",
-            "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand",
-            "West Bengal"
-        ]
+        gem_states = gazetteer.states
         
         gem_categories = [
             "Office Supplies",
@@ -228,12 +474,8 @@ def create_batches_from_excel():
             "Industrial Machinery"
         ]
         
-        # Define districts per state (simplified - just a few districts per state)
-        districts_by_state = {}
-        for state in gem_states:
-            # Generate 3-5 mock districts per state
-            num_districts = 3  # Simplified for consistency
-            districts_by_state[state] = [f"{state} District {i+1}" for i in range(num_districts)]
+        # Districts per state from the gazetteer
+        districts_by_state = gazetteer.districts_by_state
         
         # Define products per category
         products_by_category = {
@@ -254,73 +496,81 @@ def create_batches_from_excel():
             "Industrial Machinery": ["Lathes", "Milling Machines", "Power Generators", "Industrial Ovens", "Conveyor Systems"]
         }
         
-        # Clean the batches for JSON serialization (remove company_type and domain_category)
-        cleaned_batches = []
-        for batch in gem_batches:
-            cleaned_recipients = []
-            for recipient in batch["recipients"]:
-                cleaned_recipients.append({
-                    "address": recipient["address"],
-                    "name": recipient["name"]
-                })
-            
-            cleaned_batch = {
-                "batch_name": batch["batch_name"],
-                "category": batch["category"],
-                "type": batch["type"],
-                "recipients": cleaned_recipients,
-                "recipient_count": batch["recipient_count"]
-            }
-            cleaned_batches.append(cleaned_batch)
-        
-        # All emails for the overall batch
-        all_cleaned_emails = []
-        for email in all_emails[:100]:  # Take just 100 for the main batch
-            all_cleaned_emails.append({
-                "address": email["address"],
-                "name": email["name"]
-            })
-        
-        js_content = """// Mock GeM data generated from the Excel file
-export const GEM_STATES = {0};
-
-export const GEM_CATEGORIES = {1};
-
-export const GEM_DISTRICTS_BY_STATE = {2};
-
-export const GEM_PRODUCTS_BY_CATEGORY = {3};
-
-export const GEM_BATCHES = {4};
-
-// Email batch for marketing
-export const GEM_EMAIL_BATCH = {5};
-
-// MSME dummy email for testing
-export const MSME_TEST_EMAILS = [
-  {{ "id": "msme1", "email": "your.actual.email@example.com", "name": "Your Name" }},
-  {{ "id": "msme2", "email": "test@example.com", "name": "Test User" }},
-  {{ "id": "msme3", "email": "msme-test@quickbid.co.in", "name": "MSME Test" }},
-  {{ "id": "msme4", "email": "info@msme-test.com", "name": "MSME Info" }},
-  {{ "id": "msme5", "email": "contact@msme-sample.com", "name": "MSME Contact" }}
-];
-""".format(
-            json.dumps(gem_states, indent=2),
-            json.dumps(gem_categories, indent=2),
-            json.dumps(districts_by_state, indent=2),
-            json.dumps(products_by_category, indent=2),
-            json.dumps(cleaned_batches, indent=2),
-            json.dumps(all_cleaned_emails, indent=2)
-        )
+        data = {
+            "states": gem_states,
+            "categories": gem_categories,
+            "districts_by_state": districts_by_state,
+            "products_by_category": products_by_category,
+            "batches": gem_batches,
+            "email_batch": email_batch  # Just 100 for the main batch; MSME_TEST_EMAILS is left as edited
+        }
         
-        # Write to a JavaScript file
-        with open('src/app/(dashboard)/email-marketing/gem-mock-data.ts', 'w') as f:
-            f.write(js_content)
+        # Write the TypeScript module and/or the lazily loadable shards
+        with metrics.stage('emit', rows=len(all_emails)):
+            if emit in ('ts', 'both'):
+                write_mock_data_ts(data, output, encoding=encoding)
+                print(f"\nMock data generated and saved to {output}")
+            if emit in ('sharded', 'both'):
+                manifest_path = write_sharded(data, shard_dir, encoding=encoding)
+                print(f"\nBatch shards and manifest written to {manifest_path}")
         
-        print(f"\nMock data generated and saved to src/app/(dashboard)/email-marketing/gem-mock-data.ts")
+        # Remember this run so the next incremental run only handles the delta;
+        # only once the output is written, or a failed emit would be taken as done
+        save_batch_manifest({
+            'version': MANIFEST_VERSION,
+            'gazetteer': gazetteer.fingerprint,
+            'classifier': classifier,
+            'companies': companies,
+            'rows': rows,
+            'batches': {
+                batch['batch_name']: {
+                    'segment': list(batch['segment'].values()),
+                    'keys': [email['key'] for email in batch['recipients']]
+                }
+                for batch in gem_batches
+            },
+            'email_batch': [email['key'] for email in email_batch]
+        })
         print(f"Created {len(gem_batches)} batches with different email lists based on the Excel data")
         
     except Exception as e:
         print(f"Error creating batches from Excel: {e}")
+        raise
+    finally:
+        metrics_path = metrics.write()
+        if metrics_path:
+            print(f"Stage metrics written to {metrics_path}")
 
 if __name__ == "__main__":
-    create_batches_from_excel() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create GeM email batches from the reseller workbook")
+    parser.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Reseller workbook to read")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only classify rows added or changed since the previous run")
+    parser.add_argument('--batch-spec', help="JSON file with segment_keys, batch_size and max_batches")
+    parser.add_argument('--emit', choices=['ts', 'sharded', 'both'], default='ts',
+                        help="Write gem-mock-data.ts, per-batch JSON shards, or both")
+    parser.add_argument('--encoding', choices=['objects', 'columnar'], default='objects',
+                        help="Recipient lists as {address, name} objects or dictionary-encoded columns")
+    parser.add_argument('--check-domains', action='store_true',
+                        help="Leave out recipients whose domain has no MX or A record")
+    parser.add_argument('--nameserver', help="DNS server for --check-domains (default: from /etc/resolv.conf)")
+    parser.add_argument('--suppression', help="Suppression index directory (see gem_suppression.py)")
+    parser.add_argument('--max-per-company', type=int, help="Keep at most this many recipients per company")
+    parser.add_argument('--store', help="Recipient store database to update (see gem_store.py)")
+    parser.add_argument('--exclude-contacted-days', type=int,
+                        help="With --store: leave out recipients contacted within this many days")
+    parser.add_argument('--metrics', help="Write per-stage metrics to this file (.json, or .jsonl to append)")
+    parser.add_argument('--metrics-format', choices=['json', 'jsonl'], help="Metrics file format")
+    parser.add_argument('--profile', metavar='STAGE', help="Run this stage under cProfile")
+    parser.add_argument('--profile-out', help="cProfile dump path (default: <stage>.prof)")
+    args = parser.parse_args()
+    if args.exclude_contacted_days is not None and not args.store:
+        parser.error("--exclude-contacted-days needs --store")
+    metrics = PipelineMetrics('create_excel_based_batches', args.metrics, args.metrics_format,
+                              args.profile, args.profile_out)
+    create_batches_from_excel(args.workbook, incremental=args.incremental,
+                              spec=load_batch_spec(args.batch_spec), emit=args.emit,
+                              encoding=args.encoding, metrics=metrics, domain_check=args.check_domains,
+                              resolver=UdpResolver(args.nameserver), suppression=args.suppression,
+                              max_per_company=args.max_per_company, store=args.store,
+                              exclude_contacted_days=args.exclude_contacted_days)
\ No newline at end of file
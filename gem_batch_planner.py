@@ -0,0 +1,155 @@
+import json
+
+from gem_classify import email_domain
+
+# Recipient fields that can be used as segment keys, with their display names
+SEGMENT_KEY_NAMES = {
+    'company_type': "Company Type",
+    'domain_category': "Email Domain",
+    'state': "State",
+    'district': "District",
+}
+
+DEFAULT_BATCH_SPEC = {
+    'segment_keys': ['company_type', 'domain_category'],
+    'batch_size': 100,
+    'max_batches': None,
+}
+
+
+def _is_positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def load_batch_spec(path=None):
+    """Read a batch spec from a JSON file, filling missing fields from DEFAULT_BATCH_SPEC."""
+    spec = dict(DEFAULT_BATCH_SPEC)
+    if path:
+        with open(path, 'r') as f:
+            spec.update(json.load(f))
+
+    unknown = [key for key in spec['segment_keys'] if key not in SEGMENT_KEY_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown segment keys: {unknown}")
+    if not _is_positive_int(spec['batch_size']):
+        raise ValueError(f"batch_size must be a positive integer, not {spec['batch_size']!r}")
+    if spec['max_batches'] is not None and not _is_positive_int(spec['max_batches']):
+        raise ValueError(f"max_batches must be a positive integer or null, not {spec['max_batches']!r}")
+    return spec
+
+
+def interleave_domains(recipients):
+    """
+    Reorder recipients so each mail domain is spread evenly through the list.
+
+    The i-th of a domain's c recipients is dropped into bucket
+    floor((i + 0.5) / c * n) of n buckets, so a provider holding half the
+    list lands on every other position instead of in one long run. Linear
+    time; the order is deterministic.
+    """
+    total = len(recipients)
+    if total < 3:
+        return list(recipients)
+
+    by_domain = {}
+    for recipient in recipients:
+        by_domain.setdefault(email_domain(recipient['address']), []).append(recipient)
+
+    buckets = [[] for _ in range(total)]
+    for members in by_domain.values():
+        count = len(members)
+        for i, recipient in enumerate(members):
+            buckets[int((i + 0.5) * total / count)].append(recipient)
+    return [recipient for bucket in buckets for recipient in bucket]
+
+
+def _segment_label(segment):
+    return " / ".join(segment)
+
+
+def plan_batches(recipients, spec=None, previous=None):
+    """
+    Partition every recipient into size-bounded batches per segment.
+
+    Recipients are grouped by the spec's segment_keys in one pass over the
+    table (a missing field counts as 'Unknown'), each segment's recipients
+    are interleaved by domain and cut into batches of at most batch_size.
+    Nothing is dropped unless max_batches is reached; the overflow count
+    is returned so callers can report it.
+
+    `previous` maps batch names to {'segment', 'keys'} from an earlier run.
+    Recipients (matched by their 'key') stay in their previous batch while
+    it still belongs to their segment; only the rest are interleaved into
+    free slots and new batches.
+
+    Returns (batches, unassigned_count).
+    """
+    spec = spec or DEFAULT_BATCH_SPEC
+    segment_keys = spec['segment_keys']
+    batch_size = spec['batch_size']
+    max_batches = spec.get('max_batches')
+    previous = previous or {}
+
+    previous_batch_of = {}
+    for batch_name, entry in previous.items():
+        for key in entry['keys']:
+            previous_batch_of[key] = batch_name
+
+    # Single pass: route each recipient to its kept batch or its segment's pool
+    segments = {}
+    for recipient in recipients:
+        segment = tuple(str(recipient.get(key) or "Unknown") for key in segment_keys)
+        state = segments.setdefault(segment, {'kept': {}, 'pool': []})
+        batch_name = previous_batch_of.get(recipient.get('key'))
+        if batch_name and tuple(previous[batch_name]['segment']) == segment:
+            state['kept'].setdefault(batch_name, []).append(recipient)
+        else:
+            state['pool'].append(recipient)
+
+    batches = []
+    unassigned = 0
+    # Segments in sorted order so the batch list is stable from run to run
+    for segment, state in sorted(segments.items()):
+        label = _segment_label(segment)
+
+        # Kept members beyond a (reduced) batch_size go back to the pool
+        kept = []
+        for name in previous:
+            if name in state['kept']:
+                kept.append((name, state['kept'][name][:batch_size]))
+                state['pool'].extend(state['kept'][name][batch_size:])
+        pool = interleave_domains(state['pool'])
+        position = 0
+
+        # Existing batches of this segment keep their members and take new ones into free slots
+        segment_batches = []
+        for name, members in kept:
+            free = batch_size - len(members)
+            members = members + pool[position:position + free]
+            position += min(free, len(pool) - position)
+            segment_batches.append((name, members))
+
+        used_names = set(previous)
+        part = 1
+        while position < len(pool):
+            while f"{label} - Batch {part}" in used_names:
+                part += 1
+            name = f"{label} - Batch {part}"
+            used_names.add(name)
+            segment_batches.append((name, pool[position:position + batch_size]))
+            position += batch_size
+
+        for name, members in segment_batches:
+            if max_batches is not None and len(batches) >= max_batches:
+                unassigned += len(members)
+                continue
+            batches.append({
+                "batch_name": name,
+                "category": " / ".join(SEGMENT_KEY_NAMES[key] for key in segment_keys),
+                "type": label,
+                "segment": dict(zip(segment_keys, segment)),
+                "recipients": members,
+                "recipient_count": len(members)
+            })
+
+    return batches, unassigned
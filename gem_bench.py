@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from gem_cache import CACHE_DIR
+from gem_metrics import peak_rss_mb
+from gem_synth import write_synthetic_workbook
+
+BENCH_DIR = os.path.join(CACHE_DIR, 'bench')
+# Throughput depends on the machine, so the baseline stays with the machine
+# that recorded it instead of in the repository
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+BASELINE_VERSION = 1
+
+DEFAULT_SIZES = [10_000, 100_000]
+
+# Lightweight CLI commands and the startup time they may add on top of a bare
+# interpreter; both import their modules and then stop, summary on the missing
+# data file and update-msme on the usage error for its missing arguments.
+# tests/test_cli_startup.py checks that they do not import pandas or numpy.
+STARTUP_COMMANDS = [
+    ['summary', '--data', os.path.join('missing', 'gem-mock-data.ts')],
+    ['update-msme', '--data', os.path.join('missing', 'gem-mock-data.ts')],
+]
+STARTUP_BUDGET_MS = 100
+
+# A stage regresses when its throughput drops below baseline / (1 + tolerance)
+# or its peak RSS grows above baseline * (1 + tolerance)
+DEFAULT_TOLERANCE = 0.5
+
+
+def synthetic_input(rows, fmt='xlsx', seed=0, bench_dir=BENCH_DIR):
+    """Path of a synthetic workbook with `rows` rows, generated on first use."""
+    os.makedirs(bench_dir, exist_ok=True)
+    path = os.path.join(bench_dir, f"synthetic-{rows}-s{seed}.{fmt}")
+    if not os.path.exists(path):
+        write_synthetic_workbook(path, rows, seed)
+    return path
+
+
+def run_pipeline(path, out_dir):
+    """
+    Run every pipeline stage once on a workbook and time each one.
+
+    The stages are the ones create_excel_based_batches runs, split so they
+    can be timed on their own: read (stream and parse, bypassing the parse
+    cache), validate, classify, dedup, batch (gem_batch_planner) and emit
+    (sharded output into `out_dir`). Returns one result dict per stage.
+    """
+    from create_excel_based_batches import get_company_types, get_domain_categories, valid_email_mask
+    from gem_batch_planner import DEFAULT_BATCH_SPEC, plan_batches
+    from gem_dedup import Deduplicator
+    from gem_emit import write_sharded
+    from gem_reader import COMPANY_COLUMN, EMAIL_COLUMNS, read_reseller_frame
+
+    results = []
+
+    def timed(stage, count, func):
+        start = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - start
+        results.append({
+            'stage': stage,
+            'seconds': round(seconds, 4),
+            'rows': count(value) if callable(count) else count,
+            'peak_rss_mb': round(peak_rss_mb(), 1)
+        })
+        results[-1]['rows_per_second'] = round(results[-1]['rows'] / seconds) if seconds > 0 else None
+        return value
+
+    frame = timed('read', len, lambda: read_reseller_frame(path))
+    rows = len(frame)
+
+    masks = timed('validate', rows, lambda: {column: valid_email_mask(frame[column]) for column in EMAIL_COLUMNS})
+
+    def classify():
+        company_types = get_company_types(frame[COMPANY_COLUMN])
+        categories = {column: get_domain_categories(frame[column], masks[column]) for column in EMAIL_COLUMNS}
+        return company_types, categories
+    company_types, categories = timed('classify', rows, classify)
+
+    def dedup():
+        deduplicator = Deduplicator()
+        columns = [
+            (frame[column].tolist(), masks[column].tolist(), categories[column].tolist())
+            for column in EMAIL_COLUMNS
+        ]
+        recipients = []
+        for row, (company_name, company_type) in enumerate(zip(frame[COMPANY_COLUMN], company_types)):
+            for slot, (emails, valid, category) in enumerate(columns):
+                if valid[row] and deduplicator.add(emails[row]):
+                    recipients.append({
+                        'address': emails[row],
+                        'name': company_name,
+                        'company_type': company_type,
+                        'domain_category': category[row],
+                        'key': f"{row}:{slot}"
+                    })
+        return recipients
+    recipients = timed('dedup', rows, dedup)
+
+    batches = timed('batch', len(recipients), lambda: plan_batches(recipients, DEFAULT_BATCH_SPEC)[0])
+
+    timed('emit', len(recipients), lambda: write_sharded({
+        'states': [],
+        'categories': [],
+        'districts_by_state': {},
+        'products_by_category': {},
+        'batches': batches,
+        'email_batch': recipients[:100]
+    }, out_dir))
+    return results
+
+
+def run_isolated(path):
+    """Run the pipeline in a fresh interpreter so peak RSS is not inherited from earlier runs."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-one', path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _best_wall_ms(command, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_startup(commands=STARTUP_COMMANDS, repeats=5, budget_ms=STARTUP_BUDGET_MS):
+    """
+    Time gem_cli commands against a bare interpreter.
+
+    Returns (results, failures). A command fails when its best-of-`repeats`
+    wall time exceeds the interpreter's by more than `budget_ms`.
+    """
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gem_cli.py')
+    interpreter_ms = _best_wall_ms([sys.executable, '-c', 'pass'], repeats)
+
+    results = []
+    failures = []
+    for args in commands:
+        name = ' '.join(args[:1])
+        overhead_ms = _best_wall_ms([sys.executable, cli] + args, repeats) - interpreter_ms
+        results.append({'command': name, 'startup_ms': round(overhead_ms, 1)})
+        if overhead_ms > budget_ms:
+            failures.append(f"gem_cli {name}: starts in {overhead_ms:.0f} ms over the interpreter (budget {budget_ms} ms)")
+    return results, failures
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        baseline = json.load(f)
+    return baseline if baseline.get('version') == BASELINE_VERSION else None
+
+
+def compare_to_baseline(key, results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a message for every stage of `results` that regressed against the baseline."""
+    regressions = []
+    expected = {entry['stage']: entry for entry in baseline.get('results', {}).get(key, [])}
+    for entry in results:
+        base = expected.get(entry['stage'])
+        if not base:
+            continue
+        if base['rows_per_second'] and entry['rows_per_second'] is not None \
+                and entry['rows_per_second'] < base['rows_per_second'] / (1 + tolerance):
+            regressions.append(f"{key} {entry['stage']}: {entry['rows_per_second']} rows/s "
+                               f"(baseline {base['rows_per_second']})")
+        if entry['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{key} {entry['stage']}: peak RSS {entry['peak_rss_mb']} MB "
+                               f"(baseline {base['peak_rss_mb']})")
+    return regressions
+
+
+def print_results(key, results):
+    print(f"\n{key}")
+    print(f"  {'stage':<10}{'seconds':>10}{'rows':>10}{'rows/s':>12}{'peak RSS MB':>13}")
+    for entry in results:
+        print(f"  {entry['stage']:<10}{entry['seconds']:>10.3f}{entry['rows']:>10}"
+              f"{entry['rows_per_second'] or 0:>12}{entry['peak_rss_mb']:>13.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GeM pipeline on synthetic reseller workbooks")
+    parser.add_argument('--rows', type=int, action='append',
+                        help=f"Workbook size to benchmark (repeatable, default {DEFAULT_SIZES})")
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx', help="Synthetic input format")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Stored baseline to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown / memory growth as a fraction of the baseline")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('--startup-only', action='store_true', help="Only check gem_cli startup time and imports")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        with tempfile.TemporaryDirectory() as out_dir:
+            print(json.dumps(run_pipeline(args.run_one, out_dir)))
+        return 0
+
+    startup, startup_failures = measure_startup()
+    print("CLI startup (over a bare interpreter):")
+    for entry in startup:
+        print(f"  {entry['command']:<12}{entry['startup_ms']:>8.1f} ms")
+    if args.startup_only:
+        for message in startup_failures:
+            print(f"  {message}")
+        return 1 if startup_failures else 0
+
+    all_results = {}
+    for rows in args.rows or DEFAULT_SIZES:
+        key = f"{rows}-{args.format}"
+        all_results[key] = run_isolated(synthetic_input(rows, args.format, args.seed))
+        print_results(key, all_results[key])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(all_results, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        baseline = baseline or {'version': BASELINE_VERSION, 'results': {}}
+        baseline['results'].update(all_results)
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    regressions = list(startup_failures)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to store one")
+    else:
+        for key, results in all_results.items():
+            regressions.extend(compare_to_baseline(key, results, baseline, args.tolerance))
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
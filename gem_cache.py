@@ -0,0 +1,317 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are not locked
+    fcntl = None
+
+from gem_metrics import register_cache_stats
+from gem_reader import (
+    COMPANY_COLUMN,
+    DEFAULT_WORKBOOK,
+    EMAIL_COLUMNS,
+    PARSER_VERSION,
+    ResellerRecord,
+    iter_sheet_rows,
+    records_from_rows,
+)
+
+CACHE_DIR = os.environ.get('GEM_CACHE_DIR', '.gem_cache')
+
+# Parsed-table lookups served from disk vs. rebuilt, for gem_metrics
+table_cache_stats = {'hits': 0, 'misses': 0}
+register_cache_stats('parse_cache', lambda: (table_cache_stats['hits'], table_cache_stats['misses']))
+
+# On-disk layout of a cached table:
+#   magic line, one JSON header line (header, columns), then chunks of up to
+#   CHUNK_ROWS rows: a JSON line (rows, byte length of each column) followed
+#   by each column as NUL-separated UTF-8 values. A final {"end": total rows}
+#   line marks a complete file.
+_MAGIC = b'GEMCOLS2\n'
+_SEPARATOR = '\x00'
+_RECORD_COLUMNS = [COMPANY_COLUMN] + EMAIL_COLUMNS
+
+# Rows per chunk: readers of the cache hold one chunk at a time
+CHUNK_ROWS = 50_000
+
+
+@contextmanager
+def _locked(index_path):
+    """Hold an exclusive lock on `index_path` for a read-modify-write (no-op without fcntl)."""
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(index_path + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _load_index(index_path):
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            pass
+    return {}
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_hash(path, cache_dir=CACHE_DIR):
+    """
+    Return the SHA-256 of the workbook contents.
+
+    Hashes are remembered per (size, mtime) in the cache directory so an
+    unchanged file is not re-read on every run. When a workbook changes,
+    the tables built from its previous contents are dropped unless another
+    path still has those contents. The index is locked while it is updated.
+    """
+    index_path = os.path.join(cache_dir, 'hashes.json')
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+
+    entry = _load_index(index_path).get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    sha = _file_sha256(path)
+
+    with _locked(index_path):
+        index = _load_index(index_path)
+        entry = index.get(key)
+        index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+        stale = entry['sha256'] if entry and entry['sha256'] != sha else None
+        if stale and all(other['sha256'] != stale for other in index.values()):
+            for name in os.listdir(cache_dir):
+                if name.startswith(stale + '-') and name.endswith('.cols'):
+                    os.remove(os.path.join(cache_dir, name))
+        _write_atomic(index_path, json.dumps(index, indent=2).encode('utf-8'))
+    return sha
+
+
+def cache_key(path, sheet=None, cache_dir=CACHE_DIR):
+    """Cache key for a workbook sheet: content hash + parser version + sheet."""
+    sheet_part = 'first' if sheet is None else hashlib.sha1(str(sheet).encode('utf-8')).hexdigest()[:12]
+    return f"{workbook_hash(path, cache_dir)}-p{PARSER_VERSION}-{sheet_part}"
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _encode_chunk(columns):
+    blobs = [
+        _SEPARATOR.join(value.replace(_SEPARATOR, '') for value in values).encode('utf-8')
+        for values in columns.values()
+    ]
+    meta = {'rows': len(next(iter(columns.values()), [])), 'lengths': [len(blob) for blob in blobs]}
+    return json.dumps(meta).encode('utf-8') + b'\n' + b''.join(blobs)
+
+
+def _read_table(path):
+    """Yield the header of a cached table, then its chunks as {column: values} dicts."""
+    with open(path, 'rb') as f:
+        if f.readline() != _MAGIC:
+            raise ValueError(f"Not a GeM cache file: {path}")
+        meta = json.loads(f.readline())
+        yield meta['header']
+
+        total = 0
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"Truncated GeM cache file: {path}")
+            chunk = json.loads(line)
+            if 'end' in chunk:
+                if chunk['end'] != total:
+                    raise ValueError(f"Corrupt GeM cache file: {path}")
+                return
+            columns = {}
+            for name, length in zip(meta['columns'], chunk['lengths']):
+                columns[name] = f.read(length).decode('utf-8').split(_SEPARATOR)
+            total += chunk['rows']
+            yield columns
+
+
+def _table_is_complete(path):
+    """Walk a cached table's chunk lines and end marker, skipping over the values, to check it is whole."""
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if f.readline() != _MAGIC:
+                return False
+            columns = len(json.loads(f.readline())['columns'])
+            total = 0
+            while True:
+                chunk = json.loads(f.readline())
+                if 'end' in chunk:
+                    return chunk['end'] == total and f.tell() == size
+                if len(chunk['lengths']) != columns:
+                    return False
+                f.seek(sum(chunk['lengths']), os.SEEK_CUR)
+                if f.tell() > size:
+                    return False
+                total += chunk['rows']
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def _parse_chunks(path, sheet, table_path):
+    """Stream a sheet through gem_reader in chunks, writing the cache file as it goes."""
+    rows = iter_sheet_rows(path, sheet)
+    header = next(rows, [])
+    yield header
+
+    tmp_path = f"{table_path}.tmp{os.getpid()}"
+    complete = False
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC + json.dumps({'header': header, 'columns': _RECORD_COLUMNS}).encode('utf-8') + b'\n')
+            total = 0
+            columns = {name: [] for name in _RECORD_COLUMNS}
+            for record in records_from_rows(rows, header):
+                for name, value in zip(_RECORD_COLUMNS, record):
+                    columns[name].append(value)
+                if len(columns[COMPANY_COLUMN]) >= CHUNK_ROWS:
+                    f.write(_encode_chunk(columns))
+                    total += CHUNK_ROWS
+                    yield columns
+                    columns = {name: [] for name in _RECORD_COLUMNS}
+            if columns[COMPANY_COLUMN]:
+                f.write(_encode_chunk(columns))
+                total += len(columns[COMPANY_COLUMN])
+                yield columns
+            f.write(json.dumps({'end': total}).encode('utf-8') + b'\n')
+        os.replace(tmp_path, table_path)
+        complete = True
+    finally:
+        # A reader that stopped early leaves no partial cache entry behind
+        if not complete and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def iter_table_chunks(path=DEFAULT_WORKBOOK, sheet=None, cache_dir=CACHE_DIR):
+    """
+    Yield the header of a workbook sheet, then its rows as {column: values} chunks.
+
+    Chunks hold up to CHUNK_ROWS rows of 'Name of Company' and 'Email 1/2/3'
+    cleaned cell values, so memory stays bounded by the chunk size. A hit
+    reads the chunks from the on-disk cache; a miss streams the sheet
+    through gem_reader and writes the cache entry under its content-hash
+    key while the chunks are consumed, so edits to the workbook or a new
+    PARSER_VERSION invalidate the entry automatically. An entry is only
+    served once its chunk lengths and end marker check out; a truncated
+    or corrupt one is rebuilt from the workbook.
+    """
+    key = cache_key(path, sheet, cache_dir)
+    table_path = os.path.join(cache_dir, f"{key}.cols")
+
+    if os.path.exists(table_path) and _table_is_complete(table_path):
+        table_cache_stats['hits'] += 1
+        try:
+            yield from _read_table(table_path)
+        except ValueError:
+            # Damaged inside a value after the check: too late for this reader, the next one rebuilds it
+            os.remove(table_path)
+            raise
+        return
+
+    table_cache_stats['misses'] += 1
+    os.makedirs(cache_dir, exist_ok=True)
+    yield from _parse_chunks(path, sheet, table_path)
+
+
+def load_reseller_table(path=DEFAULT_WORKBOOK, sheet=None, cache_dir=CACHE_DIR):
+    """
+    Return (header, columns) for a whole workbook sheet, using the on-disk cache.
+
+    `columns` maps 'Name of Company' and 'Email 1/2/3' to lists of cleaned
+    cell values. Prefer iter_table_chunks or iter_cached_records where the
+    whole table is not needed at once.
+    """
+    chunks = iter_table_chunks(path, sheet, cache_dir)
+    header = next(chunks)
+    columns = {name: [] for name in _RECORD_COLUMNS}
+    for chunk in chunks:
+        for name in _RECORD_COLUMNS:
+            columns[name].extend(chunk[name])
+    return header, columns
+
+
+def iter_cached_records(path=DEFAULT_WORKBOOK, sheet=None, cache_dir=CACHE_DIR):
+    """Yield ResellerRecord tuples from the cached table of a workbook sheet, one chunk in memory at a time."""
+    chunks = iter_table_chunks(path, sheet, cache_dir)
+    next(chunks)
+    for chunk in chunks:
+        for values in zip(*(chunk[name] for name in _RECORD_COLUMNS)):
+            yield ResellerRecord(*values)
+
+
+def read_cached_frame(path=DEFAULT_WORKBOOK, sheet=None, cache_dir=CACHE_DIR):
+    """Cached equivalent of gem_reader.read_reseller_frame."""
+    import pandas as pd
+
+    header, columns = load_reseller_table(path, sheet, cache_dir)
+    return pd.DataFrame(columns, columns=_RECORD_COLUMNS)
+
+
+def build_key(*inputs):
+    """Content address of a build: SHA-256 over the canonical JSON of its inputs."""
+    canonical = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def build_is_current(key, outputs, cache_dir=CACHE_DIR):
+    """
+    True if every output was written by the build `key` and is unchanged since.
+
+    Outputs edited or deleted after the build make it stale, so a skipped
+    build never leaves files behind that differ from what it would write.
+    """
+    builds = _load_index(os.path.join(cache_dir, 'builds.json'))
+    for output in outputs:
+        entry = builds.get(os.path.abspath(output))
+        if not entry or entry['key'] != key or not os.path.exists(output):
+            return False
+        if _file_sha256(output) != entry['sha256']:
+            return False
+    return True
+
+
+def record_build(key, outputs, cache_dir=CACHE_DIR):
+    """Remember that `outputs` were written by the build `key`."""
+    index_path = os.path.join(cache_dir, 'builds.json')
+    with _locked(index_path):
+        builds = _load_index(index_path)
+        for output in outputs:
+            builds[os.path.abspath(output)] = {'key': key, 'sha256': _file_sha256(output)}
+        _write_atomic(index_path, json.dumps(builds, indent=2).encode('utf-8'))
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Remove every cached table, the hash index and the build records."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith('.cols') or name in ('hashes.json', 'builds.json', 'hashes.json.lock', 'builds.json.lock'):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
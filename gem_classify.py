@@ -0,0 +1,257 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+
+from gem_metrics import register_cache_stats
+
+# Company legal forms in precedence order: the first rule with a keyword
+# anywhere in the (lowercased) name wins. Add a legal form here and both
+# the batch builder and the analysis report pick it up.
+COMPANY_TYPE_RULES = [
+    ("Private Limited", ["private limited"]),
+    ("Limited", ["ltd", "limited"]),
+    ("LLP", ["llp"]),
+    ("Corporation", ["corporation", "corp"]),
+    ("Enterprise", ["enterprises", "enterprise"]),
+    ("Industry", ["industries", "industry"]),
+]
+DEFAULT_COMPANY_TYPE = "Other"
+
+# Free-mail providers matched on the exact domain
+FREE_MAIL_DOMAINS = {
+    "gmail.com": "Gmail",
+    "googlemail.com": "Gmail",
+    "rediffmail.com": "Other Personal Email",
+    "hotmail.com": "Other Personal Email",
+    "outlook.com": "Other Personal Email",
+    "live.com": "Other Personal Email",
+}
+
+# Free-mail providers matched on any inner label, e.g. yahoo.com, yahoo.co.in
+FREE_MAIL_LABELS = {
+    "yahoo": "Yahoo",
+    "ymail": "Yahoo",
+}
+
+# Institutional suffixes; the longest matching suffix wins
+DOMAIN_SUFFIX_CATEGORIES = {
+    "gov.in": "Government",
+    "nic.in": "Government",
+    "edu": "Education",
+    "edu.in": "Education",
+    "ac.in": "Education",
+}
+
+# Inner labels that mark a government domain outside India, e.g. x.gov.uk
+GOVERNMENT_LABELS = {"gov"}
+
+DEFAULT_DOMAIN_CATEGORY = "Business Email"
+UNKNOWN_DOMAIN_CATEGORY = "Unknown"
+
+
+class KeywordClassifier:
+    """
+    Classify text by keyword rules in a single regex scan.
+
+    Each rule's keywords are compiled into a lookahead group of its own and
+    the groups are tried in precedence order, so at every position of a
+    single pass the highest-precedence rule with a keyword starting there
+    is reported, even when a lower-precedence keyword there is longer
+    ("corp" vs. "corporation"). The best rule over all positions is
+    returned, giving the same answer as checking the rules one by one with
+    `in`.
+    """
+
+    def __init__(self, rules, default):
+        self.labels = [label for label, keywords in rules]
+        self.default = default
+        groups = []
+        # Rule index of each capture group; rules without keywords get no group
+        self._ranks = []
+        for rank, (label, keywords) in enumerate(rules):
+            keywords = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+            if keywords:
+                groups.append('(?=(' + '|'.join(re.escape(keyword) for keyword in keywords) + '))')
+                self._ranks.append(rank)
+        self._pattern = re.compile('|'.join(groups) if groups else '(?!)')
+
+    def classify(self, text):
+        """Return the label for one piece of text."""
+        best = None
+        for match in self._pattern.finditer(text.lower()):
+            # The first group that matched is the best rule at this position
+            rank = self._ranks[match.lastindex - 1]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return self.default if best is None else self.labels[best]
+
+    def classify_many(self, texts):
+        """
+        Classify a whole column (list or pandas Series) of texts.
+
+        Each distinct value is scanned once; a pandas Series comes back as
+        a Series with the same index, anything else as a list.
+        """
+        if hasattr(texts, 'map') and hasattr(texts, 'unique'):
+            values = texts.astype(str)
+            labels = {value: self.classify(value) for value in values.unique()}
+            return values.map(labels)
+
+        labels = {}
+        result = []
+        for text in texts:
+            text = str(text)
+            label = labels.get(text)
+            if label is None:
+                label = labels[text] = self.classify(text)
+            result.append(label)
+        return result
+
+
+company_type_classifier = KeywordClassifier(COMPANY_TYPE_RULES, DEFAULT_COMPANY_TYPE)
+
+
+def classify_company_type(company_name):
+    """Determine the company type (legal form) from a company name."""
+    return company_type_classifier.classify(company_name)
+
+
+def classify_company_types(company_names):
+    """Batch version of classify_company_type for a list or pandas Series."""
+    return company_type_classifier.classify_many(company_names)
+
+
+class DomainCategorizer:
+    """
+    Categorize email domains from lookup tables instead of a chain of checks.
+
+    Exact free-mail domains are a dict lookup, institutional suffixes live
+    in a trie keyed by reversed labels (in -> gov -> ...), and results are
+    memoized per domain in a bounded LRU cache, since a handful of domains
+    make up most rows.
+    """
+
+    def __init__(self, free_mail_domains=None, free_mail_labels=None, suffix_categories=None,
+                 government_labels=None, default=DEFAULT_DOMAIN_CATEGORY, cache_size=65536):
+        self.free_mail_domains = dict(FREE_MAIL_DOMAINS if free_mail_domains is None else free_mail_domains)
+        self.free_mail_labels = dict(FREE_MAIL_LABELS if free_mail_labels is None else free_mail_labels)
+        self.government_labels = set(GOVERNMENT_LABELS if government_labels is None else government_labels)
+        self.default = default
+
+        self._suffix_trie = {}
+        suffixes = DOMAIN_SUFFIX_CATEGORIES if suffix_categories is None else suffix_categories
+        for suffix, category in suffixes.items():
+            node = self._suffix_trie
+            for label in reversed(suffix.lower().split('.')):
+                node = node.setdefault(label, {})
+            node[None] = category
+
+        # Any domain that can get a category other than the default has one of
+        # these labels; the rest skip the lookup (and the cache) entirely
+        markers = set(self.free_mail_domains) | set(self.free_mail_labels) | self.government_labels | set(suffixes)
+        self._marker_labels = frozenset(marker.lower().split('.')[0] for marker in markers)
+
+        self.categorize = lru_cache(maxsize=cache_size)(self._categorize)
+
+    def _categorize(self, domain):
+        domain = domain.strip().lower().rstrip('.')
+        category = self.free_mail_domains.get(domain)
+        if category:
+            return category
+
+        labels = domain.split('.')
+        inner = labels[:-1]
+        for label in inner:
+            if label in self.free_mail_labels:
+                return self.free_mail_labels[label]
+
+        # Walk the suffix trie from the TLD inwards, remembering the longest match
+        node = self._suffix_trie
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                break
+            category = node.get(None, category)
+        if category:
+            return category
+
+        if any(label in self.government_labels for label in inner[1:]):
+            return "Government"
+        return self.default
+
+    def lookup(self, domain):
+        """
+        Categorize one domain, reporting an empty one as 'Unknown'.
+
+        Domains without a marker label get the default category without
+        going through the memo cache, so a long tail of distinct business
+        domains does not evict the ones that repeat.
+        """
+        if not domain:
+            return UNKNOWN_DOMAIN_CATEGORY
+        if self._marker_labels.isdisjoint(domain.strip().lower().rstrip('.').split('.')):
+            return self.default
+        return self.categorize(domain)
+
+    def categorize_many(self, domains):
+        """
+        Categorize a list or pandas Series of domains, each distinct one once.
+
+        Empty or missing domains are reported as 'Unknown'.
+        """
+        lookup = self.lookup
+        if hasattr(domains, 'map') and hasattr(domains, 'unique'):
+            values = domains.fillna('').astype(str)
+            categories = {domain: lookup(domain) for domain in values.unique()}
+            return values.map(categories)
+        return [lookup(domain) for domain in domains]
+
+
+domain_categorizer = DomainCategorizer()
+register_cache_stats('domain_categories', lambda: domain_categorizer.categorize.cache_info()[:2])
+
+
+def classifier_fingerprint(*extra):
+    """
+    Hash of the rule and domain tables, plus any `extra` strings.
+
+    Changes whenever a table is edited, so results cached across runs (the
+    incremental batch manifest) can tell when to classify again.
+    """
+    tables = [COMPANY_TYPE_RULES, DEFAULT_COMPANY_TYPE, FREE_MAIL_DOMAINS, FREE_MAIL_LABELS,
+              DOMAIN_SUFFIX_CATEGORIES, sorted(GOVERNMENT_LABELS), DEFAULT_DOMAIN_CATEGORY,
+              UNKNOWN_DOMAIN_CATEGORY, list(extra)]
+    content = json.dumps(tables, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def email_domain(email):
+    """Return the lowercased domain of an email address ('' if there is none)."""
+    local, sep, domain = email.strip().rpartition('@')
+    return domain.lower() if sep else ''
+
+
+def classify_domain(domain):
+    """Categorize one email domain (memoized)."""
+    return domain_categorizer.categorize(domain)
+
+
+def classify_email_domains(emails, valid=None):
+    """
+    Categorize a list or pandas Series of emails, one lookup per distinct domain.
+
+    `valid` is an optional boolean mask of the same length; invalid entries
+    are categorized as 'Unknown' without looking at their domain.
+    """
+    if hasattr(emails, 'fillna'):
+        domains = emails.fillna('').astype(str).str.strip().str.rpartition('@')[2].str.lower()
+        if valid is not None:
+            domains = domains.where(valid, '')
+        return domain_categorizer.categorize_many(domains)
+
+    valid = [True] * len(emails) if valid is None else valid
+    domains = [email_domain(email) if ok else '' for email, ok in zip(emails, valid)]
+    return domain_categorizer.categorize_many(domains)
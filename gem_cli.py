@@ -0,0 +1,198 @@
+import argparse
+import os
+import sys
+
+# Each subcommand imports what it needs when it runs (pandas only for
+# ingest, analyze and batch), so summary and update-msme start fast.
+
+# Kept in sync with gem_reader.DEFAULT_WORKBOOK, gem_emit.MOCK_DATA_TS,
+# gem_emit.SHARD_DIR and gem_dispatch.API_BASE_URL; repeated here so parsing
+# arguments imports nothing
+DEFAULT_WORKBOOK = 'GeM_Resellers.xlsx'
+DEFAULT_DATA_TS = 'src/app/(dashboard)/email-marketing/gem-mock-data.ts'
+DEFAULT_SHARD_DIR = 'public/gem-data'
+DEFAULT_API_BASE_URL = os.environ.get('NEXT_PUBLIC_API_URL', 'https://api.quickbid.co.in/support/api')
+
+
+def run_ingest(args):
+    from gem_ingest import ingest_to_csv
+    from gem_metrics import PipelineMetrics
+
+    ingest_to_csv(args.sources, args.output, args.workers, args.dedup_memory_mb,
+                  PipelineMetrics('ingest', args.metrics))
+
+
+def run_analyze(args):
+    from analyze_gem_excel import analyze_excel_file, analyze_sketch
+
+    if args.sketch:
+        sources = args.sources or ([] if args.merge_sketch else [args.workbook])
+        analyze_sketch(sources, args.workers, args.top, args.json, args.save_sketch, args.merge_sketch)
+    else:
+        analyze_excel_file(args.workbook, args.top, args.json)
+
+
+def run_batch(args):
+    from create_excel_based_batches import create_batches_from_excel
+    from gem_batch_planner import load_batch_spec
+    from gem_deliverability import UdpResolver
+    from gem_metrics import PipelineMetrics
+
+    if args.exclude_contacted_days is not None and not args.store:
+        args.parser.error("--exclude-contacted-days needs --store")
+    metrics = PipelineMetrics('batch', args.metrics, args.metrics_format, args.profile, args.profile_out)
+    create_batches_from_excel(args.workbook, incremental=args.incremental,
+                              spec=load_batch_spec(args.batch_spec), emit=args.emit,
+                              encoding=args.encoding, metrics=metrics,
+                              output=args.output, shard_dir=args.shard_dir, domain_check=args.check_domains,
+                              resolver=UdpResolver(args.nameserver), suppression=args.suppression,
+                              max_per_company=args.max_per_company, store=args.store,
+                              exclude_contacted_days=args.exclude_contacted_days)
+
+
+def run_emit(args):
+    from generate_gem_mock_data import DEFAULT_SEED, build_mock_data
+
+    seed = DEFAULT_SEED if args.seed is None else args.seed
+    build_mock_data(args.workbook, seed, output=args.output, force=args.force, suppression=args.suppression)
+
+
+def run_dispatch(args):
+    from gem_dispatch import run_from_args
+
+    return run_from_args(args)
+
+
+def run_summary(args):
+    from gem_data_summary import load_mock_data, print_recipients, print_summary
+    from gem_emit import sidecar_path
+
+    data = load_mock_data(args.manifest or sidecar_path(args.data))
+    if data is None:
+        return 1
+    print_summary(data)
+    if args.rows or args.batch:
+        print_recipients(data, args.batch, args.limit)
+
+
+def run_update_msme(args):
+    from update_msme_emails import edit_msme_test_emails
+
+    if not (args.email or args.add or args.remove):
+        args.parser.error("give an email, --add or --remove")
+    first = (args.email, args.name) if args.email else None
+    entries = edit_msme_test_emails(args.add, args.remove, first, args.data, args.shard_dir)
+    print(f"MSME_TEST_EMAILS now has {len(entries)} recipients:")
+    for entry in entries:
+        print(f"  {entry['id']}: {entry['email']} - {entry['name']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='gem_cli.py', description="GeM reseller data pipeline")
+    parser.add_argument('--cache-dir', help="Parse/build cache directory (default: $GEM_CACHE_DIR or .gem_cache)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Merge workbooks and sheets into one CSV")
+    ingest.add_argument('sources', nargs='+', help="Workbook files, directories or glob patterns")
+    ingest.add_argument('--output', default='gem_resellers_merged.csv', help="Merged CSV to write")
+    ingest.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    ingest.add_argument('--dedup-memory-mb', type=int, default=64, help="Memory budget of the address index")
+    ingest.add_argument('--metrics', help="Write per-stage metrics to this file")
+    ingest.set_defaults(func=run_ingest)
+
+    analyze = commands.add_parser('analyze', help="Profile a reseller workbook")
+    analyze.add_argument('sources', nargs='*', help="With --sketch: workbook files, directories or glob patterns")
+    analyze.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to read")
+    analyze.add_argument('--top', type=int, default=10, help="Number of top domains to report")
+    analyze.add_argument('--json', help="Also write the report as JSON to this file ('-' for stdout only)")
+    analyze.add_argument('--sketch', action='store_true',
+                         help="Stream the sources into constant-memory sketches instead of loading them")
+    analyze.add_argument('--workers', type=int, default=None, help="With --sketch: worker processes")
+    analyze.add_argument('--save-sketch', help="With --sketch: save the merged sketch to this file")
+    analyze.add_argument('--merge-sketch', action='append', default=[], help="With --sketch: merge a saved sketch")
+    analyze.set_defaults(func=run_analyze)
+
+    batch = commands.add_parser('batch', help="Plan segment batches and write the UI data")
+    batch.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to read")
+    batch.add_argument('--output', default=DEFAULT_DATA_TS, help="TypeScript module to write")
+    batch.add_argument('--shard-dir', default=DEFAULT_SHARD_DIR, help="Directory for the sharded output")
+    batch.add_argument('--incremental', action='store_true',
+                       help="Only classify rows added or changed since the previous run")
+    batch.add_argument('--batch-spec', help="JSON file with segment_keys, batch_size and max_batches")
+    batch.add_argument('--emit', choices=['ts', 'sharded', 'both'], default='ts',
+                       help="Write the TS module, per-batch JSON shards, or both")
+    batch.add_argument('--encoding', choices=['objects', 'columnar'], default='objects',
+                       help="Recipient lists as {address, name} objects or dictionary-encoded columns")
+    batch.add_argument('--check-domains', action='store_true',
+                       help="Leave out recipients whose domain has no MX or A record")
+    batch.add_argument('--nameserver', help="DNS server for --check-domains (default: from /etc/resolv.conf)")
+    batch.add_argument('--suppression', help="Suppression index directory (see gem_suppression.py)")
+    batch.add_argument('--max-per-company', type=int, help="Keep at most this many recipients per company")
+    batch.add_argument('--store', help="Recipient store database to update (see gem_store.py)")
+    batch.add_argument('--exclude-contacted-days', type=int,
+                       help="With --store: leave out recipients contacted within this many days")
+    batch.add_argument('--metrics', help="Write per-stage metrics to this file (.json, or .jsonl to append)")
+    batch.add_argument('--metrics-format', choices=['json', 'jsonl'], help="Metrics file format")
+    batch.add_argument('--profile', metavar='STAGE', help="Run this stage under cProfile")
+    batch.add_argument('--profile-out', help="cProfile dump path (default: <stage>.prof)")
+    batch.set_defaults(func=run_batch, parser=batch)
+
+    emit = commands.add_parser('emit', help="Generate the seeded mock data module")
+    emit.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to read")
+    emit.add_argument('--output', default=DEFAULT_DATA_TS, help="TypeScript module to write")
+    emit.add_argument('--seed', type=int, default=None, help="Random seed (default: the generator's)")
+    emit.add_argument('--force', action='store_true', help="Regenerate even if the inputs are unchanged")
+    emit.add_argument('--suppression', help="Suppression index directory (see gem_suppression.py)")
+    emit.set_defaults(func=run_emit)
+
+    dispatch = commands.add_parser('dispatch', help="Send a generated batch through the email-marketing backend")
+    dispatch.add_argument('--batch', help="Batch name to send (default: the email batch)")
+    dispatch.add_argument('--manifest', help="Data manifest (default: the gem-mock-data.ts sidecar)")
+    dispatch.add_argument('--subject', required=True, help="Email subject")
+    dispatch.add_argument('--html-file', required=True, help="HTML body of the email")
+    dispatch.add_argument('--sender', required=True, help="Sender address")
+    dispatch.add_argument('--connection-string', default=os.environ.get('GEM_EMAIL_CONNECTION_STRING', ''),
+                          help="Email service connection string (default: $GEM_EMAIL_CONNECTION_STRING)")
+    dispatch.add_argument('--base-url', default=DEFAULT_API_BASE_URL, help="Backend API base URL")
+    dispatch.add_argument('--token', default=os.environ.get('GEM_API_TOKEN'),
+                          help="Bearer token (default: $GEM_API_TOKEN)")
+    dispatch.add_argument('--checkpoint', help="Checkpoint file (default: .gem_cache/dispatch-<batch>.jsonl)")
+    dispatch.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and send everything")
+    dispatch.add_argument('--concurrency', type=int, default=8, help="Requests in flight")
+    dispatch.add_argument('--bulk-size', type=int, default=50, help="Recipients per request")
+    dispatch.add_argument('--max-retries', type=int, default=5, help="Retries per request")
+    dispatch.add_argument('--store', help="Record the sends in this recipient store (see gem_store.py)")
+    dispatch.add_argument('--metrics', help="Write dispatch metrics to this file (.json, or .jsonl to append)")
+    dispatch.set_defaults(func=run_dispatch)
+
+    summary = commands.add_parser('summary', help="Summarize the generated data from its manifest")
+    summary.add_argument('--data', default=DEFAULT_DATA_TS, help="Generated TypeScript module")
+    summary.add_argument('--manifest', help="Manifest to read instead (e.g. public/gem-data/manifest.json)")
+    summary.add_argument('--rows', action='store_true', help="Also print recipients")
+    summary.add_argument('--batch', help="Batch whose recipients to print (default: the email batch)")
+    summary.add_argument('--limit', type=int, default=5, help="Recipients to print")
+    summary.set_defaults(func=run_summary)
+
+    update = commands.add_parser('update-msme', help="Edit the MSME test recipients")
+    update.add_argument('email', nargs='?', help="Address that replaces the first test recipient")
+    update.add_argument('name', nargs='?', default="Your Name", help="Name for that address")
+    update.add_argument('--add', nargs=2, action='append', default=[], metavar=('EMAIL', 'NAME'),
+                        help="Add a test recipient (repeatable)")
+    update.add_argument('--remove', action='append', default=[], metavar='EMAIL',
+                        help="Remove a test recipient (repeatable)")
+    update.add_argument('--data', default=DEFAULT_DATA_TS, help="Generated TypeScript module")
+    update.add_argument('--shard-dir', default=DEFAULT_SHARD_DIR, help="Sharded output to keep in sync")
+    update.set_defaults(func=run_update_msme, parser=update)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.cache_dir:
+        # Read by gem_cache at import time, which has not happened yet
+        os.environ['GEM_CACHE_DIR'] = args.cache_dir
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,135 +1,130 @@
+import argparse
 import json
+import mmap
 import os
 
-def load_mock_data():
-    try:
-        file_path = 'src/app/(dashboard)/email-marketing/gem-mock-data.ts'
-        
-        if not os.path.exists(file_path):
-            print(f"Error: File {file_path} not found.")
-            return None
-            
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Extract JSON data from the TypeScript file
-        # This is a simple extraction, not a proper parser
-        data = {}
-        
-        # Extract GEM_STATES
-        states_start = content.find('export const GEM_STATES =') + len('export const GEM_STATES =')
-        states_end = content.find('export const GEM_CATEGORIES =')
-        states_json = content[states_start:states_end].strip().rstrip(';').strip()
-        data['states'] = json.loads(states_json)
-        
-        # Extract GEM_CATEGORIES
-        categories_start = content.find('export const GEM_CATEGORIES =') + len('export const GEM_CATEGORIES =')
-        categories_end = content.find('export const GEM_DISTRICTS_BY_STATE =')
-        categories_json = content[categories_start:categories_end].strip().rstrip(';').strip()
-        data['categories'] = json.loads(categories_json)
-        
-        # Extract GEM_BATCHES
-        batches_start = content.find('export const GEM_BATCHES =') + len('export const GEM_BATCHES =')
-        batches_end = content.find('export const GEM_EMAIL_BATCH =')
-        batches_json = content[batches_start:batches_end].strip().rstrip(';').strip()
-        data['batches'] = json.loads(batches_json)
-        
-        # Extract GEM_EMAIL_BATCH
-        email_start = content.find('export const GEM_EMAIL_BATCH =') + len('export const GEM_EMAIL_BATCH =')
-        email_end = content.find(';', email_start)
-        email_json = content[email_start:email_end].strip()
-        data['email_batch'] = json.loads(email_json)
-        
-        return data
-        
-    except Exception as e:
-        print(f"Error loading mock data: {e}")
+from gem_emit import MOCK_DATA_TS, decode_recipients, sidecar_path
+
+
+def load_mock_data(manifest_path=None):
+    """
+    Load the manifest describing the generated GeM data.
+
+    Reads the sidecar written next to gem-mock-data.ts by default; the
+    sharded public/gem-data/manifest.json works as well. Only the small
+    manifest is parsed, never the recipient payload.
+    """
+    manifest_path = manifest_path or sidecar_path(MOCK_DATA_TS)
+    if not os.path.exists(manifest_path):
+        print(f"Error: Manifest {manifest_path} not found. Regenerate the data to create it.")
         return None
 
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['_dir'] = os.path.dirname(manifest_path)
+    return manifest
+
+
+def _read_json(path, offset=0, length=None):
+    """Parse the JSON value stored at [offset, offset + length) of a file via mmap."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            end = len(view) if length is None else offset + length
+            return json.loads(view[offset:end].decode('utf-8'))
+
+
+def _read_section(manifest, section):
+    # Shards are whole JSON files; sidecar sections point into the TS module
+    if 'shard' in section:
+        return _read_json(os.path.join(manifest['_dir'], section['shard']))
+    return _read_json(os.path.join(manifest['_dir'], manifest['file']),
+                      section['offset'], section['length'])
+
+
+def load_recipients(manifest, batch_name=None):
+    """
+    Read one recipient list: a batch by name, or the email batch if batch_name is None.
+
+    Only the requested list is mapped and decoded.
+    """
+    if batch_name is None:
+        entry = manifest['email_batch']
+    else:
+        entry = next((batch for batch in manifest['batches'] if batch['batch_name'] == batch_name), None)
+        if entry is None:
+            raise KeyError(f"Unknown batch: {batch_name}")
+
+    if 'shard' in entry:
+        # Batch and email batch shards wrap the list in a "recipients" field
+        recipients = _read_section(manifest, entry)['recipients']
+    else:
+        recipients = _read_section(manifest, entry['recipients'])
+
+    if manifest.get('encoding') == 'columnar':
+        # Shards carry their own dictionary; the sidecar points at a shared one
+        names = _read_section(manifest, manifest['names']) if 'names' in manifest else None
+        recipients = decode_recipients(recipients, names)
+    return recipients
+
+
 def print_summary(data):
     if not data:
         return
-    
+
+    stats = data['stats']
     print("=" * 50)
     print("GeM Mock Data Summary")
     print("=" * 50)
-    
+
     print(f"\nTotal States: {len(data['states'])}")
     print(f"Total Categories: {len(data['categories'])}")
-    print(f"Total Email Batch Size: {len(data['email_batch'])}")
-    print(f"Total Batches: {len(data['batches'])}")
-    
+    print(f"Total Email Batch Size: {stats['email_batch_count']}")
+    print(f"Total Batches: {stats['batch_count']}")
+    print(f"Total Recipients: {stats['recipient_count']} ({stats['unique_recipient_count']} unique)")
+
+    print("\nRecipients by Segment:")
+    for segment, totals in stats['by_segment'].items():
+        print(f"  {segment}: {totals['recipients']} in {totals['batches']} batches")
+
+    print("\nRecipients by Email Domain Category:")
+    for category, count in stats['by_domain_category'].items():
+        print(f"  {category}: {count}")
+
     print("\nBatch Details:")
     for i, batch in enumerate(data['batches']):
         print(f"\n  Batch {i+1}: {batch['batch_name']}")
-        print(f"    State: {batch['state']}")
-        print(f"    Category: {batch['category']}")
-        print(f"    District: {batch['district']}")
-        print(f"    Products: {', '.join(batch['products'])}")
+        for key, value in batch['segment'].items():
+            print(f"    {key.replace('_', ' ').title()}: {value}")
+        if batch.get('products'):
+            print(f"    Products: {', '.join(batch['products'])}")
         print(f"    Recipients: {batch['recipient_count']}")
-    
-    print("\nSample Emails (first 5):")
-    for i, email in enumerate(data['email_batch'][:5]):
-        print(f"  {i+1}. {email['address']} - {email['name']}")
-    
+        domains = ", ".join(f"{category} {count}" for category, count in batch['domain_categories'].items())
+        print(f"    Domain Categories: {domains}")
+
     print("\n" + "=" * 50)
 
-def print_file_preview():
-    try:
-        file_path = 'src/app/(dashboard)/email-marketing/gem-mock-data.ts'
-        
-        if not os.path.exists(file_path):
-            print(f"Error: File {file_path} not found.")
-            return
-        
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Print the beginning of the file
-        print("=" * 50)
-        print("GeM Mock Data Preview (first 500 chars):")
-        print("=" * 50)
-        print(content[:500] + "...")
-        
-        # Print batch information
-        batches_start = content.find('export const GEM_BATCHES =')
-        if batches_start != -1:
-            preview_end = content.find("]", batches_start) + 1
-            batch_preview = content[batches_start:preview_end]
-            if len(batch_preview) > 500:
-                batch_preview = batch_preview[:500] + "..."
-            print("\n" + "=" * 50)
-            print("GEM_BATCHES Preview:")
-            print("=" * 50)
-            print(batch_preview)
-        
-        # Print some email batch information
-        email_start = content.find('export const GEM_EMAIL_BATCH =')
-        if email_start != -1:
-            preview_end = content.find("]", email_start) + 1
-            email_preview = content[email_start:preview_end]
-            if len(email_preview) > 500:
-                email_preview = email_preview[:500] + "..."
-            print("\n" + "=" * 50)
-            print("GEM_EMAIL_BATCH Preview:")
-            print("=" * 50)
-            print(email_preview)
-        
-        # Print some statistics
-        states_count = content.count('"Andhra Pradesh"') + content.count('"Karnataka"') + content.count('"Maharashtra"')
-        categories_count = content.count('"Office Supplies"') + content.count('"IT Equipment"') + content.count('"Furniture"')
-        
-        print("\n" + "=" * 50)
-        print("Basic Stats:")
-        print("=" * 50)
-        print(f"File size: {len(content)} bytes")
-        print(f"Number of batches found: {content.count('batch_name')}")
-        print(f"Email batch entries: ~{content.count('address') - content.count('senderAddress')}")
-        print(f"Sample states found: {states_count}")
-        print(f"Sample categories found: {categories_count}")
-        
-    except Exception as e:
-        print(f"Error analyzing mock data: {e}")
+
+def print_recipients(data, batch_name=None, limit=5):
+    """Print the first `limit` recipients of a batch (or of the email batch)."""
+    recipients = load_recipients(data, batch_name)
+    print(f"\n{batch_name or 'Email batch'} (first {min(limit, len(recipients))} of {len(recipients)}):")
+    for i, email in enumerate(recipients[:limit]):
+        print(f"  {i+1}. {email['address']} - {email['name']}")
+
 
 if __name__ == "__main__":
-    print_file_preview() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Summarize the generated GeM data from its manifest")
+    parser.add_argument('--manifest', help="Sidecar or sharded manifest (default: the gem-mock-data.ts sidecar)")
+    parser.add_argument('--rows', action='store_true', help="Also print recipients (reads the recipient data)")
+    parser.add_argument('--batch', help="Batch whose recipients to print (default: the email batch)")
+    parser.add_argument('--limit', type=int, default=5, help="Recipients to print")
+    args = parser.parse_args()
+
+    try:
+        data = load_mock_data(args.manifest)
+        print_summary(data)
+        if data and (args.rows or args.batch):
+            print_recipients(data, args.batch, args.limit)
+    except Exception as e:
+        print(f"Error summarizing mock data: {e}")
+        raise SystemExit(1)
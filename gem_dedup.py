@@ -0,0 +1,192 @@
+import hashlib
+import math
+from array import array
+
+# Providers that deliver user+tag@domain to user@domain
+PLUS_ADDRESSING_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com',
+    'icloud.com', 'protonmail.com', 'fastmail.com'
+}
+
+# Providers that ignore dots in the local part
+DOTLESS_DOMAINS = {'gmail.com'}
+
+DOMAIN_ALIASES = {'googlemail.com': 'gmail.com'}
+
+
+def normalize_address(address):
+    """
+    Normalize an email address for duplicate detection.
+
+    Trims whitespace, case-folds the address and applies provider rules:
+    '+tag' suffixes are dropped for providers that support sub-addressing,
+    dots are dropped for Gmail and googlemail.com is folded into gmail.com.
+    The result is only a dedup key; keep sending to the original address.
+    """
+    address = address.strip()
+    local, sep, domain = address.rpartition('@')
+    if not sep:
+        return address.lower()
+
+    domain = domain.lower().rstrip('.')
+    domain = DOMAIN_ALIASES.get(domain, domain)
+    local = local.lower()
+    if domain in PLUS_ADDRESSING_DOMAINS:
+        local = local.split('+', 1)[0]
+    if domain in DOTLESS_DOMAINS:
+        local = local.replace('.', '')
+    return f"{local}@{domain}"
+
+
+def address_key(address):
+    """64-bit key of the normalized address (never 0, which marks an empty slot)."""
+    digest = hashlib.blake2b(normalize_address(address).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class AddressIndex:
+    """
+    Exact set of 64-bit address keys in a single open-addressing array.
+
+    Each slot costs 8 bytes, so a 256 MB budget holds about 25 million
+    addresses at the default load factor. Two different addresses share a
+    key with probability about n^2 / 2^65 (under 1e-5 for 10 million).
+
+    The array starts at `initial_slots` and doubles whenever it passes
+    `max_load`, up to the memory budget, so a small workbook only pays for
+    the addresses it has (while doubling, the old array is briefly held as
+    well).
+    """
+
+    def __init__(self, memory_budget_mb=64, max_load=0.75, initial_slots=1024):
+        self.max_load = max_load
+        self._max_slots = 1 << max(4, int(math.log2(memory_budget_mb * 1024 * 1024 // 8)))
+        self._allocate(min(initial_slots, self._max_slots))
+        self.size = 0
+
+    def _allocate(self, slots):
+        self._slots = array('Q', [0]) * slots
+        self._mask = slots - 1
+        self._limit = int(slots * self.max_load)
+
+    def _grow(self):
+        old = self._slots
+        self._allocate(len(old) * 2)
+        slots = self._slots
+        for key in old:
+            if key:
+                index = key & self._mask
+                while slots[index]:
+                    index = (index + 1) & self._mask
+                slots[index] = key
+
+    def add(self, key):
+        """Insert a key; return True if it was not present before."""
+        slots = self._slots
+        index = key & self._mask
+        while True:
+            current = slots[index]
+            if current == 0:
+                if self.size >= self._limit:
+                    if len(slots) >= self._max_slots:
+                        raise MemoryError(
+                            "Address index is full for its memory budget; "
+                            "raise memory_budget_mb or use mode='bloom'"
+                        )
+                    self._grow()
+                    return self.add(key)
+                slots[index] = key
+                self.size += 1
+                return True
+            if current == key:
+                return False
+            index = (index + 1) & self._mask
+
+    def __contains__(self, key):
+        slots = self._slots
+        index = key & self._mask
+        while True:
+            current = slots[index]
+            if current == 0:
+                return False
+            if current == key:
+                return True
+            index = (index + 1) & self._mask
+
+
+class BloomFilter:
+    """
+    Approximate set of address keys in a fixed bit array.
+
+    Never misses a real duplicate, but may report a new address as seen
+    with the rate returned by false_positive_rate().
+    """
+
+    def __init__(self, memory_budget_mb=64, expected_items=10_000_000):
+        self.bit_count = memory_budget_mb * 1024 * 1024 * 8
+        # Optimal probe count, capped: past ~16 probes the extra accuracy is
+        # negligible and every add pays for each probe
+        self.hash_count = min(16, max(1, round(self.bit_count / expected_items * math.log(2))))
+        self._bits = bytearray(self.bit_count // 8)
+        self.size = 0
+
+    def _positions(self, key):
+        # Double hashing: derive all probe positions from the two halves of the key
+        first = key & 0xFFFFFFFF
+        second = (key >> 32) | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.bit_count
+
+    def add(self, key):
+        """Insert a key; return True if it was definitely not present before."""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.size += 1
+        return added
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def false_positive_rate(self):
+        """Current probability that an unseen address is reported as a duplicate."""
+        return (1 - math.exp(-self.hash_count * self.size / self.bit_count)) ** self.hash_count
+
+
+class Deduplicator:
+    """
+    Drop repeated addresses across sources within a fixed memory budget.
+
+    mode='exact' stores hashed keys in an AddressIndex; mode='bloom' uses a
+    BloomFilter when even 8 bytes per address is too much. Duplicate counts
+    are kept per source (workbook, sheet, column...).
+    """
+
+    def __init__(self, memory_budget_mb=64, mode='exact', expected_items=10_000_000):
+        if mode == 'exact':
+            self.index = AddressIndex(memory_budget_mb)
+        elif mode == 'bloom':
+            self.index = BloomFilter(memory_budget_mb, expected_items)
+        else:
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        self.stats = {}
+
+    def add(self, address, source='default'):
+        """Record an address; return True the first time it is seen."""
+        stats = self.stats.setdefault(source, {'seen': 0, 'unique': 0, 'duplicates': 0})
+        stats['seen'] += 1
+        if self.index.add(address_key(address)):
+            stats['unique'] += 1
+            return True
+        stats['duplicates'] += 1
+        return False
+
+    def print_report(self):
+        """Print the per-source duplicate statistics."""
+        print("\nDuplicate addresses by source:")
+        for source, stats in self.stats.items():
+            print(f"  {source}: {stats['duplicates']} duplicates of {stats['seen']} addresses")
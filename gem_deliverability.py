@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import time
+from collections import Counter
+
+from gem_cache import CACHE_DIR
+from gem_classify import email_domain
+from gem_metrics import register_cache_stats
+
+DELIVERABLE = 'deliverable'
+UNDELIVERABLE = 'undeliverable'
+UNKNOWN = 'unknown'
+
+# Checked domains, kept across runs; 'unknown' results are never stored
+DOMAIN_CHECK_CACHE = os.path.join(CACHE_DIR, 'domain-checks.json')
+DOMAIN_CHECK_CACHE_VERSION = 1
+DEFAULT_TTL = {
+    DELIVERABLE: 7 * 24 * 3600,
+    UNDELIVERABLE: 24 * 3600,
+}
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 3.0
+# UDP sends per lookup and the wait for a reply before resending; lost
+# packets are retried within DEFAULT_TIMEOUT
+DEFAULT_ATTEMPTS = 3
+DEFAULT_RETRY_TIMEOUT = 1.0
+
+_FLAG_TC = 0x0200
+
+_RECORD_TYPES = {'A': 1, 'MX': 15}
+
+domain_cache_stats = {'hits': 0, 'misses': 0}
+register_cache_stats('domain_checks', lambda: (domain_cache_stats['hits'], domain_cache_stats['misses']))
+
+
+class NoSuchDomain(Exception):
+    """The domain does not exist (NXDOMAIN)."""
+
+
+class DnsError(Exception):
+    """The resolver could not give an answer (server failure, refusal, bad reply)."""
+
+
+class StaticResolver:
+    """
+    In-process resolver answering from a dict, for tests and dry runs.
+
+    `records` maps a domain to {'MX': [hosts], 'A': [addresses]}; a domain
+    missing from it does not exist, and a value that is an exception
+    instance is raised instead, e.g. DnsError() for a failing server.
+    """
+
+    def __init__(self, records, delay=0.0):
+        self.records = {domain.lower(): value for domain, value in records.items()}
+        self.delay = delay
+        self.queries = Counter()
+
+    async def query(self, domain, record_type):
+        self.queries[domain, record_type] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        entry = self.records.get(domain)
+        if entry is None:
+            raise NoSuchDomain(domain)
+        if isinstance(entry, Exception):
+            raise entry
+        return list(entry.get(record_type, []))
+
+
+def system_nameserver(resolv_conf='/etc/resolv.conf'):
+    """First nameserver listed in resolv.conf, or None."""
+    try:
+        with open(resolv_conf, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    return parts[1]
+    except OSError:
+        pass
+    return None
+
+
+def _read_name(message, offset):
+    """Decode a possibly compressed domain name; return (name, offset after it)."""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+        elif length == 0:
+            return '.'.join(labels), end if end is not None else offset + 1
+        else:
+            labels.append(message[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += 1 + length
+    raise DnsError("compression loop in DNS reply")
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.peer = None
+        self.reply = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.peer = transport.get_extra_info('peername')
+
+    def datagram_received(self, data, addr):
+        # Only the nameserver's answer to this query; anything else may be spoofed
+        if self.peer is not None and addr is not None and tuple(addr[:2]) != tuple(self.peer[:2]):
+            return
+        if len(data) >= 12 and struct.unpack('!H', data[:2])[0] == self.query_id and not self.reply.done():
+            self.reply.set_result(data)
+
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+
+
+class UdpResolver:
+    """
+    Minimal stub resolver: one UDP query per lookup to a recursive nameserver.
+
+    The query is resent up to `attempts` times when no reply arrives within
+    `retry_timeout`, and a truncated (TC) reply is repeated over TCP.
+    Replies from any address but the nameserver's are ignored. Only A and
+    MX answers are decoded. The nameserver defaults to the system's
+    (resolv.conf); point it at a local stub DNS server to test.
+    """
+
+    def __init__(self, nameserver=None, port=53, attempts=DEFAULT_ATTEMPTS, retry_timeout=DEFAULT_RETRY_TIMEOUT):
+        self.nameserver = nameserver or system_nameserver() or '127.0.0.1'
+        self.port = port
+        self.attempts = attempts
+        self.retry_timeout = retry_timeout
+
+    @staticmethod
+    def build_query(query_id, domain, record_type):
+        question = b''.join(
+            bytes([len(label)]) + label for label in domain.rstrip('.').encode('idna').split(b'.')
+        )
+        return struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0) + question + b'\x00' + \
+            struct.pack('!HH', _RECORD_TYPES[record_type], 1)
+
+    @staticmethod
+    def parse_reply(message, record_type):
+        """Return the A addresses or MX hosts of a reply; raise on NXDOMAIN or errors."""
+        query_id, flags, questions, answers = struct.unpack('!HHHH', message[:8])
+        rcode = flags & 0x000F
+        if rcode == 3:
+            raise NoSuchDomain()
+        if rcode:
+            raise DnsError(f"DNS error code {rcode}")
+
+        offset = 12
+        for _ in range(questions):
+            offset = _read_name(message, offset)[1] + 4
+
+        wanted = _RECORD_TYPES[record_type]
+        records = []
+        for _ in range(answers):
+            offset = _read_name(message, offset)[1]
+            rtype, rclass, ttl, length = struct.unpack('!HHIH', message[offset:offset + 10])
+            offset += 10
+            if rtype == wanted == 1 and length == 4:
+                records.append(socket.inet_ntoa(message[offset:offset + 4]))
+            elif rtype == wanted == 15:
+                records.append(_read_name(message, offset + 2)[0])
+            offset += length
+        return records
+
+    async def _query_udp(self, query_id, message):
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: _DnsProtocol(query_id), remote_addr=(self.nameserver, self.port)
+        )
+        try:
+            for attempt in range(self.attempts):
+                transport.sendto(message)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(protocol.reply), self.retry_timeout)
+                except asyncio.TimeoutError:
+                    if attempt == self.attempts - 1:
+                        raise
+        finally:
+            transport.close()
+
+    async def _query_tcp(self, query_id, message):
+        reader, writer = await asyncio.open_connection(self.nameserver, self.port)
+        try:
+            writer.write(struct.pack('!H', len(message)) + message)
+            await writer.drain()
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            reply = await reader.readexactly(length)
+        except asyncio.IncompleteReadError as e:
+            raise DnsError(f"DNS connection closed early: {e}")
+        finally:
+            writer.close()
+        if len(reply) < 12 or struct.unpack('!H', reply[:2])[0] != query_id:
+            raise DnsError("DNS reply over TCP does not match the query")
+        return reply
+
+    async def query(self, domain, record_type):
+        query_id = random.getrandbits(16)
+        message = self.build_query(query_id, domain, record_type)
+        reply = await self._query_udp(query_id, message)
+        if struct.unpack('!H', reply[2:4])[0] & _FLAG_TC:
+            # The answer did not fit in a datagram; TCP carries it whole (RFC 7766)
+            reply = await self._query_tcp(query_id, message)
+        try:
+            return self.parse_reply(reply, record_type)
+        except (IndexError, struct.error, UnicodeError) as e:
+            raise DnsError(f"malformed DNS reply: {e}")
+
+
+async def check_domain(resolver, domain, timeout=DEFAULT_TIMEOUT):
+    """
+    Classify one domain as deliverable, undeliverable or unknown.
+
+    A domain with MX records is deliverable unless its only MX is the
+    null MX ('.', RFC 7505); without MX records its A record serves as the
+    implicit MX (RFC 5321). A domain that does not exist or has neither is
+    undeliverable. Timeouts and resolver failures are unknown.
+    """
+    try:
+        hosts = await asyncio.wait_for(resolver.query(domain, 'MX'), timeout)
+        if hosts:
+            return DELIVERABLE if any(host.strip('.') for host in hosts) else UNDELIVERABLE
+        addresses = await asyncio.wait_for(resolver.query(domain, 'A'), timeout)
+        return DELIVERABLE if addresses else UNDELIVERABLE
+    except NoSuchDomain:
+        return UNDELIVERABLE
+    except (DnsError, OSError, asyncio.TimeoutError):
+        return UNKNOWN
+
+
+class DomainCheckCache:
+    """
+    Persistent domain -> (status, checked_at) map with a TTL per status.
+
+    Stored as JSON under the cache directory and rewritten atomically.
+    """
+
+    def __init__(self, path=DOMAIN_CHECK_CACHE, ttl=None):
+        self.path = path
+        self.ttl = dict(DEFAULT_TTL if ttl is None else ttl)
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == DOMAIN_CHECK_CACHE_VERSION:
+                    self.entries = data['domains']
+            except ValueError:
+                pass  # Corrupt cache: start over
+
+    def get(self, domain, now=None):
+        entry = self.entries.get(domain)
+        if entry is None:
+            return None
+        status, checked_at = entry
+        if (now or time.time()) - checked_at > self.ttl.get(status, 0):
+            return None
+        return status
+
+    def put(self, domain, status, now=None):
+        if status in self.ttl:
+            self.entries[domain] = [status, now or time.time()]
+
+    def prune(self, now=None):
+        now = now or time.time()
+        self.entries = {
+            domain: entry for domain, entry in self.entries.items()
+            if now - entry[1] <= self.ttl.get(entry[0], 0)
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        self.prune()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': DOMAIN_CHECK_CACHE_VERSION, 'domains': self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+
+async def check_domains_async(domains, resolver, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Check domains with at most `concurrency` lookups in flight; return {domain: status}."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(domain):
+        async with semaphore:
+            return await check_domain(resolver, domain, timeout)
+
+    domains = list(domains)
+    statuses = await asyncio.gather(*(bounded(domain) for domain in domains))
+    return dict(zip(domains, statuses))
+
+
+def check_domains(domains, resolver=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                  cache_path=DOMAIN_CHECK_CACHE, ttl=None):
+    """
+    Return {domain: status} for every distinct domain in `domains`.
+
+    Domains are lowercased and looked up once each; fresh results come
+    from the persistent cache at `cache_path` (None disables it) and only
+    the rest are resolved. `resolver` is any object with an async
+    query(domain, 'MX' | 'A') method, by default a UdpResolver on the
+    system nameserver.
+    """
+    cache = DomainCheckCache(cache_path, ttl)
+    now = time.time()
+    statuses = {}
+    pending = []
+    for domain in {domain.strip().lower().rstrip('.') for domain in domains if domain}:
+        status = cache.get(domain, now)
+        if status is None:
+            domain_cache_stats['misses'] += 1
+            pending.append(domain)
+        else:
+            domain_cache_stats['hits'] += 1
+            statuses[domain] = status
+
+    if pending:
+        resolved = asyncio.run(check_domains_async(sorted(pending), resolver or UdpResolver(), concurrency, timeout))
+        for domain, status in resolved.items():
+            cache.put(domain, status, now)
+        statuses.update(resolved)
+        cache.save()
+    return statuses
+
+
+def mark_deliverability(recipients, statuses):
+    """
+    Set 'deliverability' on each recipient dict from its domain's status.
+
+    Recipients whose domain was not checked are 'unknown'. Returns the
+    count per status.
+    """
+    counts = Counter()
+    for recipient in recipients:
+        status = statuses.get(email_domain(recipient['address']), UNKNOWN)
+        recipient['deliverability'] = status
+        counts[status] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that email domains can receive mail (MX/A lookups)")
+    parser.add_argument('domains', nargs='+', help="Domains or email addresses to check")
+    parser.add_argument('--nameserver', help="DNS server to query (default: from /etc/resolv.conf)")
+    parser.add_argument('--port', type=int, default=53, help="DNS server port")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Lookups in flight")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds per lookup")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore and do not update the result cache")
+    args = parser.parse_args()
+
+    domains = [email_domain(value) if '@' in value else value for value in args.domains]
+    results = check_domains(domains, UdpResolver(args.nameserver, args.port), args.concurrency, args.timeout,
+                            None if args.no_cache else DOMAIN_CHECK_CACHE)
+    for domain, status in sorted(results.items()):
+        print(f"  {domain}: {status}")
@@ -0,0 +1,469 @@
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from gem_classify import email_domain
+from gem_metrics import PipelineMetrics
+
+# Same default as apiClient.ts; NEXT_PUBLIC_API_URL overrides it there and here
+API_BASE_URL = os.environ.get('NEXT_PUBLIC_API_URL', 'https://api.quickbid.co.in/support/api')
+# emailMarketingService.sendEmail
+SEND_PATH = '/marketing/email/send'
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BULK_SIZE = 50
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_REQUEST_TIMEOUT = 30.0
+
+# Recipients per second and burst per recipient domain; other domains get the default
+DEFAULT_DOMAIN_RATE = (10.0, 50)
+DOMAIN_RATES = {
+    'gmail.com': (20.0, 50),
+    'yahoo.com': (5.0, 20),
+    'yahoo.co.in': (5.0, 20),
+    'rediffmail.com': (5.0, 20),
+    'hotmail.com': (5.0, 20),
+    'outlook.com': (5.0, 20),
+}
+
+CHECKPOINT_VERSION = 1
+
+# Responses worth retrying; any other 4xx fails the chunk for good
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Header carrying a per-chunk key, stable across retries and resumes, so the
+# backend can drop a send it has already accepted
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class DispatchError(Exception):
+    """A request the backend rejected, or that still failed after every retry."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class ResponseLost(Exception):
+    """The request went out in full but no response came back; it may have been processed."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` stored."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` (at most `burst`) are available, then take them."""
+        tokens = min(tokens, self.burst)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class DomainRateLimiter:
+    """One token bucket per recipient domain, created on first use."""
+
+    def __init__(self, rates=None, default=DEFAULT_DOMAIN_RATE):
+        self.rates = DOMAIN_RATES if rates is None else rates
+        self.default = default
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def burst(self, domain):
+        return self.rates.get(domain, self.default)[1]
+
+    def bucket(self, domain):
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = TokenBucket(*self.rates.get(domain, self.default))
+            return bucket
+
+    def acquire(self, domain_counts):
+        # Sorted so two chunks never wait on each other's buckets in opposite order
+        for domain, count in sorted(domain_counts.items()):
+            self.bucket(domain).acquire(count)
+
+
+class HttpPool:
+    """
+    Keep-alive HTTP(S) connections to one host, shared between threads.
+
+    At most `size` connections exist; a thread takes one for a request and
+    puts it back afterwards. A connection that fails is closed and replaced
+    on the next request. A failure after the whole request was written
+    raises ResponseLost, since the server may have acted on it.
+    """
+
+    def __init__(self, base_url, size=DEFAULT_CONCURRENCY, timeout=DEFAULT_REQUEST_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+        self.connections_opened = 0
+
+    def _connect(self):
+        self.connections_opened += 1
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request; return (status, headers, body bytes)."""
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                connection.request(method, self.base_path + path, body=body, headers=headers or {})
+            except BaseException:
+                connection.close()
+                raise
+            try:
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                raise ResponseLost(f"{type(e).__name__}: {e}") from e
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._idle.put(connection)
+            return response.status, response.headers, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def plan_chunks(recipients, bulk_size=DEFAULT_BULK_SIZE, limiter=None):
+    """
+    Coalesce recipients into bulk requests of at most `bulk_size`, in order.
+
+    A chunk also holds at most one token-bucket burst of any single domain,
+    so it can always be admitted by the rate limiter.
+    """
+    limiter = limiter or DomainRateLimiter()
+    chunks = []
+    chunk = []
+    per_domain = {}
+    for recipient in recipients:
+        domain = email_domain(recipient['address'])
+        if len(chunk) >= bulk_size or per_domain.get(domain, 0) >= limiter.burst(domain):
+            chunks.append(chunk)
+            chunk = []
+            per_domain = {}
+        chunk.append(recipient)
+        per_domain[domain] = per_domain.get(domain, 0) + 1
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def dispatch_fingerprint(chunks, message):
+    """Identify a send (its message and chunking) so a checkpoint is only resumed by the same send."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(message, sort_keys=True).encode('utf-8'))
+    for chunk in chunks:
+        digest.update(b'\x1e')
+        digest.update('\x1f'.join(recipient['address'] for recipient in chunk).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Append-only JSONL record of finished chunks.
+
+    The first line names the send's fingerprint; each later line records
+    one chunk as sent or failed. Lines are flushed as they are written, so
+    an interrupted send resumes after the last recorded chunk (a chunk in
+    flight at the interruption is sent again, under the same idempotency key).
+    """
+
+    def __init__(self, path, fingerprint, restart=False):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path) and not restart:
+            lines = []
+            complete = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Line cut short by the interruption
+                    complete += len(line)
+                    try:
+                        lines.append(json.loads(line))
+                    except ValueError:
+                        pass
+            if not lines or lines[0].get('version') != CHECKPOINT_VERSION or lines[0].get('fingerprint') != fingerprint:
+                raise ValueError(f"Checkpoint {path} belongs to a different send; pass restart=True to start over")
+            for entry in lines[1:]:
+                self.done[entry['chunk']] = entry
+            # Drop the cut-off tail so the next entry starts on a line of its own
+            os.truncate(path, complete)
+            self._file = open(path, 'a', encoding='utf-8')
+        elif path:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._write({'version': CHECKPOINT_VERSION, 'fingerprint': fingerprint})
+        else:
+            self._file = None
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+    def record(self, entry):
+        with self._lock:
+            self.done[entry['chunk']] = entry
+            if self._file:
+                self._write(entry)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def _retry_after(headers):
+    value = headers.get('Retry-After') if headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def send_chunk(pool, chunk, message, headers, max_retries=DEFAULT_MAX_RETRIES, backoff=0.5, idempotency_key=None):
+    """
+    POST one bulk send request, retrying transient failures.
+
+    The chunk goes out as Bcc so recipients do not see each other, with
+    the sender as the To address. Connection errors and RETRY_STATUSES are
+    retried with exponential backoff and jitter, honouring Retry-After.
+    The send is not idempotent, so a request that was written in full but
+    got no response (ResponseLost) is not retried: the chunk fails and a
+    resumed send repeats it with the same `idempotency_key`.
+    Returns the decoded response; raises DispatchError otherwise.
+    """
+    body = json.dumps(dict(message, recipients={
+        'to': [{'address': message['senderAddress']}],
+        'bcc': [{'address': recipient['address'], 'name': recipient.get('name', '')} for recipient in chunk]
+    })).encode('utf-8')
+    if idempotency_key:
+        headers = dict(headers, **{IDEMPOTENCY_HEADER: idempotency_key})
+
+    for attempt in range(max_retries + 1):
+        try:
+            status, response_headers, data = pool.request('POST', SEND_PATH, body, headers)
+        except ResponseLost as e:
+            raise DispatchError(f"No response after sending, not retried: {e}") from e
+        except (OSError, http.client.HTTPException) as e:
+            error = DispatchError(f"{type(e).__name__}: {e}")
+        else:
+            if 200 <= status < 300:
+                try:
+                    return json.loads(data or b'{}')
+                except ValueError:
+                    return {}
+            error = DispatchError(f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}", status,
+                                  _retry_after(response_headers))
+            if status not in RETRY_STATUSES:
+                raise error
+        if attempt == max_retries:
+            raise error
+        delay = error.retry_after if error.retry_after is not None else backoff * 2 ** attempt
+        time.sleep(delay * (1 + random.random() * 0.25))
+
+
+def dispatch(recipients, message, base_url=API_BASE_URL, token=None, checkpoint_path=None, restart=False,
+             concurrency=DEFAULT_CONCURRENCY, bulk_size=DEFAULT_BULK_SIZE, limiter=None,
+             max_retries=DEFAULT_MAX_RETRIES, backoff=0.5, metrics=None, store=None):
+    """
+    Send `message` to every recipient through the email-marketing backend.
+
+    `message` holds the SendEmailRequest fields other than recipients
+    (subject, html, senderAddress, connectionString, batchNumber, ...).
+    Recipients are coalesced into bulk requests (plan_chunks), admitted
+    through per-domain token buckets and sent by `concurrency` threads
+    over pooled keep-alive connections. Finished chunks are recorded in
+    the checkpoint, and a rerun with the same checkpoint skips them.
+    Each chunk carries an idempotency key derived from the send's
+    fingerprint and the chunk's position, the same on every rerun.
+    With `store` (a gem_store.RecipientStore) the recipients sent in this
+    run are recorded there under message['batchNumber'] as each chunk
+    goes out; its connection must allow use from the sending threads.
+    Returns a summary with sent / failed / skipped recipient counts.
+    """
+    limiter = limiter or DomainRateLimiter()
+    metrics = metrics or PipelineMetrics('gem_dispatch')
+    chunks = plan_chunks(recipients, bulk_size, limiter)
+    fingerprint = dispatch_fingerprint(chunks, message)
+    checkpoint = Checkpoint(checkpoint_path, fingerprint, restart)
+    pool = HttpPool(base_url, concurrency)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    store_lock = threading.Lock()
+
+    def run(index):
+        chunk = chunks[index]
+        domain_counts = {}
+        for recipient in chunk:
+            domain = email_domain(recipient['address'])
+            domain_counts[domain] = domain_counts.get(domain, 0) + 1
+        limiter.acquire(domain_counts)
+        try:
+            response = send_chunk(pool, chunk, message, headers, max_retries, backoff, f"{fingerprint}-{index}")
+            entry = {'chunk': index, 'status': 'sent', 'recipients': len(chunk), 'id': response.get('id')}
+            if store is not None:
+                # Before the checkpoint, so a resumed send never skips an unrecorded chunk
+                with store_lock:
+                    store.record_sends((recipient['address'] for recipient in chunk),
+                                       message.get('batchNumber'), entry['id'])
+        except DispatchError as e:
+            entry = {'chunk': index, 'status': 'failed', 'recipients': len(chunk), 'error': str(e)}
+        checkpoint.record(entry)
+        return entry
+
+    pending = [index for index in range(len(chunks)) if checkpoint.done.get(index, {}).get('status') != 'sent']
+    skipped = sum(len(chunks[index]) for index in range(len(chunks)) if index not in pending)
+    try:
+        with metrics.stage('dispatch', rows=sum(len(chunks[index]) for index in pending)) as stage:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(run, pending))
+            stage['requests'] = len(results)
+            stage['connections'] = pool.connections_opened
+    finally:
+        pool.close()
+        checkpoint.close()
+        metrics.write()
+
+    return {
+        'chunks': len(chunks),
+        'sent': sum(entry['recipients'] for entry in results if entry['status'] == 'sent'),
+        'failed': sum(entry['recipients'] for entry in results if entry['status'] == 'failed'),
+        'skipped': skipped,
+        'errors': [entry['error'] for entry in results if entry['status'] == 'failed'][:10]
+    }
+
+
+def load_batch(batch_name=None, manifest_path=None):
+    """Recipients and metadata of a generated batch (the email batch if batch_name is None)."""
+    from gem_data_summary import load_mock_data, load_recipients
+
+    manifest = load_mock_data(manifest_path)
+    if manifest is None:
+        raise FileNotFoundError("No generated GeM data manifest")
+    recipients = load_recipients(manifest, batch_name)
+    entry = next((batch for batch in manifest['batches'] if batch['batch_name'] == batch_name), {})
+    return recipients, entry
+
+
+def send_batch(batch_name, subject, html_path, sender, connection_string='', manifest_path=None,
+               base_url=API_BASE_URL, token=None, checkpoint_path=None, restart=False,
+               concurrency=DEFAULT_CONCURRENCY, bulk_size=DEFAULT_BULK_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+               metrics=None, store_path=None):
+    """
+    Send a generated batch (the email batch if batch_name is None) with dispatch().
+
+    The checkpoint defaults to .gem_cache/dispatch-<batch>.jsonl, so
+    rerunning the same command resumes an interrupted send. With
+    `store_path` the sends are recorded in that gem_store database.
+    """
+    from gem_cache import CACHE_DIR
+
+    recipients, entry = load_batch(batch_name, manifest_path)
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    message = {
+        'subject': subject,
+        'html': html,
+        'senderAddress': sender,
+        'connectionString': connection_string,
+        'dataSourceType': 'GeM',  # As the dashboard sends it (email-marketing/page.tsx)
+        'category': entry.get('category'),
+        'batchNumber': batch_name or 'email_batch',
+    }
+    if checkpoint_path is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        slug = ''.join(c if c.isalnum() else '-' for c in (batch_name or 'email-batch').lower())
+        checkpoint_path = os.path.join(CACHE_DIR, f"dispatch-{slug}.jsonl")
+
+    store = None
+    if store_path:
+        from gem_store import RecipientStore
+
+        store = RecipientStore(store_path, check_same_thread=False)
+    try:
+        summary = dispatch(recipients, message, base_url, token, checkpoint_path, restart, concurrency, bulk_size,
+                           max_retries=max_retries, metrics=metrics, store=store)
+    finally:
+        if store is not None:
+            store.close()
+    print(f"{summary['sent']} recipients sent, {summary['failed']} failed, "
+          f"{summary['skipped']} already sent ({summary['chunks']} requests planned)")
+    for error in summary['errors']:
+        print(f"  {error}")
+    return summary
+
+
+def run_from_args(args):
+    """Run send_batch for parsed command-line arguments (this script's or `gem_cli.py dispatch`'s)."""
+    summary = send_batch(args.batch, args.subject, args.html_file, args.sender, args.connection_string,
+                         args.manifest, args.base_url, args.token, args.checkpoint, args.restart,
+                         args.concurrency, args.bulk_size, args.max_retries,
+                         PipelineMetrics('gem_dispatch', args.metrics), args.store)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send a generated GeM batch through the email-marketing backend")
+    parser.add_argument('--batch', help="Batch name to send (default: the email batch)")
+    parser.add_argument('--manifest', help="Data manifest (default: the gem-mock-data.ts sidecar)")
+    parser.add_argument('--subject', required=True, help="Email subject")
+    parser.add_argument('--html-file', required=True, help="HTML body of the email")
+    parser.add_argument('--sender', required=True, help="Sender address")
+    parser.add_argument('--connection-string', default=os.environ.get('GEM_EMAIL_CONNECTION_STRING', ''),
+                        help="Email service connection string (default: $GEM_EMAIL_CONNECTION_STRING)")
+    parser.add_argument('--base-url', default=API_BASE_URL, help="Backend API base URL")
+    parser.add_argument('--token', default=os.environ.get('GEM_API_TOKEN'), help="Bearer token (default: $GEM_API_TOKEN)")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: .gem_cache/dispatch-<batch>.jsonl)")
+    parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and send everything")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight")
+    parser.add_argument('--bulk-size', type=int, default=DEFAULT_BULK_SIZE, help="Recipients per request")
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help="Retries per request")
+    parser.add_argument('--store', help="Record the sends in this recipient store (see gem_store.py)")
+    parser.add_argument('--metrics', help="Write dispatch metrics to this file (.json, or .jsonl to append)")
+    raise SystemExit(run_from_args(parser.parse_args()))
@@ -0,0 +1,554 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+
+MOCK_DATA_TS = 'src/app/(dashboard)/email-marketing/gem-mock-data.ts'
+
+# MSME_TEST_EMAILS lives in its own module next to gem-mock-data.ts (which
+# re-exports it), so editing the test recipients never rewrites the batches
+MSME_SECTION_MODULE = 'gem-msme-test-emails'
+
+# Served by Next.js from /gem-data/...
+SHARD_DIR = 'public/gem-data'
+SHARD_MANIFEST = 'manifest.json'
+SHARD_MANIFEST_VERSION = 2
+
+# Bump when a change to the renderers changes the files written for the same data
+RENDERER_VERSION = 1
+
+# Sidecar manifest written next to gem-mock-data.ts
+SIDECAR_SUFFIX = '.manifest.json'
+SIDECAR_VERSION = 1
+
+# Batch fields used by the generators only, never written to the UI payload
+INTERNAL_BATCH_FIELDS = {"segment"}
+
+# Recipient list encodings: 'objects' is a list of {"address", "name"};
+# 'columnar' is {"addresses": [...], "names": [refs]} plus a name dictionary, shared
+# by the whole module in gem-mock-data.ts and carried inside each shard when sharded
+RECIPIENT_ENCODINGS = ('objects', 'columnar')
+
+DEFAULT_MSME_TEST_EMAILS = [
+    {"id": "msme1", "email": "your.actual.email@example.com", "name": "Your Name"},
+    {"id": "msme2", "email": "test@example.com", "name": "Test User"},
+    {"id": "msme3", "email": "msme-test@quickbid.co.in", "name": "MSME Test"},
+    {"id": "msme4", "email": "info@msme-test.com", "name": "MSME Info"},
+    {"id": "msme5", "email": "contact@msme-sample.com", "name": "MSME Contact"},
+]
+
+
+def write_atomic(path, text):
+    """Write a text file via a temporary file and rename, so readers never see half a file."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp{os.getpid()}")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def clean_recipients(recipients):
+    """Keep only the address and name of each recipient."""
+    return [{"address": recipient["address"], "name": recipient["name"]} for recipient in recipients]
+
+
+def clean_batch(batch):
+    """Copy a batch for output, dropping internal fields and stripping its recipients."""
+    return {
+        key: clean_recipients(value) if key == "recipients" else value
+        for key, value in batch.items()
+        if key not in INTERNAL_BATCH_FIELDS
+    }
+
+
+def batch_segment(batch):
+    """
+    Return the segment a batch was planned for.
+
+    Planner batches carry it in 'segment'; older state/category/district
+    batches are segmented by those fields.
+    """
+    if batch.get("segment"):
+        return dict(batch["segment"])
+    return {key: batch[key] for key in ("state", "category", "district") if key in batch}
+
+
+def _domain_category(recipient):
+    # Imported here so tools that only read or edit generated files skip the classifier tables
+    from gem_classify import classify_domain, email_domain
+
+    return recipient.get("domain_category") or classify_domain(email_domain(recipient["address"]))
+
+
+def compute_stats(data):
+    """
+    Precompute the statistics reported by gem_data_summary.
+
+    Returns (stats, batch_stats): totals with counts per segment and per
+    domain category over all batches, and per batch its segment and
+    domain category counts (in batch order).
+    """
+    by_segment = {}
+    by_domain_category = Counter()
+    addresses = set()
+    batch_stats = []
+    for batch in data["batches"]:
+        segment = batch_segment(batch)
+        label = " / ".join(str(value) for value in segment.values()) or "Unknown"
+        domain_categories = Counter(_domain_category(recipient) for recipient in batch["recipients"])
+        by_domain_category.update(domain_categories)
+        addresses.update(recipient["address"] for recipient in batch["recipients"])
+
+        totals = by_segment.setdefault(label, {"batches": 0, "recipients": 0})
+        totals["batches"] += 1
+        totals["recipients"] += len(batch["recipients"])
+        batch_stats.append({"segment": segment, "domain_categories": dict(domain_categories.most_common())})
+
+    stats = {
+        "batch_count": len(data["batches"]),
+        "recipient_count": sum(len(batch["recipients"]) for batch in data["batches"]),
+        "unique_recipient_count": len(addresses),
+        "email_batch_count": len(data["email_batch"]),
+        "by_segment": by_segment,
+        "by_domain_category": dict(by_domain_category.most_common())
+    }
+    return stats, batch_stats
+
+
+class NameDictionary:
+    """
+    Deduplicated list of recipient names, referenced by position.
+
+    The company name is repeated for Email 1/2/3 of a row and again in
+    every batch that row lands in; storing it once and referencing it by
+    an integer is what makes the columnar encoding small.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._refs = {}
+
+    def ref(self, name):
+        """Return the reference of a name, adding it on first use."""
+        ref = self._refs.get(name)
+        if ref is None:
+            ref = self._refs[name] = len(self.names)
+            self.names.append(name)
+        return ref
+
+
+def encode_recipients(recipients, dictionary):
+    """Encode a recipient list as parallel address and name-reference arrays."""
+    return {
+        "addresses": [recipient["address"] for recipient in recipients],
+        "names": [dictionary.ref(recipient["name"]) for recipient in recipients]
+    }
+
+
+def encode_shard_recipients(recipients):
+    """
+    Encode a recipient list for one shard, with its own name dictionary.
+
+    The dictionary travels in the "dictionary" field so a shard's refs (and
+    with them its content hash) depend only on the shard's own recipients.
+    """
+    dictionary = NameDictionary()
+    columns = encode_recipients(recipients, dictionary)
+    columns["dictionary"] = dictionary.names
+    return columns
+
+
+def decode_recipients(columns, names=None):
+    """Inverse of encode_recipients; names defaults to the columns' own dictionary."""
+    if names is None:
+        names = columns["dictionary"]
+    return [
+        {"address": address, "name": names[ref]}
+        for address, ref in zip(columns["addresses"], columns["names"])
+    ]
+
+
+def encode_batch(batch, dictionary):
+    """Copy a batch for output with its recipients in columnar form."""
+    encoded = clean_batch(batch)
+    encoded["recipients"] = encode_recipients(batch["recipients"], dictionary)
+    return encoded
+
+
+def _indent_tail(text, spaces):
+    """Indent every line but the first, as json.dumps does for a nested value."""
+    return text.replace("\n", "\n" + " " * spaces)
+
+
+def _locate_fragments(text, fragments):
+    """
+    Find each fragment in order in `text` and return (byte offset, byte length) pairs.
+
+    Each search starts where the previous fragment ended, so repeated
+    fragments (identical recipient lists) resolve to their own position.
+    """
+    locations = []
+    position = 0
+    byte_position = 0
+    for fragment in fragments:
+        start = text.index(fragment, position)
+        byte_position += len(text[position:start].encode('utf-8'))
+        length = len(fragment.encode('utf-8'))
+        locations.append((byte_position, length))
+        position = start + len(fragment)
+        byte_position += length
+    return locations
+
+
+def render_msme_test_emails(msme_test_emails):
+    """Render the MSME_TEST_EMAILS array, one recipient per line."""
+    lines = [
+        f'  {{ "id": {json.dumps(entry["id"])}, "email": {json.dumps(entry["email"])}, "name": {json.dumps(entry["name"])} }}'
+        for entry in msme_test_emails
+    ]
+    return "export const MSME_TEST_EMAILS = [\n" + ",\n".join(lines) + "\n];"
+
+
+def render_msme_module(msme_test_emails):
+    """Render the gem-msme-test-emails.ts section module."""
+    return "// MSME dummy email for testing\n" + render_msme_test_emails(msme_test_emails) + "\n"
+
+
+def msme_module_path(path=MOCK_DATA_TS):
+    """Path of the MSME section module belonging to a generated TS module."""
+    return os.path.join(os.path.dirname(path), MSME_SECTION_MODULE + '.ts')
+
+
+def parse_msme_test_emails(text):
+    """Read the MSME_TEST_EMAILS entries back from a rendered section (the array is plain JSON)."""
+    start = text.index('[', text.index('export const MSME_TEST_EMAILS'))
+    end = text.index('];', start) + 1
+    return json.loads(text[start:end])
+
+
+def existing_msme_test_emails(path=MOCK_DATA_TS):
+    """
+    The MSME test recipients already on disk for the TS module at `path`.
+
+    Read from its section module, or from the inline array of an older
+    gem-mock-data.ts; None when neither exists yet.
+    """
+    for file_path in (msme_module_path(path), path):
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if 'export const MSME_TEST_EMAILS' in text:
+            return parse_msme_test_emails(text)
+    return None
+
+
+def write_msme_module(msme_test_emails, path=MOCK_DATA_TS):
+    """Atomically (re)write only the MSME section module."""
+    section_path = msme_module_path(path)
+    write_atomic(section_path, render_msme_module(msme_test_emails))
+    return section_path
+
+
+def render_mock_data_ts(data, title="Mock GeM data generated from the Excel file"):
+    """
+    Render gem-mock-data.ts.
+
+    `data` holds states, categories, districts_by_state, products_by_category,
+    batches, email_batch and msme_test_emails. MSME_TEST_EMAILS is
+    re-exported from its section module (see render_msme_module).
+    """
+    return """// {0}
+export const GEM_STATES = {1};
+
+export const GEM_CATEGORIES = {2};
+
+export const GEM_DISTRICTS_BY_STATE = {3};
+
+export const GEM_PRODUCTS_BY_CATEGORY = {4};
+
+export const GEM_BATCHES = {5};
+
+// Email batch for marketing
+export const GEM_EMAIL_BATCH = {6};
+
+// MSME dummy email for testing
+export {{ MSME_TEST_EMAILS }} from './{7}';
+""".format(
+        title,
+        json.dumps(data["states"], indent=2),
+        json.dumps(data["categories"], indent=2),
+        json.dumps(data["districts_by_state"], indent=2),
+        json.dumps(data["products_by_category"], indent=2),
+        json.dumps([clean_batch(batch) for batch in data["batches"]], indent=2),
+        json.dumps(clean_recipients(data["email_batch"]), indent=2),
+        MSME_SECTION_MODULE
+    )
+
+
+def render_columnar_mock_data_ts(data, title="Mock GeM data generated from the Excel file"):
+    """
+    Render gem-mock-data.ts with dictionary-encoded recipient lists.
+
+    Exports the same names and shapes as render_mock_data_ts; the batches
+    are rebuilt at import time by gem-recipient-codec.ts from compact
+    address arrays and one shared name dictionary.
+    """
+    dictionary = NameDictionary()
+    batches = [encode_batch(batch, dictionary) for batch in data["batches"]]
+    email_batch = encode_recipients(data["email_batch"], dictionary)
+
+    def compact(value):
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+    return """// {0}
+import {{ decodeBatches, decodeRecipients }} from './gem-recipient-codec';
+
+export const GEM_STATES = {1};
+
+export const GEM_CATEGORIES = {2};
+
+export const GEM_DISTRICTS_BY_STATE = {3};
+
+export const GEM_PRODUCTS_BY_CATEGORY = {4};
+
+// Company names shared by every recipient list below
+const GEM_RECIPIENT_NAMES = {5};
+
+export const GEM_BATCHES = decodeBatches({6}, GEM_RECIPIENT_NAMES);
+
+// Email batch for marketing
+export const GEM_EMAIL_BATCH = decodeRecipients({7}, GEM_RECIPIENT_NAMES);
+
+// MSME dummy email for testing
+export {{ MSME_TEST_EMAILS }} from './{8}';
+""".format(
+        title,
+        json.dumps(data["states"], indent=2),
+        json.dumps(data["categories"], indent=2),
+        json.dumps(data["districts_by_state"], indent=2),
+        json.dumps(data["products_by_category"], indent=2),
+        compact(dictionary.names),
+        compact(batches),
+        compact(email_batch),
+        MSME_SECTION_MODULE
+    )
+
+
+def _recipient_fragments(data, encoding):
+    """The exact JSON text of each recipient list as rendered into the TS module."""
+    if encoding == 'columnar':
+        dictionary = NameDictionary()
+        batches = [
+            json.dumps(encode_recipients(batch["recipients"], dictionary), separators=(',', ':'), ensure_ascii=False)
+            for batch in data["batches"]
+        ]
+        email_batch = json.dumps(encode_recipients(data["email_batch"], dictionary),
+                                 separators=(',', ':'), ensure_ascii=False)
+        names = json.dumps(dictionary.names, separators=(',', ':'), ensure_ascii=False)
+        return [names] + batches + [email_batch]
+    # Recipient lists sit two levels deep in GEM_BATCHES (list -> batch -> list)
+    batches = [
+        _indent_tail(json.dumps(clean_recipients(batch["recipients"]), indent=2), 4)
+        for batch in data["batches"]
+    ]
+    return batches + [json.dumps(clean_recipients(data["email_batch"]), indent=2)]
+
+
+# Exports rendered identically at the top of both module layouts, in file order
+REFERENCE_SECTIONS = [
+    ("GEM_STATES", "states"),
+    ("GEM_CATEGORIES", "categories"),
+    ("GEM_DISTRICTS_BY_STATE", "districts_by_state"),
+    ("GEM_PRODUCTS_BY_CATEGORY", "products_by_category"),
+]
+
+
+def sidecar_path(path=MOCK_DATA_TS):
+    """Path of the sidecar manifest that describes a generated TS module."""
+    return os.path.splitext(path)[0] + SIDECAR_SUFFIX
+
+
+def write_sidecar_manifest(data, text, path=MOCK_DATA_TS, encoding='objects'):
+    """
+    Write the sidecar manifest for a rendered TS module.
+
+    It holds the precomputed statistics and a section index: the byte
+    offset and length of each reference export and of every recipient list
+    inside the module, and the file of each separate section module. Tools
+    can report without parsing TypeScript and read or replace single
+    sections without scanning the file.
+    """
+    stats, batch_stats = compute_stats(data)
+    sections = {
+        name: {"offset": offset, "length": length}
+        for (name, key), (offset, length) in zip(
+            REFERENCE_SECTIONS,
+            _locate_fragments(text, [json.dumps(data[key], indent=2) for name, key in REFERENCE_SECTIONS])
+        )
+    }
+    sections["MSME_TEST_EMAILS"] = {"file": os.path.basename(msme_module_path(path))}
+
+    locations = _locate_fragments(text, _recipient_fragments(data, encoding))
+    if encoding == 'columnar':
+        names_location, locations = locations[0], locations[1:]
+
+    batch_entries = []
+    for batch, extra, (offset, length) in zip(data["batches"], batch_stats, locations):
+        entry = {key: value for key, value in clean_batch(batch).items() if key != "recipients"}
+        entry.update(extra)
+        entry["recipients"] = {"offset": offset, "length": length}
+        batch_entries.append(entry)
+
+    offset, length = locations[-1]
+    manifest = {
+        "version": SIDECAR_VERSION,
+        "file": os.path.basename(path),
+        "encoding": encoding,
+        "states": data["states"],
+        "categories": data["categories"],
+        "stats": stats,
+        "sections": sections,
+        "batches": batch_entries,
+        "email_batch": {"recipient_count": len(data["email_batch"]),
+                        "recipients": {"offset": offset, "length": length}}
+    }
+    if encoding == 'columnar':
+        manifest["names"] = {"offset": names_location[0], "length": names_location[1]}
+
+    manifest_path = sidecar_path(path)
+    write_atomic(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False))
+    return manifest_path
+
+
+def write_mock_data_ts(data, path=MOCK_DATA_TS, title="Mock GeM data generated from the Excel file",
+                       encoding='objects', msme_defaults=DEFAULT_MSME_TEST_EMAILS):
+    """
+    Write gem-mock-data.ts, its MSME section module and its sidecar manifest.
+
+    The MSME section is only written when `data` carries
+    "msme_test_emails"; otherwise the recipients already on disk (as
+    edited with update_msme_emails) are kept, and `msme_defaults` is used
+    only when there are none yet.
+    """
+    if encoding == 'columnar':
+        text = render_columnar_mock_data_ts(data, title)
+    else:
+        text = render_mock_data_ts(data, title)
+    # The section module first, so the re-export never points at a missing file
+    msme_test_emails = data.get("msme_test_emails")
+    if msme_test_emails is None and not os.path.exists(msme_module_path(path)):
+        msme_test_emails = existing_msme_test_emails(path) or msme_defaults
+    if msme_test_emails is not None:
+        write_msme_module(msme_test_emails, path)
+    write_atomic(path, text)
+    write_sidecar_manifest(data, text, path, encoding)
+    return path
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'batch'
+
+
+def _write_shard(shard_dir, stem, payload):
+    """Write one JSON shard named by its content hash; unchanged shards are not rewritten."""
+    content = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    name = f"{_slug(stem)}.{digest}.json"
+    path = os.path.join(shard_dir, name)
+    if not os.path.exists(path):
+        write_atomic(path, content)
+    return name, len(content.encode('utf-8'))
+
+
+def _manifest_shards(manifest):
+    """Shard paths a sharded manifest points to (the names shard of version 1 manifests included)."""
+    shards = {entry["shard"] for entry in manifest.get("batches", [])}
+    for section in ("email_batch", "names"):
+        if manifest.get(section, {}).get("shard"):
+            shards.add(manifest[section]["shard"])
+    return shards
+
+
+def write_sharded(data, out_dir=SHARD_DIR, encoding='objects'):
+    """
+    Write a small manifest plus one content-hashed JSON shard per batch.
+
+    The manifest carries the reference lists (states, categories, districts,
+    products), the MSME test recipients and per-batch metadata with the
+    shard file name, so the UI can list batches without downloading any
+    recipients and fetch only the batch the operator selects. Shard names
+    change only when their content does, so they can be cached forever.
+    Shards referenced by neither the new nor the previous manifest are
+    deleted; the previous generation stays so an open dashboard can still
+    load the batches it listed. Batch entries and "stats" carry
+    the same precomputed counts as the sidecar manifest (compute_stats).
+
+    With encoding='columnar' the shards hold encode_shard_recipients()
+    columns, each with its own name dictionary, so a change to one batch
+    never changes the bytes (and cache key) of another batch's shard.
+
+    Without "msme_test_emails" in `data` the list in the existing manifest
+    is carried over, so edits made with update_msme_emails survive.
+    """
+    if encoding not in RECIPIENT_ENCODINGS:
+        raise ValueError(f"Unknown recipient encoding: {encoding}")
+    shard_dir = os.path.join(out_dir, 'batches')
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, SHARD_MANIFEST)
+
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    msme_test_emails = data.get("msme_test_emails")
+    if msme_test_emails is None:
+        msme_test_emails = previous.get("msme_test_emails")
+
+    encode = encode_shard_recipients if encoding == 'columnar' else clean_recipients
+
+    stats, batch_stats = compute_stats(data)
+    batch_entries = []
+    for batch, extra in zip(data["batches"], batch_stats):
+        cleaned = clean_batch(batch)
+        cleaned["recipients"] = encode(batch["recipients"])
+        shard, size = _write_shard(shard_dir, cleaned["batch_name"], cleaned)
+        entry = {key: value for key, value in cleaned.items() if key != "recipients"}
+        entry.update(extra)
+        entry.update({"shard": f"batches/{shard}", "bytes": size})
+        batch_entries.append(entry)
+
+    email_shard, email_size = _write_shard(shard_dir, 'email-batch', {
+        "recipients": encode(data["email_batch"])
+    })
+
+    manifest = {
+        "version": SHARD_MANIFEST_VERSION,
+        "encoding": encoding,
+        "states": data["states"],
+        "categories": data["categories"],
+        "districts_by_state": data["districts_by_state"],
+        "products_by_category": data["products_by_category"],
+        "msme_test_emails": DEFAULT_MSME_TEST_EMAILS if msme_test_emails is None else msme_test_emails,
+        "batch_count": len(batch_entries),
+        "recipient_count": stats["recipient_count"],
+        "stats": stats,
+        "batches": batch_entries,
+        "email_batch": {
+            "recipient_count": len(data["email_batch"]),
+            "shard": f"batches/{email_shard}",
+            "bytes": email_size
+        }
+    }
+    write_atomic(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    # Remove shards from earlier runs; the previous manifest's are kept for one
+    # more generation so a client that loaded it can still fetch its batches
+    referenced = _manifest_shards(manifest) | _manifest_shards(previous)
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and f"batches/{name}" not in referenced:
+            os.remove(os.path.join(shard_dir, name))
+
+    return manifest_path
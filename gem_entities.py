@@ -0,0 +1,337 @@
+import argparse
+import hashlib
+import re
+from collections import Counter
+
+# Legal-form words and their abbreviations, dropped from the end of a name in
+# any combination ("Pvt. Ltd.", "Limited", "Co.") so the variants of one
+# firm's name normalize alike
+LEGAL_FORM_WORDS = {
+    'private', 'pvt', 'pvte', 'limited', 'ltd', 'llp', 'inc', 'incorporated',
+    'corp', 'corporation', 'co', 'company', 'plc', 'opc',
+}
+
+# Words that are only part of the legal form right before one of these: the
+# "P" of "(P) Ltd" and the "&" of "& Co.", but not the "& P" of "A & P Ltd"
+LEGAL_FORM_LEADS = {
+    'p': {'ltd', 'limited'},
+    'and': {'co', 'company'},
+}
+
+# Leading words that are not part of the name ("M/S", "Messrs", "The")
+NAME_PREFIXES = [['m', 's'], ['messrs'], ['the']]
+
+# Generic trade words shared by thousands of unrelated firms. Two names must
+# also match on their trigrams that do not occur in these words ("R R" is not
+# "S R Enterprises"), which still tolerates a typo inside a generic word
+GENERIC_WORDS = {
+    'enterprise', 'enterprises', 'industry', 'industries', 'trader', 'traders', 'trading',
+    'solution', 'solutions', 'technology', 'technologies', 'system', 'systems',
+    'service', 'services', 'associate', 'associates', 'agency', 'agencies',
+    'engineering', 'engineers', 'works', 'international', 'india', 'group',
+    'electricals', 'electronics', 'infotech', 'tech',
+}
+
+# Names whose character trigram sets have at least this Jaccard similarity,
+# and whose distinctive trigrams are within DISTINCTIVE_MARGIN of it, are
+# the same company; one typo in a 20-letter name leaves about 0.74
+DEFAULT_THRESHOLD = 0.7
+DISTINCTIVE_MARGIN = 0.1
+
+# MinHash signature of NUM_BANDS bands of BAND_ROWS hashes each; two names
+# become candidates if all hashes of any band agree, which for this shape is
+# ~99% likely at Jaccard 0.7 and ~28% at 0.3
+NUM_BANDS = 12
+BAND_ROWS = 3
+
+# Within an LSH bucket each name is only compared with this many bucket
+# neighbours, so a huge bucket costs linear rather than quadratic work
+BUCKET_NEIGHBOURS = 4
+
+# Candidates whose signatures agree on less than the distinctive threshold
+# minus ESTIMATE_SLACK of their hashes are dropped before the exact
+# comparison (a true 0.6 match estimates below 0.4 with ~0.7% probability
+# at 36 hashes)
+ESTIMATE_SLACK = 0.2
+
+# Names signed per numpy pass, bounding the temporary trigram arrays, and
+# candidate pairs checked per verification pass
+SIGNATURE_CHUNK = 200_000
+VERIFY_CHUNK = 100_000
+
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+def company_core(company_name):
+    """
+    Normalized core of a company name used for entity resolution.
+
+    Case, punctuation and whitespace are dropped, '&' reads as 'and', and
+    leading "M/S"/"The" as well as trailing legal-form words are removed;
+    a name made only of such words is kept whole. '' for a blank name.
+    """
+    tokens = _WORD_PATTERN.findall((company_name or '').lower().replace('&', ' and '))
+    start, end = 0, len(tokens)
+    for prefix in NAME_PREFIXES:
+        if tokens[:len(prefix)] == prefix and end - len(prefix) > 0:
+            start = len(prefix)
+            break
+    while end - start > 1:
+        word = tokens[end - 1]
+        if word not in LEGAL_FORM_WORDS and (end == len(tokens) or tokens[end] not in LEGAL_FORM_LEADS.get(word, ())):
+            break
+        end -= 1
+    return ' '.join(tokens[start:end])
+
+
+def shingles(core):
+    """Character trigrams of a core name, padded so word edges count."""
+    padded = f" {core} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+GENERIC_GRAMS = frozenset(gram for word in GENERIC_WORDS for gram in shingles(word))
+
+
+def distinctive_shingles(core):
+    """Trigrams of a core name that no generic trade word has (all of them if none is left)."""
+    grams = shingles(core)
+    return grams - GENERIC_GRAMS or grams
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _band_seeds(seed=0):
+    """Deterministic odd multipliers and offsets, one pair per MinHash row."""
+    digest = hashlib.blake2b(f"gem-entities-{seed}".encode(), digest_size=64).digest()
+    seeds = []
+    while len(seeds) < NUM_BANDS * BAND_ROWS * 2:
+        digest = hashlib.blake2b(digest, digest_size=64).digest()
+        seeds.extend(int.from_bytes(digest[i:i + 8], 'little') for i in range(0, 64, 8))
+    return [(seeds[2 * i] | 1, seeds[2 * i + 1]) for i in range(NUM_BANDS * BAND_ROWS)]
+
+
+def minhash_signatures(cores, seed=0):
+    """
+    MinHash signatures of the distinctive trigrams of names: an
+    (n, NUM_BANDS * BAND_ROWS) uint32 array.
+
+    Trigrams are cut from one concatenated byte buffer, those of generic
+    words masked out (as in distinctive_shingles) and the rest hashed with
+    multiply-add permutations entirely in numpy; the minimum per name of
+    each permutation is taken with a segmented reduce and its top 32 bits
+    kept. Work is linear in the total length of the names.
+    """
+    import numpy as np
+
+    seeds = _band_seeds(seed)
+    generic = np.array(
+        [int.from_bytes(gram.encode('utf-8'), 'big') for gram in GENERIC_GRAMS], dtype=np.uint64
+    )
+    signatures = np.empty((len(cores), len(seeds)), dtype=np.uint32)
+    for chunk_start in range(0, len(cores), SIGNATURE_CHUNK):
+        chunk = [f" {core} ".encode('utf-8') for core in cores[chunk_start:chunk_start + SIGNATURE_CHUNK]]
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        data = np.frombuffer(b''.join(chunk), dtype=np.uint8).astype(np.uint64)
+
+        # A trigram starting at offset i of its name is valid while i < length - 2
+        offsets = np.arange(len(data)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        valid = (offsets < np.repeat(lengths - 2, lengths))[:-2]
+        grams = ((data[:-2] << np.uint64(16)) | (data[1:-1] << np.uint64(8)) | data[2:])[valid]
+
+        # Mask generic trigrams, except for names that have nothing else
+        counts = lengths - 2
+        keep = ~np.isin(grams, generic)
+        kept = np.add.reduceat(keep, np.concatenate(([0], np.cumsum(counts)[:-1])))
+        keep |= np.repeat(kept == 0, counts)
+        counts = np.where(kept == 0, counts, kept)
+        grams = grams[keep] * np.uint64(0x9E3779B97F4A7C15)
+        segments = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        for column, (multiplier, offset) in enumerate(seeds):
+            minimum = np.minimum.reduceat(grams * np.uint64(multiplier) + np.uint64(offset), segments)
+            signatures[chunk_start:chunk_start + len(chunk), column] = minimum >> np.uint64(32)
+    return signatures
+
+
+def band_keys(signatures):
+    """Fold each band's BAND_ROWS signature values into one uint64 key: an (n, NUM_BANDS) array."""
+    import numpy as np
+
+    keys = np.zeros((len(signatures), NUM_BANDS), dtype=np.uint64)
+    for band in range(NUM_BANDS):
+        for row in range(BAND_ROWS):
+            value = signatures[:, band * BAND_ROWS + row].astype(np.uint64)
+            keys[:, band] = (keys[:, band] ^ value) * np.uint64(0x9E3779B97F4A7C15) + (value << np.uint64(17))
+    return keys
+
+
+def candidate_pairs(signatures, min_agreement=0.0, neighbours=BUCKET_NEIGHBOURS):
+    """
+    Index pairs (i < j) sharing an LSH bucket in any band, as an (m, 2) array.
+
+    Each band is sorted once and a name is paired with up to `neighbours`
+    names before it in the same bucket: at most n * bands * neighbours
+    pairs, while the union-find still joins every member of a bucket of
+    matching names through these overlapping pairs. Pairs whose
+    signatures agree on less than `min_agreement` of their hashes are
+    dropped as they are found.
+    """
+    import numpy as np
+
+    keys = band_keys(signatures)
+    count = len(keys)
+    codes = []
+    for band in range(NUM_BANDS):
+        order = np.argsort(keys[:, band], kind='stable')
+        ordered = keys[order, band]
+        for step in range(1, neighbours + 1):
+            same = ordered[step:] == ordered[:-step]
+            left, right = order[:-step][same], order[step:][same]
+            agreement = (signatures[left] == signatures[right]).mean(axis=1)
+            keep = agreement >= min_agreement
+            codes.append(left[keep].astype(np.int64) * count + right[keep])
+    if not codes:
+        return np.empty((0, 2), dtype=np.int64)
+    codes = np.unique(np.concatenate(codes))
+    return np.stack([codes // count, codes % count], axis=1)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def company_id(core):
+    """ID of a newly seen company: a short hash of its canonical core name."""
+    return 'C' + hashlib.blake2b(core.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def resolve_companies(names, threshold=DEFAULT_THRESHOLD, previous=None, top_k=10):
+    """
+    Cluster company names into firms and give each a stable company ID.
+
+    Names are first blocked on their normalized core (company_core), so
+    spelling variants that only differ in case, punctuation, spacing or
+    legal form merge without any comparison. The distinct cores are then
+    blocked again with MinHash LSH over their distinctive trigrams, so
+    "enterprises" or "traders" do not put unrelated firms into one bucket.
+    Only names sharing a bucket whose signatures roughly agree are
+    compared, by the exact Jaccard similarity of all their trigrams
+    (at least `threshold`) and of their distinctive ones (at least
+    `threshold` - DISTINCTIVE_MARGIN); matches are merged with union-find.
+
+    `previous` maps cores to the IDs a previous run gave them; a cluster
+    keeps the smallest previous ID among its members, otherwise its ID is
+    derived from its smallest core, so IDs survive reruns and new rows.
+
+    Returns (company ID per name, None for blank names; {core: ID} to pass
+    back as `previous`; cluster statistics).
+    """
+    previous = previous or {}
+    core_of = {}
+    for name in names:
+        if name not in core_of:
+            core_of[name] = company_core(name)
+    cores = sorted({core for core in core_of.values() if core})
+
+    parent = list(range(len(cores)))
+    checked = merged = 0
+    if len(cores) > 1:
+        distinctive_threshold = threshold - DISTINCTIVE_MARGIN
+        pairs = candidate_pairs(minhash_signatures(cores), distinctive_threshold - ESTIMATE_SLACK)
+        checked = len(pairs)
+        for start in range(0, len(pairs), VERIFY_CHUNK):
+            for left, right in pairs[start:start + VERIFY_CHUNK].tolist():
+                if jaccard(distinctive_shingles(cores[left]), distinctive_shingles(cores[right])) < distinctive_threshold:
+                    continue
+                if jaccard(shingles(cores[left]), shingles(cores[right])) < threshold:
+                    continue
+                root_left, root_right = _find(parent, left), _find(parent, right)
+                if root_left != root_right:
+                    parent[max(root_left, root_right)] = min(root_left, root_right)
+                    merged += 1
+
+    members = {}
+    for i in range(len(cores)):
+        members.setdefault(_find(parent, i), []).append(i)
+    ids = {}
+    for root, cluster in members.items():
+        known = [previous[cores[i]] for i in cluster if cores[i] in previous]
+        cluster_id = min(known) if known else company_id(cores[root])
+        for i in cluster:
+            ids[cores[i]] = cluster_id
+
+    company_ids = [ids.get(core_of[name]) for name in names]
+    return company_ids, ids, entity_stats(names, core_of, company_ids, len(cores), checked, merged, top_k)
+
+
+def entity_stats(names, core_of, company_ids, core_count, checked, merged, top_k=10):
+    """Cluster statistics for resolve_companies: counts, size histogram and the largest merges."""
+    rows = Counter()
+    name_counts = Counter()
+    name_rows = Counter(zip(company_ids, names))
+    for (company_id, _), count in name_rows.items():
+        if company_id:
+            rows[company_id] += count
+            name_counts[company_id] += 1
+    sizes = Counter(name_counts.values())
+    merged_ids = [company_id for company_id, count in name_counts.items() if count > 1]
+    largest = sorted(merged_ids, key=lambda company_id: (-name_counts[company_id], -rows[company_id], company_id))
+    largest = largest[:top_k]
+    variants = {company_id: Counter() for company_id in largest}
+    for (company_id, name), count in name_rows.items():
+        if company_id in variants:
+            variants[company_id][name] = count
+    return {
+        'rows': len(names),
+        'blank_rows': len(names) - sum(rows.values()),
+        'distinct_names': len(core_of),
+        'normalized_names': core_count,
+        'companies': len(rows),
+        'merged_companies': len(merged_ids),
+        'rows_in_merged_companies': sum(rows[company_id] for company_id in merged_ids),
+        'candidate_pairs': checked,
+        'fuzzy_merges': merged,
+        'names_per_company': {str(size): count for size, count in sorted(sizes.items())},
+        'largest': [
+            {
+                'company_id': company_id,
+                'rows': rows[company_id],
+                'names': [name for name, _ in variants[company_id].most_common()]
+            }
+            for company_id in largest
+        ]
+    }
+
+
+def print_entity_report(stats):
+    """Print the statistics from resolve_companies in readable form."""
+    print(f"\nCompany entity resolution: {stats['rows']} rows, {stats['distinct_names']} distinct names, "
+          f"{stats['normalized_names']} after normalization, {stats['companies']} companies")
+    print(f"  Companies with several name variants: {stats['merged_companies']} "
+          f"({stats['rows_in_merged_companies']} rows)")
+    print(f"  Candidate pairs compared: {stats['candidate_pairs']}, fuzzy merges: {stats['fuzzy_merges']}")
+    print("  Name variants per company: " +
+          ", ".join(f"{size}: {count}" for size, count in stats['names_per_company'].items()))
+    for cluster in stats['largest']:
+        print(f"  {cluster['company_id']} ({cluster['rows']} rows): " + " | ".join(cluster['names']))
+
+
+if __name__ == "__main__":
+    from gem_cache import iter_cached_records
+    from gem_reader import DEFAULT_WORKBOOK
+
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate company names in a reseller workbook")
+    parser.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to read")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Trigram Jaccard similarity at which two names are one company")
+    parser.add_argument('--top', type=int, default=10, help="Number of largest clusters to list")
+    args = parser.parse_args()
+
+    companies = [company for company, *_ in iter_cached_records(args.workbook)]
+    print_entity_report(resolve_companies(companies, args.threshold, top_k=args.top)[2])
@@ -0,0 +1,229 @@
+import argparse
+import csv
+import hashlib
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+from gem_metrics import register_cache_stats
+
+# Indian states and union territories with their districts, major cities and
+# common aliases; one place name per row (see load_gazetteer)
+GAZETTEER_PATH = os.environ.get(
+    'GEM_GAZETTEER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gem_gazetteer.csv')
+)
+
+# Gazetteer row kinds. Cities and old or alternative spellings are aliases
+# of their district (or of the state when the district is blank).
+STATE = 'state'
+DISTRICT = 'district'
+ALIAS = 'alias'
+ABBREVIATION = 'abbr'
+
+# Evidence weight per field: a place in the company name outweighs one hinted
+# at by an email address
+FIELD_WEIGHTS = {
+    'company': 2,
+    'email': 1,
+}
+
+# State abbreviations only count as a whole label of a state government
+# domain, e.g. tn.gov.in; anywhere else "up" or "mp" are ordinary words
+ABBREVIATION_SUFFIXES = ('.gov.in', '.nic.in')
+
+_TOKEN_PATTERN = re.compile(r'[a-z]+|[0-9]+')
+
+# Trie key holding the places a token sequence names
+_END = None
+
+
+def tokenize(text):
+    """Lowercase word tokens of a name, with '&' read as 'and'."""
+    return _TOKEN_PATTERN.findall(text.lower().replace('&', ' and '))
+
+
+class Gazetteer:
+    """
+    Multi-pattern index over the place names of a gazetteer.
+
+    Every name is stored as its token sequence in one word-level trie, so a
+    single left-to-right scan of a text finds all the places it names,
+    preferring the longest name at each position ("navi mumbai" over
+    "mumbai", "new delhi" over "delhi"). Multi-word names are also indexed
+    run together ("tamilnadu"), the way they appear in domains. Matching
+    whole tokens keeps short names from firing inside longer words.
+    """
+
+    def __init__(self, entries, fingerprint=''):
+        self.fingerprint = fingerprint
+        self.states = []
+        self.districts_by_state = {}
+        self._trie = {}
+        self._abbreviations = {}
+        for state, district, name, kind in entries:
+            if state not in self.districts_by_state:
+                self.states.append(state)
+                self.districts_by_state[state] = []
+            if kind == ABBREVIATION:
+                self._abbreviations[name.lower()] = state
+                continue
+            if kind == DISTRICT:
+                self.districts_by_state[state].append(district)
+            place = (state, district or None)
+            tokens = tokenize(name)
+            self._insert(tokens, place)
+            if len(tokens) > 1:
+                self._insert([''.join(tokens)], place)
+        self.domain_places = lru_cache(maxsize=65536)(self._domain_places)
+        register_cache_stats('gazetteer_domains', lambda: self.domain_places.cache_info()[:2])
+
+    def _insert(self, tokens, place):
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        places = node.setdefault(_END, [])
+        if place not in places:
+            places.append(place)
+
+    def scan(self, tokens):
+        """Yield the place list of every name in `tokens`, longest match first, left to right."""
+        position = 0
+        while position < len(tokens):
+            node = self._trie.get(tokens[position])
+            end = position + 1
+            match = None
+            while node is not None:
+                if _END in node:
+                    match, match_end = node[_END], end
+                if end == len(tokens):
+                    break
+                node = node.get(tokens[end])
+                end += 1
+            if match is None:
+                position += 1
+            else:
+                yield match
+                position = match_end
+
+    def _domain_places(self, domain):
+        """Places named by a mail domain's labels, plus a state government abbreviation."""
+        places = list(self.scan(tokenize(domain)))
+        if domain.endswith(ABBREVIATION_SUFFIXES):
+            for label in domain.split('.'):
+                if label in self._abbreviations:
+                    places.append([(self._abbreviations[label], None)])
+        return tuple(places)
+
+    def tag(self, company='', emails=()):
+        """
+        Return the (state, district) of a reseller row, None where unknown.
+
+        The company name, the local part of each email address and its
+        domain are scanned once each. Every unambiguous match votes for its
+        state with its field's weight; the state with the most weight wins
+        (the earliest on a tie) and the district is the best-supported one
+        named in that state. A name shared by districts of different
+        states (Aurangabad, Bilaspur) only settles the district once other
+        evidence has picked the state.
+        """
+        evidence = [(FIELD_WEIGHTS['company'], places) for places in self.scan(tokenize(company or ''))]
+        for email in emails:
+            local, at, domain = (email or '').strip().lower().rpartition('@')
+            if not at:
+                continue
+            evidence.extend((FIELD_WEIGHTS['email'], places) for places in self.scan(tokenize(local)))
+            evidence.extend((FIELD_WEIGHTS['email'], places) for places in self.domain_places(domain))
+        return self.resolve(evidence)
+
+    @staticmethod
+    def resolve(evidence):
+        """Pick (state, district) from (weight, places) matches as described in tag()."""
+        if not evidence:
+            return None, None
+        scores = Counter()
+        for weight, places in evidence:
+            states = {state for state, _ in places}
+            if len(states) == 1:
+                scores[states.pop()] += weight
+        if not scores:
+            return None, None
+        state = max(scores, key=scores.get)
+
+        districts = Counter()
+        for weight, places in evidence:
+            for place_state, district in places:
+                if place_state == state and district:
+                    districts[district] += weight
+        return state, max(districts, key=districts.get) if districts else None
+
+    def tag_many(self, companies):
+        """Tag company names alone; each distinct name is scanned once. Returns a list of (state, district)."""
+        tags = {}
+        return [tags[name] if name in tags else tags.setdefault(name, self.tag(name)) for name in companies]
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=GAZETTEER_PATH):
+    """
+    Load a gazetteer CSV into a Gazetteer index (cached per path).
+
+    Columns are state, district, name and kind: 'state' and 'district'
+    rows name the place itself, 'alias' rows a city or other spelling of
+    it, and 'abbr' rows a state's short code used in government domains.
+    Every alias and abbreviation must point at a state or district that
+    has its own row. The fingerprint changes whenever the file does, so
+    caches of tagged rows can tell when to re-tag.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    reader = csv.DictReader(data.decode('utf-8').splitlines())
+    entries = [(row['state'], row['district'], row['name'], row['kind']) for row in reader]
+    unknown = {kind for _, _, _, kind in entries} - {STATE, DISTRICT, ALIAS, ABBREVIATION}
+    if unknown:
+        raise ValueError(f"Unknown gazetteer kinds in {path}: {sorted(unknown)}")
+    # An alias of a place without its own row would tag rows with a district the UI does not list
+    places = {(state, district if kind == DISTRICT else '') for state, district, _, kind in entries
+              if kind in (STATE, DISTRICT)}
+    dangling = sorted({f"{state} / {district}" if district else state for state, district, _, kind in entries
+                       if kind in (ALIAS, ABBREVIATION) and (state, district if kind == ALIAS else '') not in places})
+    if dangling:
+        raise ValueError(f"Gazetteer aliases in {path} point at places without a row: {dangling}")
+    return Gazetteer(entries, hashlib.blake2b(data, digest_size=8).hexdigest())
+
+
+if __name__ == "__main__":
+    from gem_cache import iter_cached_records
+    from gem_reader import DEFAULT_WORKBOOK
+
+    parser = argparse.ArgumentParser(description="Tag reseller rows with the state and district they name")
+    parser.add_argument('texts', nargs='*', help="Company names or email addresses to tag (default: the workbook)")
+    parser.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to tag")
+    parser.add_argument('--gazetteer', default=GAZETTEER_PATH, help="Gazetteer CSV")
+    parser.add_argument('--top', type=int, default=15, help="Number of states to list")
+    args = parser.parse_args()
+
+    gazetteer = load_gazetteer(args.gazetteer)
+    if args.texts:
+        for text in args.texts:
+            state, district = gazetteer.tag(*(('', [text]) if '@' in text else (text,)))
+            print(f"  {text}: {state or '-'} / {district or '-'}")
+    else:
+        states = Counter()
+        districts = Counter()
+        rows = 0
+        for company, *emails in iter_cached_records(args.workbook):
+            rows += 1
+            state, district = gazetteer.tag(company, emails)
+            states[state] += 1
+            if district:
+                districts[state, district] += 1
+        tagged = rows - states.pop(None, 0)
+        print(f"Rows tagged with a state: {tagged} of {rows} ({tagged / rows if rows else 0:.1%}), "
+              f"with a district: {sum(districts.values())}")
+        for state, count in states.most_common(args.top):
+            print(f"  {state}: {count}")
+            for (_, district), district_count in sorted(
+                (item for item in districts.items() if item[0][0] == state), key=lambda item: -item[1]
+            ):
+                print(f"    {district}: {district_count}")
@@ -0,0 +1,142 @@
+import argparse
+import csv
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from gem_cache import load_reseller_table
+from gem_dedup import Deduplicator
+from gem_metrics import PipelineMetrics
+from gem_reader import COMPANY_COLUMN, EMAIL_COLUMNS, list_sheets
+
+SOURCE_COLUMN = 'Source'
+WORKBOOK_EXTENSIONS = ('.xlsx', '.csv')
+
+
+def expand_sources(sources):
+    """
+    Expand directories and glob patterns into a sorted list of workbook paths.
+
+    Directories are searched recursively for .xlsx and .csv files; Excel
+    lock files ('~$...') are skipped.
+    """
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            matches = glob.glob(os.path.join(source, '**', '*'), recursive=True)
+        else:
+            matches = glob.glob(source, recursive=True)
+        for path in matches:
+            name = os.path.basename(path)
+            if os.path.isfile(path) and name.lower().endswith(WORKBOOK_EXTENSIONS) and not name.startswith('~$'):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def plan_tasks(paths):
+    """List one (path, sheet index, sheet name) task per sheet, in a fixed order."""
+    tasks = []
+    for path in paths:
+        for index, name in enumerate(list_sheets(path)):
+            tasks.append((path, index, name))
+    return tasks
+
+
+def _ingest_sheet(task):
+    """Worker: load one sheet (through the parse cache) as a list of record tuples."""
+    path, index, name = task
+    sheet = None if name is None else index
+    header, columns = load_reseller_table(path, sheet)
+    return list(zip(*(columns[column] for column in [COMPANY_COLUMN] + EMAIL_COLUMNS)))
+
+
+def merge_results(tasks, results, memory_budget_mb=64):
+    """
+    Merge per-sheet records into one table, dropping repeated addresses.
+
+    Records are visited in task order, so the first occurrence of an
+    address wins regardless of which worker produced it. Addresses are
+    compared after gem_dedup normalization. A row whose email cells were
+    all duplicates is dropped. Returns (rows, stats) where each
+    row is (company, email1, email2, email3, source).
+    """
+    deduplicator = Deduplicator(memory_budget_mb)
+    merged = []
+    stats = []
+    for (path, index, name), records in zip(tasks, results):
+        source = path if name is None else f"{path}:{name}"
+        for company, *emails in records:
+            # Only address-like cells take part; phone numbers etc. pass through
+            cleaned = [
+                email if '@' not in email or deduplicator.add(email, source) else ''
+                for email in emails
+            ]
+            if any(cleaned) or not any(emails):
+                merged.append((company, *cleaned, source))
+        duplicates = deduplicator.stats.get(source, {}).get('duplicates', 0)
+        stats.append({'source': source, 'rows': len(records), 'duplicates': duplicates})
+    return merged, stats
+
+
+def ingest(sources, workers=None, memory_budget_mb=64):
+    """
+    Ingest every sheet of every workbook matched by `sources` in parallel.
+
+    Sheets are parsed in a process pool (one task per sheet) and merged in
+    a deterministic order, so the result does not depend on `workers`.
+    Returns (rows, stats) as produced by merge_results.
+    """
+    tasks = plan_tasks(expand_sources(sources))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        results = [_ingest_sheet(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            # map() yields results in task order, whatever order they finish in
+            results = list(pool.map(_ingest_sheet, tasks))
+
+    return merge_results(tasks, results, memory_budget_mb)
+
+
+def write_merged_csv(rows, output_path):
+    """Write the merged table as a CSV the batch builder can read."""
+    tmp_path = f"{output_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([COMPANY_COLUMN] + EMAIL_COLUMNS + [SOURCE_COLUMN])
+        writer.writerows(rows)
+    os.replace(tmp_path, output_path)
+
+
+def ingest_to_csv(sources, output_path, workers=None, memory_budget_mb=64, metrics=None):
+    """Ingest `sources` and write the merged CSV, timing both stages with `metrics`."""
+    metrics = metrics or PipelineMetrics('gem_ingest')
+    try:
+        with metrics.stage('ingest') as stage:
+            rows, stats = ingest(sources, workers, memory_budget_mb)
+            stage['rows'] = sum(entry['rows'] for entry in stats)
+        for entry in stats:
+            print(f"  {entry['source']}: {entry['rows']} rows, {entry['duplicates']} duplicate addresses")
+        with metrics.stage('emit', rows=len(rows)):
+            write_merged_csv(rows, output_path)
+        print(f"Merged {len(stats)} sheets into {len(rows)} rows in {output_path}")
+    except Exception as e:
+        print(f"Error ingesting workbooks: {e}")
+        raise
+    finally:
+        metrics.write()
+    return rows, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge GeM reseller workbooks into one recipient table")
+    parser.add_argument('sources', nargs='+', help="Workbook files, directories or glob patterns")
+    parser.add_argument('--output', default='gem_resellers_merged.csv', help="Merged CSV to write")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--dedup-memory-mb', type=int, default=64, help="Memory budget of the address index")
+    parser.add_argument('--metrics', help="Write per-stage metrics to this file (.json, or .jsonl to append)")
+    args = parser.parse_args()
+
+    ingest_to_csv(args.sources, args.output, args.workers, args.dedup_memory_mb,
+                  PipelineMetrics('gem_ingest', args.metrics))
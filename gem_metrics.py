@@ -0,0 +1,123 @@
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+# Environment variables that switch instrumentation on without changing a command line
+METRICS_ENV = 'GEM_METRICS'                # file to write the metrics to
+METRICS_FORMAT_ENV = 'GEM_METRICS_FORMAT'  # 'json' or 'jsonl' (default: from the file extension)
+PROFILE_STAGE_ENV = 'GEM_PROFILE_STAGE'    # stage to run under cProfile
+PROFILE_OUT_ENV = 'GEM_PROFILE_OUT'        # where to dump its profile (default: <stage>.prof)
+
+# name -> callable returning (hits, misses) so far; filled in by the caching modules
+_cache_stats = {}
+
+
+def register_cache_stats(name, snapshot):
+    """Report a cache's cumulative (hits, misses) in the metrics of every stage."""
+    _cache_stats[name] = snapshot
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _cache_snapshot():
+    return {name: snapshot() for name, snapshot in _cache_stats.items()}
+
+
+class PipelineMetrics:
+    """
+    Wall time, throughput, peak RSS and cache hit rates per pipeline stage.
+
+    Wrap each stage in `with metrics.stage('classify', rows=n) as record:`;
+    the record can be updated inside the block (rows, extra 'caches'
+    entries next to the ones registered with register_cache_stats).
+    A stage that raises is recorded with its error before the exception
+    propagates. write() stores the run as one JSON document or appends
+    one JSON line per stage.
+
+    Without explicit arguments the output file, format and profiled stage
+    come from GEM_METRICS, GEM_METRICS_FORMAT, GEM_PROFILE_STAGE and
+    GEM_PROFILE_OUT; with none of them set nothing is written.
+    """
+
+    def __init__(self, run, path=None, fmt=None, profile_stage=None, profile_out=None):
+        self.run = run
+        self.path = path or os.environ.get(METRICS_ENV)
+        fmt = fmt or os.environ.get(METRICS_FORMAT_ENV)
+        self.format = fmt or ('jsonl' if self.path and self.path.endswith('.jsonl') else 'json')
+        self.profile_stage = profile_stage or os.environ.get(PROFILE_STAGE_ENV)
+        self.profile_out = profile_out or os.environ.get(PROFILE_OUT_ENV)
+        self.stages = []
+        self.started_at = time.time()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {'stage': name, 'rows': rows}
+        caches_before = _cache_snapshot()
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            seconds = time.perf_counter() - start
+            record['seconds'] = round(seconds, 4)
+            if record['rows'] is not None and seconds > 0:
+                record['rows_per_second'] = round(record['rows'] / seconds)
+            record['peak_rss_mb'] = round(peak_rss_mb(), 1)
+
+            caches = {}
+            for cache, (hits, misses) in _cache_snapshot().items():
+                before_hits, before_misses = caches_before.get(cache, (0, 0))
+                hits, misses = hits - before_hits, misses - before_misses
+                if hits or misses:
+                    caches[cache] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 4)}
+            if caches:
+                record.setdefault('caches', {}).update(caches)
+
+            if profiler:
+                record['profile'] = self.profile_out or f"{name}.prof"
+                profiler.dump_stats(record['profile'])
+            self.stages.append(record)
+
+    def summary(self):
+        return {
+            'run': self.run,
+            'started_at': self.started_at,
+            'total_seconds': round(sum(record['seconds'] for record in self.stages), 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'stages': self.stages
+        }
+
+    def write(self):
+        """Write the metrics to the configured file (no-op when there is none)."""
+        if not self.path:
+            return None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.format == 'jsonl':
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in self.stages:
+                    f.write(json.dumps(dict(record, run=self.run, started_at=self.started_at)) + '\n')
+        else:
+            tmp_path = f"{self.path}.tmp{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(), f, indent=2)
+            os.replace(tmp_path, self.path)
+        return self.path
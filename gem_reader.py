@@ -0,0 +1,232 @@
+import csv
+import os
+import posixpath
+import zipfile
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+
+DEFAULT_WORKBOOK = 'GeM_Resellers.xlsx'
+
+# Bump whenever parsing or normalization changes so cached tables are rebuilt
+PARSER_VERSION = 1
+
+COMPANY_COLUMN = 'Name of Company'
+EMAIL_COLUMNS = ['Email 1', 'Email 2', 'Email 3']
+
+# Normalized reseller row: company name plus up to three email cells
+ResellerRecord = namedtuple('ResellerRecord', ['company', 'email1', 'email2', 'email3'])
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _column_index(cell_ref):
+    """Convert the letters of a cell reference like 'AB12' to a 0-based column index."""
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _text_of(elem):
+    """Join the <t> runs of a shared or inline string, skipping phonetic hints."""
+    parts = []
+    for child in elem:
+        if child.tag == _MAIN_NS + 't':
+            parts.append(child.text or '')
+        elif child.tag == _MAIN_NS + 'r':
+            for run in child:
+                if run.tag == _MAIN_NS + 't':
+                    parts.append(run.text or '')
+    return ''.join(parts)
+
+
+def _load_shared_strings(archive):
+    """
+    Read xl/sharedStrings.xml incrementally.
+
+    Only the decoded strings are kept; each <si> element is cleared as soon
+    as it has been read so the XML tree never materializes.
+    """
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for event, elem in iterparse(f, events=('end',)):
+            if elem.tag == _MAIN_NS + 'si':
+                strings.append(_text_of(elem))
+                elem.clear()
+    return strings
+
+
+def _sheet_targets(archive):
+    """Return a list of (sheet name, zip member path) in workbook order."""
+    rels = {}
+    with archive.open('xl/_rels/workbook.xml.rels') as f:
+        for event, elem in iterparse(f, events=('end',)):
+            if elem.tag == _PKG_REL_NS + 'Relationship':
+                target = elem.get('Target', '')
+                if target.startswith('/'):
+                    target = target.lstrip('/')
+                else:
+                    target = posixpath.normpath(posixpath.join('xl', target))
+                rels[elem.get('Id')] = target
+
+    sheets = []
+    with archive.open('xl/workbook.xml') as f:
+        for event, elem in iterparse(f, events=('end',)):
+            if elem.tag == _MAIN_NS + 'sheet':
+                sheets.append((elem.get('name'), rels.get(elem.get(_DOC_REL_NS + 'id'))))
+    return sheets
+
+
+def _resolve_sheet(archive, sheet):
+    """Find the zip member for a sheet given by name, 0-based index or None (first sheet)."""
+    sheets = _sheet_targets(archive)
+    if not sheets:
+        raise ValueError("Workbook contains no sheets")
+
+    if sheet is None:
+        return sheets[0][1]
+    if isinstance(sheet, int):
+        return sheets[sheet][1]
+    for name, target in sheets:
+        if name == sheet:
+            return target
+    raise ValueError(f"Sheet not found: {sheet}")
+
+
+def list_sheets(path):
+    """Return the sheet names of a workbook in order ([None] for a CSV file)."""
+    if os.path.splitext(path)[1].lower() == '.csv':
+        return [None]
+    with zipfile.ZipFile(path) as archive:
+        return [name for name, target in _sheet_targets(archive)]
+
+
+def _cell_value(cell, shared_strings):
+    """Decode a single <c> element to a string ('' for empty cells)."""
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        inline = cell.find(_MAIN_NS + 'is')
+        return _text_of(inline) if inline is not None else ''
+
+    value = cell.find(_MAIN_NS + 'v')
+    if value is None or value.text is None:
+        return ''
+    if cell_type == 's':
+        return shared_strings[int(value.text)]
+    if cell_type == 'b':
+        return 'TRUE' if value.text == '1' else 'FALSE'
+    return value.text
+
+
+def _iter_xlsx_rows(path, sheet=None):
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = _load_shared_strings(archive)
+        member = _resolve_sheet(archive, sheet)
+
+        with archive.open(member) as f:
+            sheet_data = None
+            for event, elem in iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == _MAIN_NS + 'sheetData':
+                        sheet_data = elem
+                    continue
+                if elem.tag != _MAIN_NS + 'row':
+                    continue
+
+                row = []
+                for position, cell in enumerate(elem.iter(_MAIN_NS + 'c')):
+                    ref = cell.get('r')
+                    index = _column_index(ref) if ref else position
+                    if index >= len(row):
+                        row.extend([''] * (index + 1 - len(row)))
+                    row[index] = _cell_value(cell, shared_strings)
+                yield row
+
+                # Drop the finished row so memory stays flat across the sheet
+                elem.clear()
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+def _iter_csv_rows(path):
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f):
+            yield row
+
+
+def iter_sheet_rows(path=DEFAULT_WORKBOOK, sheet=None):
+    """
+    Stream the rows of a reseller workbook as lists of strings.
+
+    The first row yielded is the header. XLSX sheets are parsed
+    incrementally with iterparse; CSV files are read line by line.
+
+    Args:
+        path (str): Path to an .xlsx or .csv file
+        sheet (str|int|None): Sheet name or index, first sheet by default
+    """
+    if os.path.splitext(path)[1].lower() == '.csv':
+        return _iter_csv_rows(path)
+    return _iter_xlsx_rows(path, sheet)
+
+
+def records_from_rows(rows, header=None):
+    """
+    Turn raw sheet rows into ResellerRecord tuples.
+
+    Cells are stripped of surrounding whitespace and blank rows are skipped.
+    If header is None the first row of `rows` is used as the header.
+    """
+    if header is None:
+        header = next(rows, [])
+    header = [str(name).strip() for name in header]
+
+    def position(name):
+        return header.index(name) if name in header else None
+
+    company_index = position(COMPANY_COLUMN)
+    email_indexes = [position(name) for name in EMAIL_COLUMNS]
+
+    def cell(row, index):
+        if index is None or index >= len(row):
+            return ''
+        return row[index].strip()
+
+    for row in rows:
+        if not any(value.strip() for value in row):
+            continue
+        company = cell(row, company_index) if company_index is not None else 'Unknown Company'
+        emails = [cell(row, index) for index in email_indexes]
+        yield ResellerRecord(company, *emails)
+
+
+def iter_reseller_records(path=DEFAULT_WORKBOOK, sheet=None):
+    """
+    Stream normalized (company, email1, email2, email3) records from a workbook.
+
+    This is a generator, so peak memory does not depend on the number of rows.
+    """
+    return records_from_rows(iter_sheet_rows(path, sheet))
+
+
+def read_reseller_frame(path=DEFAULT_WORKBOOK, sheet=None):
+    """
+    Load the normalized reseller records into a pandas DataFrame.
+
+    Columns are named after the workbook headers ('Name of Company',
+    'Email 1', 'Email 2', 'Email 3'). pandas is imported here so the
+    streaming entry points do not pay for it.
+    """
+    import pandas as pd
+
+    return pd.DataFrame.from_records(
+        iter_reseller_records(path, sheet),
+        columns=[COMPANY_COLUMN] + EMAIL_COLUMNS
+    )
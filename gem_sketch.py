@@ -0,0 +1,372 @@
+import base64
+import hashlib
+import json
+import math
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from gem_classify import (
+    COMPANY_TYPE_RULES, DEFAULT_COMPANY_TYPE, DEFAULT_DOMAIN_CATEGORY, DOMAIN_SUFFIX_CATEGORIES,
+    FREE_MAIL_DOMAINS, FREE_MAIL_LABELS, UNKNOWN_DOMAIN_CATEGORY, classify_company_type, domain_categorizer,
+    email_domain
+)
+from gem_dedup import normalize_address
+from gem_ingest import expand_sources, plan_tasks
+from gem_reader import iter_reseller_records
+
+SKETCH_VERSION = 1
+
+# Defaults: about 0.8% distinct-count error, 16 KB per HyperLogLog; domain
+# counts within N/257; category counts within 0.13% of N with 98% confidence
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_HEAVY_HITTERS = 256
+DEFAULT_CMS_WIDTH = 2048
+DEFAULT_CMS_DEPTH = 4
+
+_MASK64 = (1 << 64) - 1
+_SPACES = re.compile(r'\s+')
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _encode(data):
+    return base64.b64encode(bytes(data)).decode('ascii')
+
+
+def _decode(text):
+    return base64.b64decode(text.encode('ascii'))
+
+
+class HyperLogLog:
+    """
+    Distinct count of a stream in 2^precision one-byte registers.
+
+    The relative standard error is 1.04 / sqrt(2^precision): 0.81% at the
+    default precision 14 (16 KB), so 95% of estimates land within 1.6%.
+    Small cardinalities fall back to linear counting and are near exact.
+    Two sketches of the same precision merge into the sketch of the union.
+    """
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, text):
+        h = _hash64(text)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def count(self):
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self._registers))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': _encode(self._registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'])
+        sketch._registers = bytearray(_decode(data['registers']))
+        return sketch
+
+
+class HeavyHitters:
+    """
+    Misra-Gries summary of the most frequent items with `capacity` counters.
+
+    Every item seen more than N / (capacity + 1) times is kept, and a kept
+    count is at most N / (capacity + 1) below the true one (N = items
+    added). Summaries merge by adding counters and subtracting the
+    (capacity + 1)-th largest, which keeps the same bound for the combined
+    stream.
+    """
+
+    def __init__(self, capacity=DEFAULT_HEAVY_HITTERS):
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+
+    def add(self, item, weight=1):
+        self.total += weight
+        counts = self._counts
+        if item in counts:
+            counts[item] += weight
+        elif len(counts) < self.capacity:
+            counts[item] = weight
+        else:
+            # The new item and every counter lose the same amount; each
+            # decrement discards capacity + 1 units, so this is amortized O(1)
+            cut = min(weight, min(counts.values()))
+            for key in list(counts):
+                counts[key] -= cut
+                if counts[key] <= 0:
+                    del counts[key]
+            if weight > cut:
+                counts[item] = weight - cut
+
+    def merge(self, other):
+        self.total += other.total
+        counts = dict(self._counts)
+        for item, count in other._counts.items():
+            counts[item] = counts.get(item, 0) + count
+        if len(counts) > self.capacity:
+            cut = sorted(counts.values(), reverse=True)[self.capacity]
+            counts = {item: count - cut for item, count in counts.items() if count > cut}
+        self._counts = counts
+        return self
+
+    def max_error(self):
+        return self.total // (self.capacity + 1)
+
+    def top(self, k):
+        """The k largest counters as (item, lower bound) pairs."""
+        return sorted(self._counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'total': self.total, 'counts': self._counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        sketch._counts = dict(data['counts'])
+        return sketch
+
+
+class CountMinSketch:
+    """
+    Approximate frequencies in a depth x width table of counters.
+
+    An estimate never undercounts and overcounts by at most e / width * N
+    with probability 1 - e^-depth: 0.13% of N with 98% confidence at the
+    defaults (64 KB). Sketches of the same shape merge by adding tables.
+    """
+
+    def __init__(self, width=DEFAULT_CMS_WIDTH, depth=DEFAULT_CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._table = array('Q', bytes(8 * width * depth))
+        # Category keys repeat constantly; remember where each one lands
+        self._cells = lru_cache(maxsize=4096)(self._hash_cells)
+
+    def _hash_cells(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing: row i uses a + i * b
+        return tuple(row * self.width + ((a + row * b) & _MASK64) % self.width for row in range(self.depth))
+
+    def add(self, item, weight=1):
+        self.total += weight
+        for cell in self._cells(item):
+            self._table[cell] += weight
+
+    def estimate(self, item):
+        return min(self._table[cell] for cell in self._cells(item))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches of different shape")
+        self.total += other.total
+        self._table = array('Q', map(sum, zip(self._table, other._table)))
+        return self
+
+    def max_error(self):
+        return math.ceil(math.e / self.width * self.total)
+
+    def confidence(self):
+        return 1 - math.exp(-self.depth)
+
+    def to_dict(self):
+        return {'width': self.width, 'depth': self.depth, 'total': self.total, 'table': _encode(self._table.tobytes())}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['width'], data['depth'])
+        sketch.total = data['total']
+        sketch._table = array('Q')
+        sketch._table.frombytes(_decode(data['table']))
+        return sketch
+
+
+# Labels the category sketch is queried for
+LEGAL_FORMS = [label for label, keywords in COMPANY_TYPE_RULES] + [DEFAULT_COMPANY_TYPE]
+DOMAIN_CATEGORIES = sorted(
+    set(FREE_MAIL_DOMAINS.values()) | set(FREE_MAIL_LABELS.values()) | set(DOMAIN_SUFFIX_CATEGORIES.values())
+    | {"Government", DEFAULT_DOMAIN_CATEGORY, UNKNOWN_DOMAIN_CATEGORY}
+)
+
+
+def company_key(company_name):
+    """Case- and whitespace-insensitive key of a company name."""
+    return _SPACES.sub(' ', company_name).strip().lower()
+
+
+class ResellerSketch:
+    """
+    Constant-memory summary of any number of reseller rows.
+
+    Distinct companies, domains and addresses are HyperLogLog estimates,
+    the top domains come from a Misra-Gries summary and legal forms and
+    domain categories from a count-min sketch. Addresses are counted after
+    gem_dedup normalization and companies after company_key. Sketches built
+    on different files or workers merge into the sketch of all their rows.
+    """
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION, heavy_hitters=DEFAULT_HEAVY_HITTERS,
+                 cms_width=DEFAULT_CMS_WIDTH, cms_depth=DEFAULT_CMS_DEPTH):
+        self.rows = 0
+        self.addresses = 0
+        self.companies = HyperLogLog(precision)
+        self.distinct_domains = HyperLogLog(precision)
+        self.distinct_addresses = HyperLogLog(precision)
+        self.domains = HeavyHitters(heavy_hitters)
+        self.categories = CountMinSketch(cms_width, cms_depth)
+
+    def add_record(self, company_name, emails):
+        self.rows += 1
+        if company_name:
+            self.companies.add(company_key(company_name))
+        self.categories.add(f"legal_form:{classify_company_type(company_name)}")
+        for email in emails:
+            domain = email_domain(email)
+            if not domain:
+                continue
+            self.addresses += 1
+            self.distinct_addresses.add(normalize_address(email))
+            self.distinct_domains.add(domain)
+            self.domains.add(domain)
+            self.categories.add(f"domain_category:{domain_categorizer.lookup(domain)}")
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.addresses += other.addresses
+        self.companies.merge(other.companies)
+        self.distinct_domains.merge(other.distinct_domains)
+        self.distinct_addresses.merge(other.distinct_addresses)
+        self.domains.merge(other.domains)
+        self.categories.merge(other.categories)
+        return self
+
+    def report(self, top_k=10):
+        """JSON-serializable estimates with the error bound of each sketch."""
+        def category_counts(prefix, labels):
+            counts = {label: self.categories.estimate(f"{prefix}:{label}") for label in labels}
+            return dict(sorted(((label, count) for label, count in counts.items() if count), key=lambda item: -item[1]))
+
+        return {
+            'rows': self.rows,
+            'addresses': self.addresses,
+            'distinct': {
+                'companies': self.companies.count(),
+                'domains': self.distinct_domains.count(),
+                'addresses': self.distinct_addresses.count(),
+                'relative_error': round(self.companies.relative_error(), 4)
+            },
+            'top_domains': dict(self.domains.top(top_k)),
+            'top_domains_max_undercount': self.domains.max_error(),
+            'legal_forms': category_counts('legal_form', LEGAL_FORMS),
+            'domain_categories': category_counts('domain_category', DOMAIN_CATEGORIES),
+            'category_max_overcount': self.categories.max_error(),
+            'category_confidence': round(self.categories.confidence(), 4)
+        }
+
+    def to_dict(self):
+        return {
+            'version': SKETCH_VERSION,
+            'rows': self.rows,
+            'addresses': self.addresses,
+            'companies': self.companies.to_dict(),
+            'distinct_domains': self.distinct_domains.to_dict(),
+            'distinct_addresses': self.distinct_addresses.to_dict(),
+            'domains': self.domains.to_dict(),
+            'categories': self.categories.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != SKETCH_VERSION:
+            raise ValueError(f"Unsupported sketch version: {data.get('version')}")
+        sketch = cls.__new__(cls)
+        sketch.rows = data['rows']
+        sketch.addresses = data['addresses']
+        sketch.companies = HyperLogLog.from_dict(data['companies'])
+        sketch.distinct_domains = HyperLogLog.from_dict(data['distinct_domains'])
+        sketch.distinct_addresses = HyperLogLog.from_dict(data['distinct_addresses'])
+        sketch.domains = HeavyHitters.from_dict(data['domains'])
+        sketch.categories = CountMinSketch.from_dict(data['categories'])
+        return sketch
+
+
+def _sketch_sheet(task):
+    """Worker: stream one sheet into a fresh sketch, returned in its serialized form."""
+    path, index, name = task
+    sketch = ResellerSketch()
+    for company, *emails in iter_reseller_records(path, None if name is None else index):
+        sketch.add_record(company, emails)
+    return sketch.to_dict()
+
+
+def sketch_sources(sources, workers=None):
+    """
+    Sketch every sheet of every workbook matched by `sources`.
+
+    Sheets are streamed row by row in a process pool (one task per sheet)
+    and their sketches merged, so memory stays constant however many rows
+    the files hold. Returns (sketch, number of sheets).
+    """
+    tasks = plan_tasks(expand_sources(sources))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        sketches = map(_sketch_sheet, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        sketches = pool.map(_sketch_sheet, tasks)
+
+    merged = ResellerSketch()
+    try:
+        for data in sketches:
+            merged.merge(ResellerSketch.from_dict(data))
+    finally:
+        if workers != 1 and len(tasks) > 1:
+            pool.shutdown()
+    return merged, len(tasks)
+
+
+def load_sketch(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return ResellerSketch.from_dict(json.load(f))
+
+
+def save_sketch(sketch, path):
+    """Write a sketch as JSON via a temporary file, for merging elsewhere later."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(sketch.to_dict(), f)
+    os.replace(tmp_path, path)
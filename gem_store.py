@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from gem_dedup import address_key
+
+# The store is kept data, not cache: clearing .gem_cache must not forget
+# who was mailed when
+STORE_PATH = os.environ.get('GEM_STORE', 'gem_recipients.db')
+SCHEMA_VERSION = 2
+
+# Rows per executemany() call in bulk writes
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Page cache per connection; bulk upserts touch every index page
+CACHE_SIZE_KB = 64 * 1024
+
+DAY_SECONDS = 86_400
+
+# Columns a segment can be selected on, in the order the CLI lists them
+SEGMENT_COLUMNS = ('company_type', 'domain_category', 'state', 'district', 'company_id')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipients (
+    key INTEGER PRIMARY KEY,
+    address TEXT NOT NULL,
+    name TEXT,
+    company_id TEXT,
+    company_type TEXT,
+    domain_category TEXT,
+    state TEXT,
+    district TEXT,
+    position INTEGER NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    ingest INTEGER NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    last_contacted INTEGER,
+    contact_count INTEGER NOT NULL DEFAULT 0,
+    suppressed INTEGER NOT NULL DEFAULT 0,
+    deliverability TEXT
+);
+CREATE INDEX IF NOT EXISTS recipients_segment ON recipients (company_type, domain_category, last_contacted, position);
+CREATE INDEX IF NOT EXISTS recipients_state ON recipients (state, district, last_contacted, position);
+CREATE INDEX IF NOT EXISTS recipients_last_contacted ON recipients (last_contacted, position);
+CREATE INDEX IF NOT EXISTS recipients_company ON recipients (company_id);
+
+CREATE TABLE IF NOT EXISTS sends (
+    id INTEGER PRIMARY KEY,
+    key INTEGER NOT NULL,
+    batch_name TEXT,
+    send_id TEXT,
+    sent_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sends_key ON sends (key, sent_at);
+"""
+
+# Columns added by each schema version, for stores created by an older one
+_MIGRATIONS = {
+    2: [
+        'ALTER TABLE recipients ADD COLUMN suppressed INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE recipients ADD COLUMN deliverability TEXT',
+    ],
+}
+
+# Rows with this deliverability (gem_deliverability.UNDELIVERABLE) are never selected by default
+UNDELIVERABLE = 'undeliverable'
+
+# A new row takes its contact history from sends already recorded for the
+# address (sent to before it was ever ingested). Suppression and
+# deliverability left unset (None) by an ingest keep their stored values.
+_UPSERT = """
+INSERT INTO recipients (key, address, name, company_id, company_type, domain_category, state, district,
+                        position, active, ingest, first_seen, last_seen, last_contacted, contact_count,
+                        suppressed, deliverability)
+VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, 1, ?10, ?11, ?12,
+        (SELECT MAX(sent_at) FROM sends WHERE key = ?1),
+        (SELECT COUNT(*) FROM sends WHERE key = ?1),
+        COALESCE(?13, 0), ?14)
+ON CONFLICT (key) DO UPDATE SET
+    address = excluded.address,
+    name = excluded.name,
+    company_id = excluded.company_id,
+    company_type = excluded.company_type,
+    domain_category = excluded.domain_category,
+    state = excluded.state,
+    district = excluded.district,
+    position = excluded.position,
+    active = 1,
+    ingest = excluded.ingest,
+    last_seen = excluded.last_seen,
+    suppressed = COALESCE(?13, suppressed),
+    deliverability = COALESCE(?14, deliverability)
+"""
+
+
+def store_key(address):
+    """gem_dedup.address_key as a signed 64-bit integer, so it fits SQLite's INTEGER PRIMARY KEY."""
+    key = address_key(address)
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class RecipientStore:
+    """
+    SQLite database of every recipient seen and every send made to them.
+
+    Recipients are keyed by gem_dedup.address_key, so normalized variants
+    of an address share one row, and carry the segment fields of the
+    latest ingest plus when they were last contacted. Rows missing from
+    the latest ingest are kept (with their history) but marked inactive.
+    Indexes on company type / domain category, state / district and
+    last-contacted time let select() build a segment, already frequency
+    capped, without reparsing the workbook. Rows flagged as suppressed or
+    on an undeliverable domain at ingest are left out of segments.
+
+    The database runs in WAL mode, so a dispatch can record sends while a
+    segment is being selected.
+    """
+
+    def __init__(self, path=STORE_PATH, check_same_thread=True):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(f"Unsupported recipient store version {version} in {path}")
+        with self.connection:
+            if version:
+                for step in range(version + 1, SCHEMA_VERSION + 1):
+                    for statement in _MIGRATIONS[step]:
+                        self.connection.execute(statement)
+            self.connection.executescript(_SCHEMA)
+            self.connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM recipients WHERE active = 1').fetchone()[0]
+
+    def upsert_recipients(self, recipients, now=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Replace the active recipients with `recipients`, in one transaction.
+
+        Recipients are the dicts built by create_excel_based_batches; they
+        are inserted or updated in chunks of `chunk_size` with executemany,
+        keeping their contact history. Their 'suppressed' and
+        'deliverability' fields, when set, are stored for select() to
+        filter on. Rows not in `recipients` become inactive. Returns
+        (recipients written, recipients deactivated).
+        """
+        now = int(time.time() if now is None else now)
+        ingest = self.connection.execute('SELECT COALESCE(MAX(ingest), 0) + 1 FROM recipients').fetchone()[0]
+        rows = (
+            (store_key(email['address']), email['address'], email.get('name'), email.get('company_id'),
+             email.get('company_type'), email.get('domain_category'), email.get('state'), email.get('district'),
+             position, ingest, now, now,
+             None if email.get('suppressed') is None else int(email['suppressed']), email.get('deliverability'))
+            for position, email in enumerate(recipients)
+        )
+        written = 0
+        with self.connection:
+            for chunk in _chunks(rows, chunk_size):
+                self.connection.executemany(_UPSERT, chunk)
+                written += len(chunk)
+            deactivated = self.connection.execute(
+                'UPDATE recipients SET active = 0 WHERE active = 1 AND ingest < ?', (ingest,)
+            ).rowcount
+        return written, deactivated
+
+    def record_sends(self, addresses, batch_name=None, send_id=None, now=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Log a send to each address and move their last-contacted time forward; returns the count.
+
+        Addresses without a recipient row yet only get the log entry; the
+        row picks up their history when upsert_recipients() first adds it.
+        """
+        now = int(time.time() if now is None else now)
+        recorded = 0
+        with self.connection:
+            for chunk in _chunks((store_key(address) for address in addresses), chunk_size):
+                self.connection.executemany(
+                    'INSERT INTO sends (key, batch_name, send_id, sent_at) VALUES (?, ?, ?, ?)',
+                    [(key, batch_name, send_id, now) for key in chunk]
+                )
+                self.connection.executemany(
+                    'UPDATE recipients SET last_contacted = MAX(COALESCE(last_contacted, 0), ?), '
+                    'contact_count = contact_count + 1 WHERE key = ?',
+                    [(now, key) for key in chunk]
+                )
+                recorded += len(chunk)
+        return recorded
+
+    def recently_contacted(self, addresses, days, now=None):
+        """The subset of `addresses` with a send logged within the last `days` days."""
+        cutoff = int((time.time() if now is None else now) - days * DAY_SECONDS)
+        addresses = list(addresses)
+        keys = {}
+        for address in addresses:
+            keys.setdefault(store_key(address), []).append(address)
+        contacted = set()
+        self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS lookup (key INTEGER PRIMARY KEY)')
+        with self.connection:
+            self.connection.execute('DELETE FROM lookup')
+            self.connection.executemany('INSERT OR IGNORE INTO lookup VALUES (?)', ((key,) for key in keys))
+            for (key,) in self.connection.execute(
+                'SELECT DISTINCT lookup.key FROM lookup JOIN sends ON sends.key = lookup.key '
+                'WHERE sends.sent_at >= ?', (cutoff,)
+            ):
+                contacted.update(keys[key])
+        return contacted
+
+    def select(self, exclude_days=None, limit=None, now=None, include_inactive=False, include_excluded=False,
+               **segment):
+        """
+        Recipients of a segment, never-contacted first, then least recently contacted.
+
+        `segment` filters on SEGMENT_COLUMNS by equality (e.g.
+        company_type='Private Limited', state='Gujarat'). With
+        `exclude_days` anyone contacted within that many days is left out.
+        Suppressed recipients and undeliverable domains are left out unless
+        `include_excluded` is set. Ties keep the order of the latest
+        ingest. Returns a list of dicts.
+        """
+        query, params = self._select_query(exclude_days, limit, now, include_inactive, include_excluded, segment)
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def explain(self, exclude_days=None, limit=None, now=None, include_inactive=False, include_excluded=False,
+                **segment):
+        """SQLite's query plan for select() with the same arguments, one line per step."""
+        query, params = self._select_query(exclude_days, limit, now, include_inactive, include_excluded, segment)
+        return [row['detail'] for row in self.connection.execute('EXPLAIN QUERY PLAN ' + query, params)]
+
+    @staticmethod
+    def _select_query(exclude_days, limit, now, include_inactive, include_excluded, segment):
+        unknown = set(segment) - set(SEGMENT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown segment columns: {sorted(unknown)}")
+        clauses = [f"{column} = ?" for column, value in segment.items() if value is not None]
+        params = [value for value in segment.values() if value is not None]
+        if not include_inactive:
+            clauses.append('active = 1')
+        if not include_excluded:
+            clauses.append("suppressed = 0 AND (deliverability IS NULL OR deliverability != ?)")
+            params.append(UNDELIVERABLE)
+        if exclude_days is not None:
+            clauses.append('(last_contacted IS NULL OR last_contacted < ?)')
+            params.append(int((time.time() if now is None else now) - exclude_days * DAY_SECONDS))
+        query = ('SELECT address, name, company_id, company_type, domain_category, state, district, '
+                 'last_contacted, contact_count FROM recipients')
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY last_contacted, position'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return query, params
+
+    def history(self, address):
+        """Every send recorded for an address, oldest first."""
+        return [dict(row) for row in self.connection.execute(
+            'SELECT batch_name, send_id, sent_at FROM sends WHERE key = ? ORDER BY sent_at, id',
+            (store_key(address),)
+        )]
+
+    def stats(self):
+        """Counts of recipients, contacted recipients and sends."""
+        row = self.connection.execute(
+            'SELECT COUNT(*) AS recipients, SUM(active) AS active, COUNT(last_contacted) AS contacted, '
+            'MAX(last_contacted) AS last_contacted FROM recipients'
+        ).fetchone()
+        stats = dict(row)
+        stats['active'] = stats['active'] or 0
+        stats['sends'] = self.connection.execute('SELECT COUNT(*) FROM sends').fetchone()[0]
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the recipient store and its send history")
+    parser.add_argument('--store', default=STORE_PATH, help="Recipient store database")
+    commands = parser.add_subparsers(dest='command', required=True)
+    select = commands.add_parser('select', help="List a segment, leaving out recently contacted recipients")
+    for column in SEGMENT_COLUMNS:
+        select.add_argument(f"--{column.replace('_', '-')}", dest=column, help=f"Only this {column.replace('_', ' ')}")
+    select.add_argument('--exclude-days', type=int, help="Leave out recipients contacted within this many days")
+    select.add_argument('--limit', type=int, help="At most this many recipients")
+    select.add_argument('--suppression', help="Also leave out addresses on this suppression index (gem_suppression)")
+    select.add_argument('--json', help="Write the segment as a JSON list of {address, name} to this file")
+    select.add_argument('--explain', action='store_true', help="Show the query plan instead")
+    history = commands.add_parser('history', help="Show the sends recorded for addresses")
+    history.add_argument('addresses', nargs='+')
+    commands.add_parser('stats', help="Show the size of the store")
+    args = parser.parse_args()
+
+    with RecipientStore(args.store) as store:
+        if args.command == 'select':
+            segment = {column: getattr(args, column) for column in SEGMENT_COLUMNS if getattr(args, column)}
+            if args.explain:
+                for detail in store.explain(args.exclude_days, args.limit, **segment):
+                    print(f"  {detail}")
+                raise SystemExit(0)
+            started = time.perf_counter()
+            if args.suppression:
+                # Catches addresses suppressed since the last ingest, so the limit applies afterwards
+                from gem_suppression import SuppressionIndex
+
+                recipients = store.select(args.exclude_days, **segment)
+                flags = SuppressionIndex(args.suppression).contains_many(email['address'] for email in recipients)
+                recipients = [email for email, suppressed in zip(recipients, flags) if not suppressed][:args.limit]
+            else:
+                recipients = store.select(args.exclude_days, args.limit, **segment)
+            elapsed = time.perf_counter() - started
+            if args.json:
+                with open(args.json, 'w', encoding='utf-8') as f:
+                    json.dump([{'address': email['address'], 'name': email['name']} for email in recipients], f,
+                              indent=2)
+            else:
+                for email in recipients:
+                    print(f"  {email['address']}\t{email['name']}")
+            print(f"{len(recipients)} recipients selected in {elapsed * 1000:.1f} ms")
+        elif args.command == 'history':
+            for address in args.addresses:
+                sends = store.history(address)
+                print(f"  {address}: {len(sends)} sends")
+                for send in sends:
+                    sent_at = time.strftime('%Y-%m-%d %H:%M', time.localtime(send['sent_at']))
+                    print(f"    {sent_at}  {send['batch_name'] or '-'}  {send['send_id'] or ''}")
+        else:
+            stats = store.stats()
+            print(f"{stats['active']} active recipients ({stats['recipients']} ever seen), "
+                  f"{stats['contacted']} contacted, {stats['sends']} sends recorded")
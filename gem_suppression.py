@@ -0,0 +1,353 @@
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import struct
+from bisect import bisect_left
+
+from gem_dedup import address_key
+
+# Suppression lists are kept data, not cache: clearing .gem_cache must not
+# bring back unsubscribed addresses
+SUPPRESSION_DIR = os.environ.get('GEM_SUPPRESSION_DIR', 'gem_suppression')
+INDEX_VERSION = 1
+
+_INDEX_MAGIC = b'GEMSUP1\n'
+_BLOOM_MAGIC = b'GEMBLM1\n'
+_HEADER = struct.Struct('=8sQ')  # magic, entry count / bit count
+_BLOOM_HEADER = struct.Struct('=8sQQ')  # magic, bit count, hash count
+
+# Bloom filter sizing: about 1% false positives
+BLOOM_BITS_PER_ENTRY = 10
+BLOOM_HASHES = 7
+
+# Appended keys are merged into the sorted array once there are this many
+DEFAULT_COMPACT_THRESHOLD = 100_000
+
+_MASK64 = (1 << 64) - 1
+
+
+def read_address_file(path):
+    """
+    Yield the addresses listed in a file.
+
+    A CSV whose header has an 'email' / 'address' column is read from that
+    column; anything else is read one address per line (first CSV field).
+    Lines without '@' are skipped.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = csv.reader(f)
+        header = next(rows, [])
+        names = [name.strip().lower() for name in header]
+        column = next((i for i, name in enumerate(names) if name in ('email', 'address', 'email address')), None)
+        if column is None:
+            column = 0
+            rows = [header] + list(rows) if header else rows
+        for row in rows:
+            if len(row) > column and '@' in row[column]:
+                yield row[column].strip()
+
+
+def _bloom_positions(key, bits, hashes):
+    h1 = key & 0xFFFFFFFF
+    h2 = (key >> 32) | 1
+    return [((h1 + i * h2) & _MASK64) & (bits - 1) for i in range(hashes)]
+
+
+class SuppressionIndex:
+    """
+    On-disk set of suppressed addresses (unsubscribed, bounced, complained).
+
+    Addresses are stored as 64-bit gem_dedup.address_key hashes, so
+    normalized variants of an address match. The directory holds:
+
+      index.bin  sorted keys, memory-mapped and binary-searched
+      bloom.bin  Bloom filter over index.bin (~1% false positives), checked
+                 first so most clean addresses never touch the array
+      delta.bin  keys appended since the last compaction, held in a set
+
+    Opening an index maps the files instead of loading them, so a list with
+    millions of entries costs only the delta in memory. append() adds keys
+    durably and compacts once the delta grows past `compact_threshold`.
+
+    Suppression fails closed: opening a directory that is not an index (a
+    mistyped path, or one whose files went missing) raises
+    FileNotFoundError rather than suppressing nothing. Pass create=True to
+    start a new, empty index.
+    """
+
+    def __init__(self, path=SUPPRESSION_DIR, compact_threshold=DEFAULT_COMPACT_THRESHOLD, create=False):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._maps = []
+        self._keys = ()
+        self._bloom = None
+        self._bloom_bits = 0
+        self._bloom_hashes = 0
+        self.delta = set()
+        self.generation = 0
+
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            if not create:
+                raise FileNotFoundError(f"No suppression index at {path} (missing meta.json)")
+            self._open()
+            return
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported suppression index version in {path}; rebuild it")
+        self.generation = meta['generation']
+        self._open()
+        if not create and len(self) < meta.get('entries', 0):
+            raise FileNotFoundError(f"Suppression index {path} holds {len(self)} of its {meta['entries']} "
+                                    f"addresses; index.bin or delta.bin is missing")
+
+    def _map(self, name):
+        file_path = os.path.join(self.path, name)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return None
+        with open(file_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def _open(self):
+        index = self._map('index.bin')
+        if index is not None:
+            magic, count = _HEADER.unpack_from(index)
+            if magic != _INDEX_MAGIC:
+                raise ValueError(f"{self.path}/index.bin is not a suppression index")
+            self._keys = memoryview(index)[_HEADER.size:_HEADER.size + 8 * count].cast('Q')
+
+        bloom = self._map('bloom.bin')
+        if bloom is not None:
+            magic, self._bloom_bits, self._bloom_hashes = _BLOOM_HEADER.unpack_from(bloom)
+            self._bloom = memoryview(bloom)[_BLOOM_HEADER.size:]
+
+        delta_path = os.path.join(self.path, 'delta.bin')
+        if os.path.exists(delta_path):
+            with open(delta_path, 'rb') as f:
+                data = f.read()
+            # A torn final write leaves a partial key; ignore it
+            data = data[:len(data) - len(data) % 8]
+            self.delta = set(memoryview(data).cast('Q'))
+
+    def close(self):
+        self._keys = ()
+        self._bloom = None
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def __len__(self):
+        return len(self._keys) + len(self.delta)
+
+    def fingerprint(self):
+        """Changes whenever the set of suppressed addresses may have changed."""
+        return f"{self.generation}:{len(self._keys)}:{len(self.delta)}"
+
+    def _contains_key(self, key):
+        if key in self.delta:
+            return True
+        if not self._keys:
+            return False
+        if self._bloom is not None:
+            for position in _bloom_positions(key, self._bloom_bits, self._bloom_hashes):
+                if not self._bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+        i = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def __contains__(self, address):
+        return self._contains_key(address_key(address))
+
+    def contains_many(self, addresses):
+        """
+        Suppression flags for a whole column of addresses, as a list of bools.
+
+        Keys are hashed once, run through the Bloom filter and then binary
+        searched together with numpy, without a Python loop per lookup.
+        """
+        import numpy as np
+
+        keys = np.fromiter((address_key(address) for address in addresses), dtype=np.uint64)
+        hits = np.zeros(len(keys), dtype=bool)
+        if len(self._keys) and len(keys):
+            sorted_keys = np.frombuffer(self._keys, dtype=np.uint64)
+            candidates = np.ones(len(keys), dtype=bool)
+            if self._bloom is not None:
+                bits = np.frombuffer(self._bloom, dtype=np.uint8)
+                h1 = keys & np.uint64(0xFFFFFFFF)
+                h2 = (keys >> np.uint64(32)) | np.uint64(1)
+                for i in range(self._bloom_hashes):
+                    position = (h1 + np.uint64(i) * h2) & np.uint64(self._bloom_bits - 1)
+                    candidates &= (bits[position >> np.uint64(3)] >> (position & np.uint64(7)).astype(np.uint8)) & 1 == 1
+            at = np.searchsorted(sorted_keys, keys[candidates])
+            found = at < len(sorted_keys)
+            found[found] = sorted_keys[at[found]] == keys[candidates][found]
+            hits[candidates] = found
+        if self.delta:
+            hits |= np.isin(keys, np.fromiter(self.delta, dtype=np.uint64, count=len(self.delta)))
+        return hits.tolist()
+
+    def _append_keys(self, keys):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, 'delta.bin'), 'ab') as f:
+            f.write(struct.pack(f'={len(keys)}Q', *keys))
+            f.flush()
+            os.fsync(f.fileno())
+        self.delta.update(keys)
+        self._write_meta()
+        if len(self.delta) > self.compact_threshold:
+            self.compact()
+
+    def append(self, addresses, chunk_size=10_000):
+        """
+        Add addresses durably; return how many were new.
+
+        Keys go to delta.bin (flushed and fsynced) in chunks before the call
+        returns; the sorted array and Bloom filter are rebuilt whenever the
+        delta exceeds compact_threshold.
+        """
+        added = 0
+        pending = []
+        seen = set()
+        for address in addresses:
+            key = address_key(address)
+            if key not in seen and not self._contains_key(key):
+                seen.add(key)
+                pending.append(key)
+                if len(pending) >= chunk_size:
+                    self._append_keys(pending)
+                    added += len(pending)
+                    pending = []
+                    seen = set()
+        if pending:
+            self._append_keys(pending)
+            added += len(pending)
+        return added
+
+    def _write_meta(self):
+        tmp_path = os.path.join(self.path, f"meta.json.tmp{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'generation': self.generation, 'entries': len(self)}, f)
+        os.replace(tmp_path, os.path.join(self.path, 'meta.json'))
+
+    def compact(self):
+        """Merge the delta into the sorted array and rebuild the Bloom filter."""
+        import numpy as np
+
+        self._write_index(np.union1d(
+            np.frombuffer(self._keys, dtype=np.uint64) if len(self._keys) else np.empty(0, dtype=np.uint64),
+            np.fromiter(self.delta, dtype=np.uint64, count=len(self.delta))
+        ))
+
+    def _write_index(self, merged):
+        """Replace index.bin and bloom.bin with the sorted unique keys `merged` and empty the delta."""
+        import numpy as np
+
+        bits = 1 << max(6, math.ceil(math.log2(max(1, len(merged)) * BLOOM_BITS_PER_ENTRY)))
+        bloom = np.zeros(bits // 8, dtype=np.uint8)
+        h1 = merged & np.uint64(0xFFFFFFFF)
+        h2 = (merged >> np.uint64(32)) | np.uint64(1)
+        for i in range(BLOOM_HASHES):
+            position = (h1 + np.uint64(i) * h2) & np.uint64(bits - 1)
+            np.bitwise_or.at(bloom, position >> np.uint64(3), np.uint8(1) << (position & np.uint64(7)).astype(np.uint8))
+
+        os.makedirs(self.path, exist_ok=True)
+        self.close()
+        for name, header, payload in (
+            ('index.bin', _HEADER.pack(_INDEX_MAGIC, len(merged)), merged),
+            ('bloom.bin', _BLOOM_HEADER.pack(_BLOOM_MAGIC, bits, BLOOM_HASHES), bloom),
+        ):
+            tmp_path = os.path.join(self.path, f"{name}.tmp{os.getpid()}")
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(payload.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, os.path.join(self.path, name))
+        # The delta is only dropped once the merged array is in place
+        open(os.path.join(self.path, 'delta.bin'), 'wb').close()
+        self.delta = set()
+        self._open()
+        self.generation += 1
+        self._write_meta()
+
+
+def build_index(addresses, path=SUPPRESSION_DIR):
+    """Create (or replace) an index holding exactly `addresses`, sorted in one pass."""
+    import numpy as np
+
+    keys = np.unique(np.fromiter((address_key(address) for address in addresses), dtype=np.uint64))
+    index = SuppressionIndex(path, create=True)
+    index.generation += 1
+    index._write_index(keys)
+    return index
+
+
+def filter_batches(index, batches, email_batch=None):
+    """
+    Remove suppressed recipients from planned batches, in place.
+
+    Every recipient of every batch (and of `email_batch`) is checked in one
+    bulk lookup. Each batch's recipients and recipient_count are updated.
+    Returns ({batch_name: recipients lost}, recipients lost from email_batch).
+    """
+    lists = [batch['recipients'] for batch in batches] + [email_batch or []]
+    flags = iter(index.contains_many(
+        recipient['address'] for recipients in lists for recipient in recipients
+    ))
+    kept_lists = [[recipient for recipient in recipients if not next(flags)] for recipients in lists]
+
+    lost = {}
+    for batch, kept in zip(batches, kept_lists):
+        lost[batch['batch_name']] = batch['recipient_count'] - len(kept)
+        batch['recipients'] = kept
+        batch['recipient_count'] = len(kept)
+    email_lost = len(lists[-1]) - len(kept_lists[-1])
+    if email_batch is not None:
+        email_batch[:] = kept_lists[-1]
+    return lost, email_lost
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the suppression list (unsubscribes, bounces, complaints)")
+    parser.add_argument('--index', default=SUPPRESSION_DIR, help="Suppression index directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Replace the index with the addresses in these files")
+    build.add_argument('files', nargs='+', help="Address lists (one per line, or CSV with an email column)")
+    add = commands.add_parser('add', help="Append the addresses in these files")
+    add.add_argument('files', nargs='+', help="Address lists (one per line, or CSV with an email column)")
+    check = commands.add_parser('check', help="Report whether addresses are suppressed")
+    check.add_argument('addresses', nargs='+')
+    commands.add_parser('compact', help="Merge appended addresses into the sorted index")
+    commands.add_parser('stats', help="Show the size of the index")
+    args = parser.parse_args()
+
+    def addresses():
+        for file_path in args.files:
+            yield from read_address_file(file_path)
+
+    if args.command == 'build':
+        index = build_index(addresses(), args.index)
+        print(f"Suppression index {args.index} built with {len(index)} addresses")
+    elif args.command == 'add':
+        index = SuppressionIndex(args.index, create=True)
+        added = index.append(addresses())
+        print(f"Added {added} new addresses; {len(index)} suppressed in total")
+    elif args.command == 'check':
+        index = SuppressionIndex(args.index)
+        for address, suppressed in zip(args.addresses, index.contains_many(args.addresses)):
+            print(f"  {address}: {'suppressed' if suppressed else 'not suppressed'}")
+    elif args.command == 'compact':
+        index = SuppressionIndex(args.index)
+        index.compact()
+        print(f"Compacted {args.index}: {len(index)} addresses")
+    else:
+        index = SuppressionIndex(args.index)
+        print(f"{len(index)} suppressed addresses ({len(index.delta)} not yet compacted), "
+              f"generation {index.generation}")
@@ -0,0 +1,226 @@
+import argparse
+import csv
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+from gem_reader import COMPANY_COLUMN, EMAIL_COLUMNS
+
+# Distributions measured on the bundled GeM_Resellers.xlsx (807 rows)
+
+# Legal form of the company name, by classify_company_type label
+LEGAL_FORM_WEIGHTS = [
+    ("Other", 43),
+    ("Private Limited", 26),
+    ("Enterprise", 14),
+    ("Limited", 7.5),
+    ("Industry", 5.3),
+    ("Corporation", 2.7),
+    ("LLP", 1.6),
+]
+
+# Spellings seen for each legal form; "Other" names carry no legal form keyword
+LEGAL_FORM_SUFFIXES = {
+    "Other": ["TRADERS", "SOLUTIONS", "& CO", "AGENCIES", "SUPPLIERS", "MARKETING", ""],
+    "Private Limited": ["PRIVATE LIMITED", "Private Limited", "PRIVATE LIMITED."],
+    "Enterprise": ["ENTERPRISES", "Enterprises", "ENTERPRISE"],
+    "Limited": ["LIMITED", "LTD", "Ltd."],
+    "Industry": ["INDUSTRIES", "Industries", "INDUSTRY"],
+    "Corporation": ["CORPORATION", "Corporation", "CORP"],
+    "LLP": ["LLP"],
+}
+
+NAME_WORDS = [
+    "SHREE", "SAI", "GANESH", "BHARAT", "OM", "NEW", "ROYAL", "GLOBAL", "SUN", "STAR",
+    "KRISHNA", "JAI", "MAA", "VISION", "ALPHA", "PRIME", "UNITED", "AMBIKA", "BALAJI", "LAXMI",
+]
+TRADE_WORDS = [
+    "TECH", "TRADING", "SYSTEMS", "SUPPLY", "SALES", "MEDICAL", "ELECTRICALS", "INFOTECH",
+    "PRODUCTS", "ENGINEERING", "PHARMA", "FURNISHERS", "IMPEX", "STATIONERS", "POWER",
+]
+
+# Kind of mail domain of an address, by classify_domain label
+DOMAIN_KIND_WEIGHTS = [
+    ("Business Email", 77.6),
+    ("Gmail", 15.5),
+    ("Yahoo", 3.8),
+    ("Other Personal Email", 2.7),
+    ("Government", 0.3),
+    ("Education", 0.1),
+]
+DOMAIN_KIND_HOSTS = {
+    "Gmail": ["gmail.com"],
+    "Yahoo": ["yahoo.com", "yahoo.co.in", "ymail.com"],
+    "Other Personal Email": ["rediffmail.com", "hotmail.com", "outlook.com"],
+    "Government": ["nic.in", "gov.in"],
+    "Education": ["ac.in", "edu.in"],
+}
+BUSINESS_TLDS = [".com", ".in", ".co.in", ".net"]
+
+# Share of rows with an Email 2 / Email 3 cell (Email 1 is always filled)
+EMAIL2_RATE = 0.25
+EMAIL3_RATE = 0.07
+
+# Share of addresses that repeat an earlier one, possibly in other case or padding
+DUPLICATE_RATE = 0.094
+# Share of company / email cells with leading or trailing whitespace
+COMPANY_PADDING_RATE = 0.41
+EMAIL_PADDING_RATE = 0.017
+# Share of addresses with upper-case letters
+MIXED_CASE_RATE = 0.034
+
+# Earlier addresses kept as duplicate candidates (bounds memory for millions of rows)
+_DUPLICATE_POOL_SIZE = 4096
+
+
+def _weighted(rng, weights):
+    labels = [label for label, weight in weights]
+    cumulative = []
+    total = 0
+    for label, weight in weights:
+        total += weight
+        cumulative.append(total)
+    return lambda: rng.choices(labels, cum_weights=cumulative)[0]
+
+
+def _pad(rng, text, rate):
+    if rng.random() >= rate:
+        return text
+    return rng.choice([" ", "  ", "\t"]) + text if rng.random() < 0.5 else text + rng.choice([" ", "  "])
+
+
+def iter_synthetic_rows(rows, seed=0):
+    """
+    Yield `rows` synthetic reseller rows as [company, email 1, email 2, email 3].
+
+    Legal forms, domain kinds, filled email columns, whitespace padding,
+    mixed case and repeated addresses follow the rates above. The same
+    seed always yields the same rows.
+    """
+    rng = random.Random(seed)
+    legal_form = _weighted(rng, LEGAL_FORM_WEIGHTS)
+    domain_kind = _weighted(rng, DOMAIN_KIND_WEIGHTS)
+    pool = []
+
+    def address(slug, serial):
+        if pool and rng.random() < DUPLICATE_RATE:
+            return rng.choice(pool)
+        kind = domain_kind()
+        if kind == "Business Email":
+            local = rng.choice(["info", "sales", "contact", "accounts", slug[:12]])
+            result = f"{local}@{slug}{rng.choice(BUSINESS_TLDS)}"
+        elif kind in ("Government", "Education"):
+            result = f"{slug[:10]}@{slug[:6]}.{rng.choice(DOMAIN_KIND_HOSTS[kind])}"
+        else:
+            result = f"{slug}{serial % 1000}@{rng.choice(DOMAIN_KIND_HOSTS[kind])}"
+        if rng.random() < MIXED_CASE_RATE:
+            result = result.capitalize()
+        if len(pool) < _DUPLICATE_POOL_SIZE:
+            pool.append(result)
+        else:
+            pool[rng.randrange(_DUPLICATE_POOL_SIZE)] = result
+        return result
+
+    for serial in range(rows):
+        first = rng.choice(NAME_WORDS)
+        second = rng.choice(TRADE_WORDS)
+        suffix = rng.choice(LEGAL_FORM_SUFFIXES[legal_form()])
+        company = " ".join(part for part in (first, second, suffix) if part)
+        slug = f"{first}{second}{serial}".lower()
+
+        emails = [address(slug, serial)]
+        emails.append(address(slug, serial + 1) if rng.random() < EMAIL2_RATE else '')
+        emails.append(address(slug, serial + 2) if rng.random() < EMAIL3_RATE else '')
+        yield [_pad(rng, company, COMPANY_PADDING_RATE)] + [
+            _pad(rng, email, EMAIL_PADDING_RATE) if email else '' for email in emails
+        ]
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    """Write a synthetic reseller CSV with the workbook's header."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([COMPANY_COLUMN] + EMAIL_COLUMNS)
+        writer.writerows(iter_synthetic_rows(rows, seed))
+    os.replace(tmp_path, path)
+    return path
+
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""
+
+
+def _xlsx_row(number, values):
+    cells = []
+    for column, value in zip("ABCD", values):
+        if value:
+            cells.append(f'<c r="{column}{number}" t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def write_synthetic_xlsx(path, rows, seed=0):
+    """
+    Write a synthetic reseller workbook, streaming the sheet into the zip.
+
+    Cells are inline strings, so memory use does not grow with `rows`.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            f.write(_xlsx_row(1, [COMPANY_COLUMN] + EMAIL_COLUMNS).encode('utf-8'))
+            chunk = []
+            for number, values in enumerate(iter_synthetic_rows(rows, seed), start=2):
+                chunk.append(_xlsx_row(number, values))
+                if len(chunk) == 10000:
+                    f.write(''.join(chunk).encode('utf-8'))
+                    chunk = []
+            f.write(''.join(chunk).encode('utf-8'))
+            f.write(b'</sheetData></worksheet>')
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_synthetic_workbook(path, rows, seed=0):
+    """Write a synthetic workbook as .xlsx or .csv depending on the extension of `path`."""
+    if path.lower().endswith('.csv'):
+        return write_synthetic_csv(path, rows, seed)
+    return write_synthetic_xlsx(path, rows, seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic GeM reseller workbook or CSV")
+    parser.add_argument('output', help="Output path (.xlsx or .csv)")
+    parser.add_argument('--rows', type=int, default=10000, help="Number of reseller rows")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    write_synthetic_workbook(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} synthetic rows to {args.output}")
@@ -1,7 +1,25 @@
-import pandas as pd
-import json
+import argparse
 import random
 import re
+from collections import Counter
+
+from gem_cache import build_is_current, build_key, iter_cached_records, record_build, workbook_hash
+from gem_dedup import Deduplicator
+from gem_emit import MOCK_DATA_TS, RENDERER_VERSION, sidecar_path, write_mock_data_ts
+from gem_geo import load_gazetteer
+from gem_reader import DEFAULT_WORKBOOK, PARSER_VERSION
+from gem_suppression import SuppressionIndex
+
+# Bump when a change to this script changes its output for the same inputs
+GENERATOR_VERSION = 2
+
+DEFAULT_SEED = 2024
+
+# Number of batches and emails per batch
+GENERATOR_CONFIG = {
+    "batch_count": 5,
+    "batch_size": 100,
+}
 
 # Define GeM categories
 gem_categories = [
@@ -22,23 +40,6 @@ gem_categories = [
     "Industrial Machinery"
 ]
 
-# Define Indian states
-indian_states = [
-    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
-    "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
-    "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya",
-    "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim",
-    "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand",
-    "West Bengal"
-]
-
-# Define districts per state (simplified - just a few districts per state)
-districts_by_state = {}
-for state in indian_states:
-    # Generate 3-5 mock districts per state
-    num_districts = random.randint(3, 5)
-    districts_by_state[state] = [f"{state} District {i+1}" for i in range(num_districts)]
-
 # Define products per category
 products_by_category = {
     "Office Supplies": ["Pens", "Notebooks", "Staplers", "Paper", "Desk Organizers"],
@@ -58,6 +59,16 @@ products_by_category = {
     "Industrial Machinery": ["Lathes", "Milling Machines", "Power Generators", "Industrial Ovens", "Conveyor Systems"]
 }
 
+# MSME dummy emails for testing; only written when there is no MSME section
+# yet, so edits made with update_msme_emails survive regeneration
+MSME_TEST_EMAILS = [
+    {"id": "msme1", "email": "your-email@example.com", "name": "Your Name"},
+    {"id": "msme2", "email": "test@example.com", "name": "Test User"},
+    {"id": "msme3", "email": "msme-test@quickbid.co.in", "name": "MSME Test"},
+    {"id": "msme4", "email": "info@msme-test.com", "name": "MSME Info"},
+    {"id": "msme5", "email": "contact@msme-sample.com", "name": "MSME Contact"},
+]
+
 # Email validation regex pattern
 EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
@@ -76,65 +87,91 @@ def is_valid_email(email):
     # Use regex to validate the email format
     return bool(EMAIL_PATTERN.match(email))
 
-try:
-    # Read the Excel file
-    df = pd.read_excel('GeM_Resellers.xlsx')
+def collect_emails(path=DEFAULT_WORKBOOK, gazetteer=None):
+    """
+    Extract the unique valid email addresses from the workbook (served from the parse cache).
     
-    # Clean up the data
-    # Convert columns to string and replace NaNs with empty strings
-    df = df.astype(object).fillna('')
-    
-    # Extract email addresses from the DataFrame
+    Each address carries the 'state' and 'district' its row names according
+    to `gazetteer` (a gem_geo.Gazetteer, by default the bundled one).
+    """
+    gazetteer = gazetteer or load_gazetteer()
     all_emails = []
-    email_addresses = set()  # To track unique email addresses
+    deduplicator = Deduplicator()  # To track unique (normalized) email addresses
     
-    for index, row in df.iterrows():
-        company_name = row.get('Name of Company', 'Unknown Company')
-        
-        # Process Email 1
-        email1 = row.get('Email 1', '')
-        if is_valid_email(email1) and email1 not in email_addresses:
-            all_emails.append({
-                'address': email1,
-                'name': company_name,
-            })
-            email_addresses.add(email1)
-        
-        # Process Email 2
-        email2 = row.get('Email 2', '')
-        if is_valid_email(email2) and email2 not in email_addresses:
-            all_emails.append({
-                'address': email2,
-                'name': company_name,
-            })
-            email_addresses.add(email2)
-        
-        # Process Email 3
-        email3 = row.get('Email 3', '')
-        if is_valid_email(email3) and email3 not in email_addresses:
-            all_emails.append({
-                'address': email3,
-                'name': company_name,
-            })
-            email_addresses.add(email3)
+    for company_name, email1, email2, email3 in iter_cached_records(path):
+        state, district = gazetteer.tag(company_name, (email1, email2, email3))
+        # Process Email 1, 2 and 3
+        for email in (email1, email2, email3):
+            if is_valid_email(email) and deduplicator.add(email, path):
+                all_emails.append({
+                    'address': email,
+                    'name': company_name,
+                    'state': state,
+                    'district': district,
+                })
     
     print(f"Total unique valid email addresses found: {len(all_emails)}")
+    deduplicator.print_report()
+    return all_emails
+
+def top_geographies(emails, count):
+    """
+    The `count` most common (state, district) pairs among tagged recipients.
     
-    # Select exactly 100 emails for the batch if possible
-    batch_size = min(100, len(all_emails))
-    batch_emails = random.sample(all_emails, batch_size)
+    Pairs with a district come first, then states named without one
+    (district ''); ties keep first-seen order.
+    """
+    places = Counter((email['state'], email['district'] or '') for email in emails if email['state'])
+    ranked = sorted(places.items(), key=lambda item: (not item[0][1], -item[1]))
+    return [place for place, _ in ranked[:count]]
+
+def generate_mock_data(path=DEFAULT_WORKBOOK, seed=DEFAULT_SEED, config=None, suppression=None):
+    """
+    Build the mock data dict for gem_emit.write_mock_data_ts.
+    
+    All randomness comes from one random.Random(seed), so the same
+    workbook, seed and config always give the same output. Addresses on
+    the `suppression` index (a gem_suppression directory) are left out
+    before the batch is sampled.
+    
+    States and districts come from the gazetteer, and the batches are
+    labelled with the geographies the workbook's rows name most often;
+    only when there are fewer of those than batches is a gazetteer
+    district drawn for the rest.
+    """
+    config = dict(GENERATOR_CONFIG, **(config or {}))
+    rng = random.Random(seed)
+    gazetteer = load_gazetteer()
+    all_emails = collect_emails(path, gazetteer)
+    
+    if suppression:
+        index = SuppressionIndex(suppression)
+        flags = index.contains_many(email['address'] for email in all_emails)
+        all_emails = [email for email, suppressed in zip(all_emails, flags) if not suppressed]
+        print(f"Suppression list ({len(index)} addresses) removed {sum(flags)} recipients")
+    
+    # Select exactly batch_size emails for the batch if possible
+    batch_size = min(config["batch_size"], len(all_emails))
+    batch_emails = rng.sample(all_emails, batch_size)
     
     print(f"Created email batch with {len(batch_emails)} emails")
     
+    # Label the batches with the geographies found in the workbook
+    geographies = top_geographies(all_emails, config["batch_count"])
+    known_districts = [
+        (state, district) for state, districts in gazetteer.districts_by_state.items() for district in districts
+    ]
+    while len(geographies) < config["batch_count"]:
+        geographies.append(rng.choice(known_districts))
+    print("Batch geographies: " + ", ".join(f"{state} / {district or '-'}" for state, district in geographies))
+    
     # Create batches by state, category, and district
     batches = []
     
-    # Create 5 batches, each with all 100 emails
-    for i in range(5):
+    # Create batch_count batches, each with all the batch emails
+    for i, (state, district) in enumerate(geographies):
         batch_name = f"Batch {i+1}"
-        state = random.choice(indian_states)
-        category = random.choice(gem_categories)
-        district = random.choice(districts_by_state[state])
+        category = rng.choice(gem_categories)
         products = products_by_category[category]
         
         # Assign ALL emails to each batch - don't divide them
@@ -144,49 +181,67 @@ try:
             "category": category,
             "district": district,
             "products": products,
-            "recipients": batch_emails,  # All 100 emails in each batch
+            "recipients": batch_emails,  # All emails in each batch
             "recipient_count": len(batch_emails)
         }
         batches.append(batch_data)
     
-    # Create JavaScript file with the mock data for use in the application
-    js_content = """// Mock GeM data generated for the application
-export const GEM_STATES = {0};
-
-export const GEM_CATEGORIES = {1};
-
-export const GEM_DISTRICTS_BY_STATE = {2};
+    return {
+        "states": gazetteer.states,
+        "categories": gem_categories,
+        "districts_by_state": gazetteer.districts_by_state,
+        "products_by_category": products_by_category,
+        "batches": batches,
+        "email_batch": batch_emails
+    }
 
-export const GEM_PRODUCTS_BY_CATEGORY = {3};
+def mock_data_build_key(path=DEFAULT_WORKBOOK, seed=DEFAULT_SEED, config=None, suppression=None):
+    """
+    Content address of a build: workbook contents, seed, config, gazetteer,
+    suppression list and the parser, generator and renderer versions.
+    """
+    config = dict(GENERATOR_CONFIG, **(config or {}))
+    reference = [gem_categories, products_by_category]
+    inputs = [workbook_hash(path), PARSER_VERSION, GENERATOR_VERSION, RENDERER_VERSION, seed, config, reference,
+              load_gazetteer().fingerprint]
+    if suppression:
+        inputs.append(SuppressionIndex(suppression).fingerprint())
+    return build_key(*inputs)
 
-export const GEM_BATCHES = {4};
-
-// Email batch for marketing
-export const GEM_EMAIL_BATCH = {5};
+def build_mock_data(path=DEFAULT_WORKBOOK, seed=DEFAULT_SEED, config=None, output=MOCK_DATA_TS, force=False,
+                    suppression=None):
+    """
+    Regenerate the TS module unless its current output already matches the build inputs.
+    
+    Returns True if the files were written, False if the build was skipped.
+    """
+    key = mock_data_build_key(path, seed, config, suppression)
+    # The MSME section module is edited by hand (update_msme_emails), so it is not a build output
+    outputs = [output, sidecar_path(output)]
+    if not force and build_is_current(key, outputs):
+        print(f"{output} is up to date (build {key[:12]}), skipping regeneration")
+        return False
+    
+    data = generate_mock_data(path, seed, config, suppression)
+    
+    # Write the TypeScript module (and its sidecar manifest) for use in the application
+    write_mock_data_ts(data, output, title="Mock GeM data generated for the application",
+                       msme_defaults=MSME_TEST_EMAILS)
+    record_build(key, outputs)
+    
+    print(f"Mock data generated and saved to {output}")
+    print(f"Each batch now contains all {len(data['email_batch'])} emails")
+    return True
 
-// MSME dummy email for testing
-export const MSME_TEST_EMAILS = [
-  {{ "id": "msme1", "email": "your-email@example.com", "name": "Your Name" }},
-  {{ "id": "msme2", "email": "test@example.com", "name": "Test User" }},
-  {{ "id": "msme3", "email": "msme-test@quickbid.co.in", "name": "MSME Test" }},
-  {{ "id": "msme4", "email": "info@msme-test.com", "name": "MSME Info" }},
-  {{ "id": "msme5", "email": "contact@msme-sample.com", "name": "MSME Contact" }}
-];
-""".format(
-        json.dumps(indian_states, indent=2),
-        json.dumps(gem_categories, indent=2),
-        json.dumps(districts_by_state, indent=2),
-        json.dumps(products_by_category, indent=2),
-        json.dumps(batches, indent=2),
-        json.dumps(batch_emails, indent=2)
-    )
-    
-    # Write to a JavaScript file
-    with open('src/app/(dashboard)/email-marketing/gem-mock-data.ts', 'w') as f:
-        f.write(js_content)
-    
-    print(f"Mock data generated and saved to src/app/(dashboard)/email-marketing/gem-mock-data.ts")
-    print(f"Each batch now contains all {len(batch_emails)} emails")
-    
-except Exception as e:
-    print(f"Error generating mock data: {e}") 
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate gem-mock-data.ts from the GeM reseller workbook")
+    parser.add_argument('--workbook', default=DEFAULT_WORKBOOK, help="Workbook (.xlsx) or CSV to read")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Random seed for the generated batches")
+    parser.add_argument('--force', action='store_true', help="Regenerate even if the inputs are unchanged")
+    parser.add_argument('--suppression', help="Suppression index directory (see gem_suppression.py)")
+    args = parser.parse_args()
+    
+    try:
+        build_mock_data(args.workbook, args.seed, force=args.force, suppression=args.suppression)
+    except Exception as e:
+        print(f"Error generating mock data: {e}")
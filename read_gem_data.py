@@ -1,19 +1,24 @@
-import pandas as pd
+from itertools import islice
+
+from gem_reader import DEFAULT_WORKBOOK, iter_sheet_rows
 
 try:
-    # Read the Excel file
-    df = pd.read_excel('GeM_Resellers.xlsx')
+    # Stream the Excel file row by row
+    rows = iter_sheet_rows(DEFAULT_WORKBOOK)
     
     # Print the column headers
     print("Column Headers:")
-    print(df.columns.tolist())
+    print(next(rows, []))
     
     # Print the first 5 rows
     print("\nFirst 5 rows:")
-    print(df.head())
+    first_rows = list(islice(rows, 5))
+    for row in first_rows:
+        print(row)
     
     # Print the total number of rows
-    print(f"\nTotal rows: {len(df)}")
+    total_rows = len(first_rows) + sum(1 for _ in rows)
+    print(f"\nTotal rows: {total_rows}")
     
 except Exception as e:
-    print(f"Error reading Excel file: {e}") 
\ No newline at end of file
+    print(f"Error reading Excel file: {e}")
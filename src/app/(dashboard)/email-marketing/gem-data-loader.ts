@@ -0,0 +1,99 @@
+// Lazy loader for the sharded GeM batch data written by
+// `python create_excel_based_batches.py --emit sharded` into public/gem-data.
+import { Recipient } from '@/services/emailMarketingService';
+import { decodeRecipients, RecipientColumns } from './gem-recipient-codec';
+
+const GEM_DATA_BASE = '/gem-data';
+
+export interface GemBatchEntry {
+  batch_name: string;
+  category: string;
+  type: string;
+  recipient_count: number;
+  segment: Record<string, string>;
+  domain_categories: Record<string, number>;
+  shard: string;
+  bytes: number;
+}
+
+export interface GemBatch {
+  batch_name: string;
+  category: string;
+  type: string;
+  recipients: Recipient[];
+  recipient_count: number;
+}
+
+export interface GemDataManifest {
+  version: number;
+  encoding: 'objects' | 'columnar';
+  states: string[];
+  categories: string[];
+  districts_by_state: Record<string, string[]>;
+  products_by_category: Record<string, string[]>;
+  msme_test_emails: { id: string; email: string; name: string }[];
+  batch_count: number;
+  recipient_count: number;
+  batches: GemBatchEntry[];
+  email_batch: { recipient_count: number; shard: string; bytes: number };
+}
+
+let manifestPromise: Promise<GemDataManifest> | null = null;
+const shardPromises = new Map<string, Promise<unknown>>();
+
+async function fetchJson<T>(path: string): Promise<T> {
+  const response = await fetch(`${GEM_DATA_BASE}/${path}`);
+  if (!response.ok) {
+    throw new Error(`Failed to load ${path}: ${response.status}`);
+  }
+  return response.json();
+}
+
+// Shard names contain a content hash, so a fetched shard never goes stale
+function loadShard<T>(shard: string): Promise<T> {
+  let promise = shardPromises.get(shard);
+  if (!promise) {
+    promise = fetchJson<T>(shard).catch((error) => {
+      shardPromises.delete(shard);
+      throw error;
+    });
+    shardPromises.set(shard, promise);
+  }
+  return promise as Promise<T>;
+}
+
+export function loadGemManifest(): Promise<GemDataManifest> {
+  if (!manifestPromise) {
+    manifestPromise = fetchJson<GemDataManifest>('manifest.json').catch((error) => {
+      manifestPromise = null;
+      throw error;
+    });
+  }
+  return manifestPromise;
+}
+
+// Columnar shards carry their own name dictionary; object shards are used as-is
+function toRecipients(manifest: GemDataManifest, recipients: Recipient[] | RecipientColumns): Recipient[] {
+  if (manifest.encoding !== 'columnar') {
+    return recipients as Recipient[];
+  }
+  return decodeRecipients(recipients as RecipientColumns);
+}
+
+export async function loadGemBatch(batchName: string): Promise<GemBatch> {
+  const manifest = await loadGemManifest();
+  const entry = manifest.batches.find((batch) => batch.batch_name === batchName);
+  if (!entry) {
+    throw new Error(`Unknown GeM batch: ${batchName}`);
+  }
+  const shard = await loadShard<Omit<GemBatch, 'recipients'> & { recipients: Recipient[] | RecipientColumns }>(
+    entry.shard
+  );
+  return { ...shard, recipients: toRecipients(manifest, shard.recipients) };
+}
+
+export async function loadGemEmailBatch(): Promise<Recipient[]> {
+  const manifest = await loadGemManifest();
+  const shard = await loadShard<{ recipients: Recipient[] | RecipientColumns }>(manifest.email_batch.shard);
+  return toRecipients(manifest, shard.recipients);
+}
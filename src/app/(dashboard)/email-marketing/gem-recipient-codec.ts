@@ -0,0 +1,33 @@
+// Decoder for the dictionary-encoded recipient lists written by gem_emit.py
+// (--encoding columnar): parallel address and name-reference arrays into a
+// list of company names, shared by gem-mock-data.ts or carried per shard.
+import { Recipient } from '@/services/emailMarketingService';
+
+export interface RecipientColumns {
+  addresses: string[];
+  names: number[];
+  dictionary?: string[];
+}
+
+export interface EncodedBatch {
+  batch_name: string;
+  category: string;
+  type: string;
+  recipients: RecipientColumns;
+  recipient_count: number;
+}
+
+export function decodeRecipients(columns: RecipientColumns, names: string[] = columns.dictionary ?? []): Recipient[] {
+  const recipients = new Array<Recipient>(columns.addresses.length);
+  for (let i = 0; i < columns.addresses.length; i++) {
+    recipients[i] = { address: columns.addresses[i], name: names[columns.names[i]] };
+  }
+  return recipients;
+}
+
+export function decodeBatches(batches: EncodedBatch[], names: string[]) {
+  return batches.map((batch) => ({
+    ...batch,
+    recipients: decodeRecipients(batch.recipients, names),
+  }));
+}
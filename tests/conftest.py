@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The pipeline modules live flat in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# gem_cache reads this at import time; keep test builds out of the real .gem_cache
+os.environ['GEM_CACHE_DIR'] = tempfile.mkdtemp(prefix='gem-cache-test-')
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from gem_batch_planner import load_batch_spec, plan_batches
+
+
+def recipient(i, company_type, domain_category):
+    return {'address': f"r{i}@x{i % 4}.in", 'name': f"R {i}", 'company_type': company_type,
+            'domain_category': domain_category, 'key': f"k{i}"}
+
+
+@pytest.mark.parametrize('spec', [
+    {'batch_size': 0},
+    {'batch_size': 2.5},
+    {'batch_size': '100'},
+    {'batch_size': True},
+    {'max_batches': 0},
+    {'max_batches': -3},
+    {'max_batches': 1.5},
+    {'segment_keys': ['colour']},
+])
+def test_invalid_specs_are_rejected(spec, tmp_path):
+    path = tmp_path / 'spec.json'
+    path.write_text(json.dumps(spec))
+    with pytest.raises(ValueError):
+        load_batch_spec(str(path))
+
+
+def test_valid_spec_keeps_defaults(tmp_path):
+    path = tmp_path / 'spec.json'
+    path.write_text(json.dumps({'batch_size': 25, 'max_batches': 3}))
+    spec = load_batch_spec(str(path))
+    assert (spec['batch_size'], spec['max_batches'], spec['segment_keys']) == (25, 3, ['company_type', 'domain_category'])
+
+
+def test_default_plan_batches_every_recipient():
+    from create_excel_based_batches import plan_gem_batches
+
+    recipients = [recipient(i, 'Private Limited', 'Gmail') for i in range(150)]
+    recipients += [recipient(150 + i, 'Proprietorship', 'Other') for i in range(5)]
+
+    batches, _, unassigned = plan_gem_batches(recipients)
+
+    assert unassigned == 0
+    assert [batch['recipient_count'] for batch in batches] == [100, 50, 5]
+    assert batches[1]['batch_name'] == 'Private Limited / Gmail - Batch 2'
+
+
+def test_previous_members_keep_their_batch():
+    recipients = [recipient(i, 'Limited', 'Yahoo') for i in range(120)]
+    previous = {'Limited / Yahoo - Batch 2': {'segment': ['Limited', 'Yahoo'], 'keys': ['k3', 'k5']}}
+
+    batches, _ = plan_batches(recipients, load_batch_spec(), previous)
+
+    second = next(batch for batch in batches if batch['batch_name'] == 'Limited / Yahoo - Batch 2')
+    assert [member['key'] for member in second['recipients'][:2]] == ['k3', 'k5']
+    assert sum(batch['recipient_count'] for batch in batches) == 120
+
+
+def test_segment_batches_cover_every_recipient():
+    recipients = [recipient(i, 'Limited' if i % 2 else 'Enterprise', 'Gmail') for i in range(30)]
+    batches, unassigned = plan_batches(recipients, dict(load_batch_spec(), batch_size=10))
+    assert unassigned == 0
+    assert sorted(member['key'] for batch in batches for member in batch['recipients']) == \
+        sorted(member['key'] for member in recipients)
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import create_excel_based_batches as batches
+from gem_synth import write_synthetic_workbook
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / 'resellers.xlsx')
+    write_synthetic_workbook(path, 300, 0)
+    return path
+
+
+def test_manifest_is_saved_only_after_the_output(workbook, tmp_path, monkeypatch):
+    # Under the test cache directory (see conftest)
+    manifest_path = batches.MANIFEST_PATH
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    output = str(tmp_path / 'gem-mock-data.ts')
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(batches, 'write_mock_data_ts', fail)
+        with pytest.raises(OSError):
+            batches.create_batches_from_excel(workbook, output=output)
+    assert not os.path.exists(manifest_path)
+
+    batches.create_batches_from_excel(workbook, output=output)
+    assert os.path.exists(output) and os.path.exists(manifest_path)
+
+
+def test_incremental_run_reclassifies_after_a_rule_change(workbook, tmp_path, monkeypatch, capsys):
+    import gem_classify
+
+    output = str(tmp_path / 'gem-mock-data.ts')
+    batches.create_batches_from_excel(workbook, output=output)
+    batches.create_batches_from_excel(workbook, incremental=True, output=output)
+    assert 'Rows classified this run: 0 of 300' in capsys.readouterr().out
+
+    rules = [("Traders", ["traders"])] + gem_classify.COMPANY_TYPE_RULES
+    monkeypatch.setattr(gem_classify, 'COMPANY_TYPE_RULES', rules)
+    monkeypatch.setattr(gem_classify, 'company_type_classifier',
+                        gem_classify.KeywordClassifier(rules, gem_classify.DEFAULT_COMPANY_TYPE))
+    batches.create_batches_from_excel(workbook, incremental=True, output=output)
+    assert 'Rows classified this run: 300 of 300' in capsys.readouterr().out
+    assert any(row['company_type'] == 'Traders' for row in batches.load_batch_manifest()['rows'].values())
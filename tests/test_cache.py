@@ -0,0 +1,106 @@
+import csv
+import os
+
+import gem_cache
+from gem_cache import iter_cached_records, iter_table_chunks, load_reseller_table
+from gem_reader import iter_sheet_rows, records_from_rows
+
+
+def write_workbook(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Sl', 'Name of Company', 'Email 1', 'Email 2', 'Email 3'])
+        for i in range(rows):
+            writer.writerow([i, f"Company {i} Pvt Ltd", f"info{i}@c{i}.com", '', f"sales{i}@gmail.com"])
+    return str(path)
+
+
+def cache_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if '.cols' in name)
+
+
+def test_records_stream_in_chunks_and_hit_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(gem_cache, 'CHUNK_ROWS', 7)
+    cache_dir = str(tmp_path / 'cache')
+    path = write_workbook(tmp_path / 'book.csv', 30)
+    expected = list(records_from_rows(iter_sheet_rows(path)))
+
+    misses = gem_cache.table_cache_stats['misses']
+    assert list(iter_cached_records(path, cache_dir=cache_dir)) == expected
+    chunks = iter_table_chunks(path, cache_dir=cache_dir)
+    next(chunks)
+    assert [len(chunk['Name of Company']) for chunk in chunks] == [7, 7, 7, 7, 2]
+    assert gem_cache.table_cache_stats['misses'] == misses + 1
+
+    header, columns = load_reseller_table(path, cache_dir=cache_dir)
+    assert header[1] == 'Name of Company' and len(columns['Email 3']) == 30
+
+
+def test_reader_that_stops_early_leaves_no_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(gem_cache, 'CHUNK_ROWS', 5)
+    cache_dir = str(tmp_path / 'cache')
+    path = write_workbook(tmp_path / 'book.csv', 20)
+    records = iter_cached_records(path, cache_dir=cache_dir)
+    next(records)
+    records.close()
+    assert cache_files(cache_dir) == []
+
+
+def test_truncated_entry_is_rebuilt(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    path = write_workbook(tmp_path / 'book.csv', 10)
+    list(iter_cached_records(path, cache_dir=cache_dir))
+    [name] = cache_files(cache_dir)
+    with open(os.path.join(cache_dir, name), 'r+b') as f:
+        f.truncate(len(gem_cache._MAGIC) + 3)
+    assert len(list(iter_cached_records(path, cache_dir=cache_dir))) == 10
+
+
+def test_entry_damaged_after_the_first_chunk_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(gem_cache, 'CHUNK_ROWS', 4)
+    cache_dir = str(tmp_path / 'cache')
+    path = write_workbook(tmp_path / 'book.csv', 10)
+    expected = list(iter_cached_records(path, cache_dir=cache_dir))
+    [name] = cache_files(cache_dir)
+    table_path = os.path.join(cache_dir, name)
+    with open(table_path, 'rb') as f:
+        data = f.read()
+
+    for damaged in (data[:len(data) // 2], data.replace(b'{"end": 10}', b'{"end": 12}'), data + b'{}'):
+        with open(table_path, 'wb') as f:
+            f.write(damaged)
+        misses = gem_cache.table_cache_stats['misses']
+        assert list(iter_cached_records(path, cache_dir=cache_dir)) == expected
+        assert gem_cache.table_cache_stats['misses'] == misses + 1
+        with open(table_path, 'rb') as f:
+            assert f.read() == data
+
+
+def test_prune_keeps_tables_shared_with_another_path(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = write_workbook(tmp_path / 'first.csv', 10)
+    second = write_workbook(tmp_path / 'second.csv', 10)
+    list(iter_cached_records(first, cache_dir=cache_dir))
+    list(iter_cached_records(second, cache_dir=cache_dir))
+    [shared] = cache_files(cache_dir)
+
+    write_workbook(tmp_path / 'first.csv', 12)
+    os.utime(first, ns=(1, 1))
+    assert len(list(iter_cached_records(first, cache_dir=cache_dir))) == 12
+    assert shared in cache_files(cache_dir)
+
+    write_workbook(tmp_path / 'second.csv', 14)
+    os.utime(second, ns=(1, 1))
+    list(iter_cached_records(second, cache_dir=cache_dir))
+    assert shared not in cache_files(cache_dir)
+
+
+def test_profile_does_not_depend_on_the_chunk_size(tmp_path, monkeypatch):
+    from analyze_gem_excel import profile_reseller_table
+
+    path = write_workbook(tmp_path / 'book.csv', 40)
+    whole = profile_reseller_table(path)
+    monkeypatch.setattr(gem_cache, 'CHUNK_ROWS', 6)
+    os.utime(path, ns=(1, 1))
+    gem_cache.clear_cache()
+    assert profile_reseller_table(path) == whole
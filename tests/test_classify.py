@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from gem_classify import (
+    COMPANY_TYPE_RULES,
+    KeywordClassifier,
+    classify_company_type,
+    classify_company_types,
+    classify_domain,
+)
+
+
+def classify_rule_by_rule(rules, default, text):
+    text = text.lower()
+    for label, keywords in rules:
+        if any(keyword in text for keyword in keywords):
+            return label
+    return default
+
+
+@pytest.mark.parametrize('rules, text, expected', [
+    ([('A', ['corp']), ('B', ['corporation'])], 'Acme Corporation', 'A'),
+    ([('B', ['corporation']), ('A', ['corp'])], 'Acme Corporation', 'B'),
+    ([('A', ['ltd']), ('B', ['pvt ltd'])], 'X Pvt Ltd', 'A'),
+    ([('A', ['tech']), ('B', ['hitech'])], 'Hitech Systems', 'A'),
+    ([('A', ['zzz']), ('B', ['hitech'])], 'Hitech Systems', 'B'),
+    ([('A', ['corp'])], 'Acme', 'Other'),
+    ([('A', ['zzz']), ('B', []), ('C', ['tech']), ('D', ['hitech'])], 'Hitech Systems', 'C'),
+    ([('A', []), ('B', [])], 'Hitech Systems', 'Other'),
+])
+def test_overlapping_keywords_follow_rule_precedence(rules, text, expected):
+    assert KeywordClassifier(rules, 'Other').classify(text) == expected
+    assert classify_rule_by_rule(rules, 'Other', text) == expected
+
+
+def test_matches_rule_by_rule_checking_on_random_rules():
+    rng = random.Random(7)
+    alphabet = 'abc '
+    for _ in range(300):
+        rules = [(f"L{i}", [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                            for _ in range(rng.randint(0, 3))]) for i in range(rng.randint(1, 5))]
+        classifier = KeywordClassifier(rules, 'Other')
+        for _ in range(20):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            assert classifier.classify(text) == classify_rule_by_rule(rules, 'Other', text), (rules, text)
+
+
+def test_company_types():
+    assert classify_company_type('ABC PRIVATE LIMITED') == 'Private Limited'
+    assert classify_company_type('XYZ Pvt. Ltd.') == 'Limited'
+    assert classify_company_type('Alpha Corp') == 'Corporation'
+    assert classify_company_type('Shiv Traders') == 'Other'
+    names = ['A Industries', 'B LLP', 'A Industries']
+    assert classify_company_types(names) == [classify_rule_by_rule(COMPANY_TYPE_RULES, 'Other', name) for name in names]
+
+
+@pytest.mark.parametrize('domain, category', [
+    ('gmail.com', 'Gmail'),
+    ('yahoo.co.in', 'Yahoo'),
+    ('dept.gov.in', 'Government'),
+    ('iitb.ac.in', 'Education'),
+    ('acme.co.in', 'Business Email'),
+])
+def test_domain_categories(domain, category):
+    assert classify_domain(domain) == category
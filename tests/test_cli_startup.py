@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from gem_bench import STARTUP_BUDGET_MS
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gem_cli.py')
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+# Run a command the way `python gem_cli.py ...` does, then report which heavy modules got imported
+PROBE = (
+    "import json, os, runpy, sys\n"
+    "sys.argv = sys.argv[1:]\n"
+    "sys.path.insert(0, os.path.dirname(sys.argv[0]))\n"
+    "try:\n"
+    "    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+    "    code = 0\n"
+    "except SystemExit as exit:\n"
+    "    code = exit.code\n"
+    f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))\n"
+    "sys.exit(code)\n"
+)
+
+
+def run_cli(args, cwd):
+    """Run gem_cli under -X importtime; returns (stdout lines, heavy modules imported, import time in ms)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE, CLI] + args,
+                            capture_output=True, text=True, cwd=cwd)
+    assert result.returncode == 0, result.stderr
+    # Lines read "import time: <self us> | <cumulative us> | <module>"; the self times add up to the total
+    import_us = sum(int(line.split(':', 1)[1].split('|')[0]) for line in result.stderr.splitlines()
+                    if line.startswith('import time:') and line.split(':', 1)[1].split('|')[0].strip().isdigit())
+    lines = result.stdout.strip().splitlines()
+    return lines[:-1], json.loads(lines[-1]), import_us / 1000
+
+
+@pytest.fixture(scope='module')
+def generated(tmp_path_factory):
+    from create_excel_based_batches import create_batches_from_excel
+    from gem_synth import write_synthetic_workbook
+
+    out = tmp_path_factory.mktemp('generated')
+    workbook = str(out / 'resellers.xlsx')
+    write_synthetic_workbook(workbook, 100, 0)
+    create_batches_from_excel(workbook, output=str(out / 'gem-mock-data.ts'), shard_dir=str(out / 'gem-data'))
+    return out
+
+
+def test_summary_reads_the_manifest_without_heavy_imports(generated):
+    lines, heavy, import_ms = run_cli(['summary', '--data', 'gem-mock-data.ts', '--rows'], generated)
+    assert any('Batch' in line for line in lines)
+    assert heavy == []
+    assert import_ms < STARTUP_BUDGET_MS
+
+
+def test_update_msme_edits_the_module_without_heavy_imports(generated):
+    args = ['update-msme', '--add', 'probe@example.in', 'Probe', '--data', 'gem-mock-data.ts', '--shard-dir', 'gem-data']
+    lines, heavy, import_ms = run_cli(args, generated)
+    assert any('probe@example.in - Probe' in line for line in lines)
+    assert heavy == []
+    assert import_ms < STARTUP_BUDGET_MS
+
+    from update_msme_emails import load_msme_test_emails
+
+    assert load_msme_test_emails(str(generated / 'gem-mock-data.ts'))[-1]['email'] == 'probe@example.in'
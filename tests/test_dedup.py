@@ -0,0 +1,49 @@
+import pytest
+
+from gem_dedup import AddressIndex, BloomFilter, Deduplicator, address_key, normalize_address
+
+
+@pytest.mark.parametrize('address, normalized', [
+    (' John.Doe+news@GoogleMail.com ', 'johndoe@gmail.com'),
+    ('a.b+tag@outlook.com', 'a.b@outlook.com'),
+    ('a.b+tag@acme.co.in', 'a.b+tag@acme.co.in'),
+    ('Sales@Acme.COM.', 'sales@acme.com'),
+])
+def test_normalize_address(address, normalized):
+    assert normalize_address(address) == normalized
+
+
+def test_index_starts_small_and_grows():
+    index = AddressIndex(memory_budget_mb=64, initial_slots=16)
+    assert len(index._slots) == 16
+    keys = [address_key(f"user{i}@x.com") for i in range(5000)]
+    assert all(index.add(key) for key in keys)
+    assert not any(index.add(key) for key in keys)
+    assert all(key in index for key in keys)
+    assert address_key('other@x.com') not in index
+    assert index.size == 5000 and len(index._slots) == 8192
+
+
+def test_index_full_at_its_budget():
+    index = AddressIndex(memory_budget_mb=0.001, initial_slots=16)
+    with pytest.raises(MemoryError):
+        for i in range(1000):
+            index.add(address_key(f"user{i}@x.com"))
+    assert len(index._slots) == 128
+
+
+def test_deduplicator_counts_per_source():
+    deduplicator = Deduplicator()
+    assert deduplicator.add('a@x.com', 'one')
+    assert not deduplicator.add('A@X.com', 'two')
+    assert deduplicator.add('b@x.com', 'two')
+    assert deduplicator.stats['two'] == {'seen': 2, 'unique': 1, 'duplicates': 1}
+
+
+def test_bloom_filter_never_misses_a_duplicate():
+    bloom = BloomFilter(memory_budget_mb=1, expected_items=1000)
+    keys = [address_key(f"user{i}@x.com") for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert bloom.false_positive_rate() < 0.01
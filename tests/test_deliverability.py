@@ -0,0 +1,125 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from gem_deliverability import (
+    DELIVERABLE, UNDELIVERABLE, UNKNOWN, DnsError, StaticResolver, UdpResolver, _DnsProtocol, check_domains,
+    mark_deliverability,
+)
+
+RECORDS = {
+    'firm.in': {'MX': ['mx1.firm.in']},
+    'nullmx.in': {'MX': ['.']},
+    'aonly.in': {'A': ['192.0.2.1']},
+    'empty.in': {},
+    'broken.in': DnsError('SERVFAIL'),
+}
+
+
+def test_static_resolver_statuses(tmp_path):
+    statuses = check_domains(['Firm.in', 'nullmx.in', 'aonly.in', 'empty.in', 'broken.in', 'gone.in'],
+                             StaticResolver(RECORDS), cache_path=None)
+    assert statuses == {'firm.in': DELIVERABLE, 'nullmx.in': UNDELIVERABLE, 'aonly.in': DELIVERABLE,
+                        'empty.in': UNDELIVERABLE, 'broken.in': UNKNOWN, 'gone.in': UNDELIVERABLE}
+
+
+def test_slow_lookups_are_unknown():
+    assert check_domains(['firm.in'], StaticResolver(RECORDS, delay=0.2), timeout=0.05, cache_path=None) == \
+        {'firm.in': UNKNOWN}
+
+
+def test_results_are_cached_except_unknown(tmp_path):
+    cache_path = str(tmp_path / 'checks.json')
+    check_domains(['firm.in', 'broken.in'], StaticResolver(RECORDS), cache_path=cache_path)
+
+    resolver = StaticResolver(RECORDS)
+    assert check_domains(['firm.in', 'broken.in'], resolver, cache_path=cache_path)['firm.in'] == DELIVERABLE
+    assert set(domain for domain, _ in resolver.queries) == {'broken.in'}
+
+
+def test_mark_deliverability():
+    recipients = [{'address': 'a@firm.in'}, {'address': 'b@gone.in'}, {'address': 'c@unchecked.in'}]
+    counts = mark_deliverability(recipients, {'firm.in': DELIVERABLE, 'gone.in': UNDELIVERABLE})
+    assert [recipient['deliverability'] for recipient in recipients] == [DELIVERABLE, UNDELIVERABLE, UNKNOWN]
+    assert counts == {DELIVERABLE: 1, UNDELIVERABLE: 1, UNKNOWN: 1}
+
+
+def a_reply(query, addresses, truncated=False):
+    """Answer a query with A records, setting TC if asked."""
+    flags = 0x8180 | (0x0200 if truncated else 0)
+    answers = b''.join(struct.pack('!HHHIH', 0xC00C, 1, 1, 60, 4) + socket.inet_aton(address)
+                       for address in addresses)
+    return query[:2] + struct.pack('!HHHHH', flags, 1, len(addresses), 0, 0) + query[12:] + answers
+
+
+class StubNameserver(asyncio.DatagramProtocol):
+    """UDP nameserver that drops the first `drop` queries and truncates its UDP answers if asked."""
+
+    def __init__(self, drop=0, truncate=False):
+        self.drop = drop
+        self.truncate = truncate
+        self.udp_queries = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.udp_queries += 1
+        if self.udp_queries <= self.drop:
+            return
+        reply = a_reply(data, [] if self.truncate else ['192.0.2.7'], truncated=self.truncate)
+        self.transport.sendto(reply, addr)
+
+
+async def serve_tcp(reader, writer):
+    length = struct.unpack('!H', await reader.readexactly(2))[0]
+    reply = a_reply(await reader.readexactly(length), ['192.0.2.8', '192.0.2.9'])
+    writer.write(struct.pack('!H', len(reply)) + reply)
+    await writer.drain()
+    writer.close()
+
+
+async def resolve(nameserver, domain='firm.in', tcp=False):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: nameserver, local_addr=('127.0.0.1', 0))
+    port = transport.get_extra_info('sockname')[1]
+    server = await asyncio.start_server(serve_tcp, '127.0.0.1', port) if tcp else None
+    try:
+        return await UdpResolver('127.0.0.1', port, attempts=3, retry_timeout=0.1).query(domain, 'A')
+    finally:
+        transport.close()
+        if server:
+            server.close()
+            await server.wait_closed()
+
+
+def test_lost_packets_are_resent():
+    nameserver = StubNameserver(drop=2)
+    assert asyncio.run(resolve(nameserver)) == ['192.0.2.7']
+    assert nameserver.udp_queries == 3
+
+
+def test_gives_up_after_the_last_attempt():
+    nameserver = StubNameserver(drop=5)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(resolve(nameserver))
+    assert nameserver.udp_queries == 3
+
+
+def test_truncated_reply_falls_back_to_tcp():
+    assert asyncio.run(resolve(StubNameserver(truncate=True), tcp=True)) == ['192.0.2.8', '192.0.2.9']
+
+
+def test_replies_from_other_addresses_are_ignored():
+    async def deliver():
+        protocol = _DnsProtocol(7)
+        protocol.peer = ('192.0.2.53', 53)
+        reply = struct.pack('!HHHHHH', 7, 0x8180, 0, 0, 0, 0)
+        protocol.datagram_received(reply, ('198.51.100.1', 53))
+        assert not protocol.reply.done()
+        protocol.datagram_received(reply, ('192.0.2.53', 53))
+        return protocol.reply.result()
+
+    assert asyncio.run(deliver())[:2] == b'\x00\x07'
@@ -0,0 +1,120 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gem_dispatch import IDEMPOTENCY_HEADER, SEND_PATH, DomainRateLimiter, dispatch
+
+MESSAGE = {'subject': 'Tender update', 'html': '<p>Hi</p>', 'senderAddress': 'sales@quickbid.co.in',
+           'batchNumber': 'B1'}
+
+
+class StubBackend(ThreadingHTTPServer):
+    """Stand-in for the email-marketing backend; `script` maps a chunk's first address to canned replies."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.requests = []
+        self.paths = set()
+        self.script = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delivered(self):
+        return [address for status, _, addresses in self.requests if status == 200 for address in addresses]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        addresses = [recipient['address'] for recipient in body['recipients']['bcc']]
+        with self.server.lock:
+            replies = self.server.script.get(addresses[0], [])
+            status = replies.pop(0) if replies else 200
+            self.server.requests.append((status, self.headers.get(IDEMPOTENCY_HEADER), addresses))
+            self.server.paths.add(self.path)
+        if status is None:
+            self.close_connection = True  # Request read in full, connection dropped without a reply
+            return
+        payload = json.dumps({'id': f"send-{len(self.server.requests)}"}).encode('utf-8')
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def backend():
+    server = StubBackend()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def recipients(count):
+    return [{'address': f"user{i}@firm{i % 3}.in", 'name': f"Firm {i}"} for i in range(count)]
+
+
+def send(backend, people, checkpoint, **kwargs):
+    return dispatch(people, MESSAGE, backend.url + '/api', checkpoint_path=str(checkpoint), concurrency=3,
+                    bulk_size=4, limiter=DomainRateLimiter(rates={}, default=(1000.0, 50)), backoff=0.01, **kwargs)
+
+
+def test_throttled_chunks_are_retried(backend, tmp_path):
+    people = recipients(10)
+    backend.script = {'user0@firm0.in': [429, 429], 'user4@firm1.in': [503]}
+
+    summary = send(backend, people, tmp_path / 'send.jsonl')
+
+    assert (summary['chunks'], summary['sent'], summary['failed'], summary['skipped']) == (3, 10, 0, 0)
+    assert sorted(backend.delivered()) == sorted(person['address'] for person in people)
+    assert [status for status, _, addresses in backend.requests if addresses[0] == 'user0@firm0.in'] == [429, 429, 200]
+    assert backend.paths == {'/api' + SEND_PATH}
+
+
+def test_resume_sends_only_unfinished_chunks(backend, tmp_path):
+    people = recipients(12)
+    checkpoint = tmp_path / 'send.jsonl'
+    backend.script = {'user8@firm2.in': [400]}
+
+    first = send(backend, people, checkpoint)
+    assert (first['sent'], first['failed']) == (8, 4)
+
+    # Interrupted while writing the next line: the cut-off entry is ignored
+    with open(checkpoint, 'a', encoding='utf-8') as f:
+        f.write('{"chunk": 2, "sta')
+    keys = {addresses[0]: key for _, key, addresses in backend.requests}
+    backend.requests.clear()
+
+    second = send(backend, people, checkpoint)
+    assert (second['sent'], second['failed'], second['skipped']) == (4, 0, 8)
+    assert [(key, addresses[0]) for _, key, addresses in backend.requests] == [(keys['user8@firm2.in'], 'user8@firm2.in')]
+
+    third = send(backend, people, checkpoint)
+    assert (third['sent'], third['skipped']) == (0, 12)
+
+
+def test_lost_response_is_not_resent(backend, tmp_path):
+    people = recipients(4)
+    backend.script = {'user0@firm0.in': [None]}
+
+    summary = send(backend, people, tmp_path / 'send.jsonl')
+
+    assert (summary['sent'], summary['failed']) == (0, 4)
+    assert len(backend.requests) == 1 and backend.requests[0][1]
+    assert 'not retried' in summary['errors'][0]
+
@@ -0,0 +1,87 @@
+import json
+import os
+
+from gem_emit import DEFAULT_MSME_TEST_EMAILS, SHARD_MANIFEST, existing_msme_test_emails, write_mock_data_ts, write_sharded
+from update_msme_emails import edit_msme_test_emails
+
+
+def sample_data():
+    recipients = [{'address': 'a@x.com', 'name': 'A Ltd'}, {'address': 'b@x.com', 'name': 'B Ltd'}]
+    return {
+        'states': ['Gujarat'],
+        'categories': ['Office'],
+        'districts_by_state': {'Gujarat': ['Surat']},
+        'products_by_category': {'Office': ['Paper']},
+        'batches': [{'batch_name': 'B1', 'state': 'Gujarat', 'category': 'Office', 'district': 'Surat',
+                     'products': ['Paper'], 'recipients': recipients, 'recipient_count': 2}],
+        'email_batch': recipients,
+    }
+
+
+def test_rewrite_keeps_edited_msme_recipients(tmp_path):
+    path = str(tmp_path / 'gem-mock-data.ts')
+    shard_dir = str(tmp_path / 'gem-data')
+    write_mock_data_ts(sample_data(), path)
+    write_sharded(sample_data(), shard_dir)
+    assert existing_msme_test_emails(path) == DEFAULT_MSME_TEST_EMAILS
+
+    edited = edit_msme_test_emails(add=[('me@quickbid.co.in', 'Me')], file_path=path, shard_dir=shard_dir)
+    write_mock_data_ts(sample_data(), path)
+    write_sharded(sample_data(), shard_dir)
+
+    assert existing_msme_test_emails(path) == edited
+    with open(os.path.join(shard_dir, SHARD_MANIFEST), encoding='utf-8') as f:
+        assert json.load(f)['msme_test_emails'] == edited
+
+
+def test_explicit_msme_list_is_written(tmp_path):
+    path = str(tmp_path / 'gem-mock-data.ts')
+    write_mock_data_ts(sample_data(), path)
+    entries = [{'id': 'msme1', 'email': 'x@y.com', 'name': 'X'}]
+    write_mock_data_ts(dict(sample_data(), msme_test_emails=entries), path)
+    assert existing_msme_test_emails(path) == entries
+
+
+def test_columnar_shards_do_not_depend_on_other_batches(tmp_path):
+    from gem_data_summary import load_mock_data, load_recipients
+
+    shard_dir = str(tmp_path / 'gem-data')
+    data = sample_data()
+    other = dict(data['batches'][0], batch_name='B2',
+                 recipients=[{'address': 'c@x.com', 'name': 'C Ltd'}], recipient_count=1)
+    data['batches'] = [other] + data['batches']
+    write_sharded(data, shard_dir, encoding='columnar')
+    before = {batch['batch_name']: batch['shard'] for batch in load_mock_data(os.path.join(shard_dir, SHARD_MANIFEST))['batches']}
+
+    # New names in B2 must not shift the refs stored in B1's shard
+    other['recipients'] = [{'address': 'd@x.com', 'name': 'D Ltd'}] + other['recipients']
+    write_sharded(data, shard_dir, encoding='columnar')
+    manifest = load_mock_data(os.path.join(shard_dir, SHARD_MANIFEST))
+    after = {batch['batch_name']: batch['shard'] for batch in manifest['batches']}
+
+    assert after['B1'] == before['B1'] and after['B2'] != before['B2']
+    assert load_recipients(manifest, 'B1') == sample_data()['email_batch']
+    assert load_recipients(manifest, 'B2')[0] == {'address': 'd@x.com', 'name': 'D Ltd'}
+
+
+def test_previous_generation_of_shards_survives_one_rewrite(tmp_path):
+    shard_dir = str(tmp_path / 'gem-data')
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST)
+
+    def shards():
+        with open(manifest_path, encoding='utf-8') as f:
+            return {batch['shard'] for batch in json.load(f)['batches']}
+
+    def rewrite(name):
+        data = sample_data()
+        data['batches'][0]['recipients'] = [{'address': f"{name}@x.com", 'name': name}]
+        write_sharded(data, shard_dir)
+        return shards()
+
+    first = rewrite('first')
+    second = rewrite('second')
+    assert all(os.path.exists(os.path.join(shard_dir, shard)) for shard in first | second)
+
+    third = rewrite('third')
+    assert all(os.path.exists(os.path.join(shard_dir, shard)) for shard in second | third)
+    assert not any(os.path.exists(os.path.join(shard_dir, shard)) for shard in first)
@@ -0,0 +1,34 @@
+import pytest
+
+from gem_entities import company_core, resolve_companies
+
+
+@pytest.mark.parametrize('name, core', [
+    ('ABC Pvt. Ltd.', 'abc'),
+    ('ABC (P) Limited', 'abc'),
+    ('M/S R K & Co.', 'r k'),
+    ('The R K & Company Pvt Ltd', 'r k'),
+    ('A & P Pvt Ltd', 'a and p'),
+    ('Sharma and Sons', 'sharma and sons'),
+    ('Limited', 'limited'),
+])
+def test_company_core(name, core):
+    assert company_core(name) == core
+
+
+@pytest.mark.parametrize('left, right', [
+    ('A & P Pvt Ltd', 'A Ltd'),
+    ('A & P Traders', 'A Traders'),
+    ('Sharma and Sons', 'Sharma Pvt Ltd'),
+    ('R R Enterprises', 'S R Enterprises'),
+    ('Om Sai Traders', 'Om Sai Tractors'),
+])
+def test_near_miss_names_stay_apart(left, right):
+    ids, _, _ = resolve_companies([left, right])
+    assert ids[0] != ids[1]
+
+
+def test_variants_of_one_name_merge():
+    names = ['Shree Ganesh Enterprises Pvt Ltd', 'SHREE GANESH ENTERPRISES (P) LIMITED', 'Shree Ganesh Enterprizes']
+    ids, _, _ = resolve_companies(names + ['Shree Mahesh Traders'])
+    assert len(set(ids[:3])) == 1 and ids[3] != ids[0]
@@ -0,0 +1,26 @@
+import os
+
+import generate_gem_mock_data
+from gem_emit import existing_msme_test_emails
+from gem_reader import DEFAULT_WORKBOOK
+from update_msme_emails import edit_msme_test_emails
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), DEFAULT_WORKBOOK)
+
+
+def test_msme_edit_survives_and_does_not_invalidate_the_build(tmp_path):
+    output = str(tmp_path / 'gem-mock-data.ts')
+    assert generate_gem_mock_data.build_mock_data(WORKBOOK, output=output)
+    assert existing_msme_test_emails(output) == generate_gem_mock_data.MSME_TEST_EMAILS
+
+    edited = edit_msme_test_emails(first=('me@quickbid.co.in', 'Me'), file_path=output,
+                                   shard_dir=str(tmp_path / 'shards'))
+    assert not generate_gem_mock_data.build_mock_data(WORKBOOK, output=output)
+    assert generate_gem_mock_data.build_mock_data(WORKBOOK, output=output, force=True)
+    assert existing_msme_test_emails(output) == edited
+
+
+def test_renderer_version_is_part_of_the_build_key(monkeypatch):
+    key = generate_gem_mock_data.mock_data_build_key(WORKBOOK)
+    monkeypatch.setattr(generate_gem_mock_data, 'RENDERER_VERSION', generate_gem_mock_data.RENDERER_VERSION + 1)
+    assert generate_gem_mock_data.mock_data_build_key(WORKBOOK) != key
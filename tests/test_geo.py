@@ -0,0 +1,79 @@
+import pytest
+
+from gem_geo import load_gazetteer, tokenize
+
+
+def write_gazetteer(tmp_path, rows):
+    path = tmp_path / 'gazetteer.csv'
+    path.write_text('state,district,name,kind\n' + '\n'.join(rows) + '\n', encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    return load_gazetteer(write_gazetteer(tmp_path, [
+        'Maharashtra,,Maharashtra,state',
+        'Maharashtra,,mh,abbr',
+        'Maharashtra,Mumbai,Mumbai,district',
+        'Maharashtra,Thane,Thane,district',
+        'Maharashtra,Thane,Navi Mumbai,alias',
+        'Maharashtra,Aurangabad,Aurangabad,district',
+        'Delhi,,Delhi,state',
+        'Delhi,New Delhi,New Delhi,district',
+        'Tamil Nadu,,Tamil Nadu,state',
+        'Tamil Nadu,,tn,abbr',
+        'Tamil Nadu,Chennai,Chennai,district',
+        'Uttar Pradesh,,Uttar Pradesh,state',
+        'Uttar Pradesh,,up,abbr',
+        'Uttar Pradesh,Lucknow,Lucknow,district',
+        'Bihar,,Bihar,state',
+        'Bihar,Aurangabad,Aurangabad,district',
+    ]))
+
+
+def test_longest_name_wins(gazetteer):
+    assert list(gazetteer.scan(tokenize('Navi Mumbai Traders'))) == [[('Maharashtra', 'Thane')]]
+    assert gazetteer.tag('Navi Mumbai Traders') == ('Maharashtra', 'Thane')
+    assert gazetteer.tag('Mumbai Traders') == ('Maharashtra', 'Mumbai')
+    assert gazetteer.tag('New Delhi Stores') == ('Delhi', 'New Delhi')
+    assert gazetteer.tag('Delhi Stores') == ('Delhi', None)
+
+
+def test_run_together_domain_label(gazetteer):
+    assert gazetteer.tag(emails=['sales@tamilnadu.co.in']) == ('Tamil Nadu', None)
+    assert gazetteer.tag(emails=['info@navimumbaitraders.com']) == (None, None)
+
+
+def test_state_codes_only_count_in_government_domains(gazetteer):
+    assert gazetteer.tag(emails=['x@tn.gov.in']) == ('Tamil Nadu', None)
+    assert gazetteer.tag(emails=['x@up.nic.in']) == ('Uttar Pradesh', None)
+    assert gazetteer.tag('UP Traders') == (None, None)
+    assert gazetteer.tag(emails=['up@tn.co.in']) == (None, None)
+
+
+def test_ambiguous_district_needs_other_state_evidence(gazetteer):
+    assert gazetteer.tag('Aurangabad Steel') == (None, None)
+    assert gazetteer.tag('Aurangabad Steel', ['x@mh.gov.in']) == ('Maharashtra', 'Aurangabad')
+    assert gazetteer.tag('Aurangabad Steel Bihar') == ('Bihar', 'Aurangabad')
+
+
+def test_shipped_aliases_point_at_listed_districts():
+    gazetteer = load_gazetteer()
+    assert gazetteer.tag('Vijayawada Traders') == ('Andhra Pradesh', 'NTR')
+    assert 'NTR' in gazetteer.districts_by_state['Andhra Pradesh']
+
+
+def test_alias_of_an_unlisted_district_is_rejected(tmp_path):
+    path = write_gazetteer(tmp_path, [
+        'Andhra Pradesh,,Andhra Pradesh,state',
+        'Andhra Pradesh,Guntur,Guntur,district',
+        'Andhra Pradesh,NTR,Vijayawada,alias',
+    ])
+    with pytest.raises(ValueError, match='Andhra Pradesh / NTR'):
+        load_gazetteer(path)
+
+
+def test_abbreviation_needs_its_state(tmp_path):
+    path = write_gazetteer(tmp_path, ['Goa,North Goa,North Goa,district', 'Goa,,ga,abbr'])
+    with pytest.raises(ValueError, match='Goa'):
+        load_gazetteer(path)
@@ -0,0 +1,90 @@
+import zipfile
+
+import pytest
+
+from gem_reader import (
+    COMPANY_COLUMN, EMAIL_COLUMNS, iter_reseller_records, iter_sheet_rows, list_sheets, read_reseller_frame,
+    records_from_rows,
+)
+from gem_synth import write_synthetic_workbook
+
+MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+DOC_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+def write_workbook(path, sheets, shared_strings=()):
+    """Write a minimal .xlsx with the given {name: sheetData XML} sheets."""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('xl/workbook.xml', f'<workbook xmlns="{MAIN}" xmlns:r="{DOC_RELS}"><sheets>' + ''.join(
+            f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(sheets, start=1)
+        ) + '</sheets></workbook>')
+        archive.writestr('xl/_rels/workbook.xml.rels', f'<Relationships xmlns="{PKG_RELS}">' + ''.join(
+            f'<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml"/>' for i in range(1, len(sheets) + 1)
+        ) + '</Relationships>')
+        for i, data in enumerate(sheets.values(), start=1):
+            archive.writestr(f'xl/worksheets/sheet{i}.xml', f'<worksheet xmlns="{MAIN}"><sheetData>{data}</sheetData></worksheet>')
+        if shared_strings:
+            archive.writestr('xl/sharedStrings.xml', f'<sst xmlns="{MAIN}">' + ''.join(
+                f'<si><t>{text}</t></si>' for text in shared_strings
+            ) + '</sst>')
+    return str(path)
+
+
+HEADER = '<row r="1">' + ''.join(
+    f'<c r="{column}1" t="s"><v>{i}</v></c>' for i, column in enumerate('ABCD')
+) + '</row>'
+STRINGS = [COMPANY_COLUMN] + EMAIL_COLUMNS + ['Shree Traders']
+
+
+def test_xlsx_cells_are_decoded(tmp_path):
+    rows = HEADER + (
+        '<row r="2"><c r="A2" t="s"><v>4</v></c><c r="C2" t="inlineStr"><is><r><t>b@x</t></r><r><t>.in</t></r></is></c></row>'
+        '<row r="3"/>'
+        '<row r="4"><c r="A4" t="inlineStr"><is><t>  Om Steel  </t></is></c><c r="B4"><v>42</v></c>'
+        '<c r="D4" t="b"><v>1</v></c></row>'
+    )
+    path = write_workbook(tmp_path / 'book.xlsx', {'Resellers': rows}, STRINGS)
+
+    assert list(iter_sheet_rows(path))[1] == ['Shree Traders', '', 'b@x.in']
+    assert list(iter_reseller_records(path)) == [
+        ('Shree Traders', '', 'b@x.in', ''),
+        ('Om Steel', '42', '', 'TRUE'),
+    ]
+
+
+def test_sheets_by_name_and_index(tmp_path):
+    second = HEADER + '<row r="2"><c r="A2" t="inlineStr"><is><t>Second</t></is></c></row>'
+    path = write_workbook(tmp_path / 'book.xlsx', {'Notes': '', 'Resellers': second}, STRINGS)
+
+    assert list_sheets(path) == ['Notes', 'Resellers']
+    assert [record[0] for record in iter_reseller_records(path, 'Resellers')] == ['Second']
+    assert [record[0] for record in iter_reseller_records(path, 1)] == ['Second']
+    with pytest.raises(ValueError):
+        list(iter_sheet_rows(path, 'Missing'))
+
+
+def test_csv_with_bom_and_missing_columns(tmp_path):
+    path = tmp_path / 'book.csv'
+    path.write_text('\ufeffEmail 1,Name of Company\n a@x.in ,A Ltd\n,\n', encoding='utf-8')
+
+    assert list_sheets(str(path)) == [None]
+    assert list(iter_reseller_records(str(path))) == [('A Ltd', 'a@x.in', '', '')]
+
+
+def test_records_without_a_company_column():
+    rows = iter([['Email 1'], ['a@x.in']])
+    assert list(records_from_rows(rows)) == [('Unknown Company', 'a@x.in', '', '')]
+
+
+def test_xlsx_and_csv_of_the_same_data_agree(tmp_path):
+    xlsx = write_synthetic_workbook(str(tmp_path / 'book.xlsx'), 500, seed=3)
+    csv = write_synthetic_workbook(str(tmp_path / 'book.csv'), 500, seed=3)
+
+    records = list(iter_reseller_records(xlsx))
+    assert len(records) == 500
+    assert records == list(iter_reseller_records(csv))
+
+    frame = read_reseller_frame(xlsx)
+    assert list(frame.columns) == [COMPANY_COLUMN] + EMAIL_COLUMNS
+    assert frame.iloc[0].tolist() == list(records[0])
@@ -0,0 +1,109 @@
+import pytest
+
+from gem_store import DAY_SECONDS, RecipientStore
+
+NOW = 1_800_000_000
+
+
+def recipient(address, **fields):
+    return dict({'address': address, 'name': address.split('@')[0], 'company_type': 'Limited',
+                 'domain_category': 'Business Email', 'state': 'Gujarat', 'district': None}, **fields)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RecipientStore(str(tmp_path / 'recipients.db')) as store:
+        yield store
+
+
+def test_upsert_marks_missing_rows_inactive(store):
+    assert store.upsert_recipients([recipient('a@x.com'), recipient('b@x.com')], now=NOW) == (2, 0)
+    assert store.upsert_recipients([recipient('b@x.com')], now=NOW + 1) == (1, 1)
+    assert [row['address'] for row in store.select()] == ['b@x.com']
+    assert len(store.select(include_inactive=True)) == 2
+
+
+def test_normalized_variants_share_a_row(store):
+    store.upsert_recipients([recipient('John.Doe@gmail.com')], now=NOW)
+    store.record_sends(['johndoe+news@gmail.com'], 'B1', now=NOW)
+    assert store.select()[0]['contact_count'] == 1
+
+
+def test_select_orders_by_last_contact_and_filters_segments(store):
+    store.upsert_recipients([
+        recipient('a@x.com'),
+        recipient('b@x.com', state='Delhi'),
+        recipient('c@x.com'),
+    ], now=NOW)
+    store.record_sends(['a@x.com'], 'B1', now=NOW - 40 * DAY_SECONDS)
+    store.record_sends(['c@x.com'], 'B1', now=NOW - 2 * DAY_SECONDS)
+
+    assert [row['address'] for row in store.select(now=NOW)] == ['b@x.com', 'a@x.com', 'c@x.com']
+    assert [row['address'] for row in store.select(exclude_days=30, now=NOW)] == ['b@x.com', 'a@x.com']
+    assert [row['address'] for row in store.select(state='Gujarat', exclude_days=3, now=NOW)] == ['a@x.com']
+    with pytest.raises(ValueError):
+        store.select(colour='red')
+
+
+def test_send_before_first_upsert_still_caps(store):
+    store.record_sends(['new@x.com'], 'B1', now=NOW - DAY_SECONDS)
+    store.upsert_recipients([recipient('new@x.com'), recipient('other@x.com')], now=NOW)
+
+    row = store.select(include_inactive=True, state='Gujarat')[-1]
+    assert (row['address'], row['last_contacted'], row['contact_count']) == ('new@x.com', NOW - DAY_SECONDS, 1)
+    assert [row['address'] for row in store.select(exclude_days=7, now=NOW)] == ['other@x.com']
+    assert store.recently_contacted(['new@x.com', 'other@x.com'], 7, now=NOW) == {'new@x.com'}
+
+
+def test_recently_contacted_without_a_recipient_row(store):
+    store.record_sends(['ghost@x.com'], 'B1', now=NOW)
+    assert store.recently_contacted(['Ghost@X.com', 'someone@x.com'], 1, now=NOW) == {'Ghost@X.com'}
+    assert store.recently_contacted(['ghost@x.com'], 1, now=NOW + 2 * DAY_SECONDS) == set()
+
+
+def test_suppressed_and_undeliverable_rows_are_left_out(store):
+    store.upsert_recipients([
+        recipient('a@x.com', suppressed=True),
+        recipient('b@dead.example', deliverability='undeliverable'),
+        recipient('c@x.com', deliverability='deliverable'),
+    ], now=NOW)
+    assert [row['address'] for row in store.select()] == ['c@x.com']
+    assert len(store.select(include_excluded=True)) == 3
+
+    # An ingest without a suppression list or domain check keeps the flags
+    store.upsert_recipients([recipient('a@x.com'), recipient('b@dead.example'), recipient('c@x.com')], now=NOW + 1)
+    assert [row['address'] for row in store.select()] == ['c@x.com']
+    store.upsert_recipients([recipient('a@x.com', suppressed=False)], now=NOW + 2)
+    assert [row['address'] for row in store.select()] == ['a@x.com']
+
+
+def test_pipeline_flags_suppressed_recipients(tmp_path):
+    from create_excel_based_batches import create_batches_from_excel
+    from gem_suppression import build_index
+    from gem_synth import write_synthetic_workbook
+
+    workbook = str(tmp_path / 'resellers.xlsx')
+    write_synthetic_workbook(workbook, 200, 0)
+    path = str(tmp_path / 'recipients.db')
+    output = str(tmp_path / 'gem-mock-data.ts')
+    create_batches_from_excel(workbook, output=output, store=path)
+    with RecipientStore(path) as store:
+        addresses = [row['address'] for row in store.select()]
+    build_index(addresses[:5], str(tmp_path / 'suppression'))
+
+    create_batches_from_excel(workbook, output=output, store=path, suppression=str(tmp_path / 'suppression'))
+    with RecipientStore(path) as store:
+        assert [row['address'] for row in store.select()] == addresses[5:]
+        assert len(store.select(include_excluded=True)) == len(addresses)
+
+
+def test_segment_query_uses_an_index(store):
+    plan = ' '.join(store.explain(exclude_days=30, company_type='Limited', domain_category='Gmail'))
+    assert 'USING INDEX recipients_segment' in plan
+
+
+def test_exclude_contacted_days_needs_a_store():
+    from create_excel_based_batches import create_batches_from_excel
+
+    with pytest.raises(ValueError):
+        create_batches_from_excel(exclude_contacted_days=30)
@@ -0,0 +1,56 @@
+import pytest
+
+from gem_suppression import SuppressionIndex, build_index, filter_batches
+
+
+def test_missing_index_fails_closed(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SuppressionIndex(str(tmp_path / 'typo'))
+    (tmp_path / 'empty').mkdir()
+    with pytest.raises(FileNotFoundError):
+        SuppressionIndex(str(tmp_path / 'empty'))
+
+
+def test_index_with_missing_files_fails_closed(tmp_path):
+    path = str(tmp_path / 'index')
+    build_index(['a@x.com', 'b@x.com'], path).close()
+    (tmp_path / 'index' / 'index.bin').unlink()
+    with pytest.raises(FileNotFoundError):
+        SuppressionIndex(path)
+    # Rebuilding over the damaged index is still allowed
+    assert len(build_index(['c@x.com'], path)) == 1
+
+
+def test_build_append_and_lookup(tmp_path):
+    path = str(tmp_path / 'index')
+    index = build_index(['Bounced@Example.com', 'unsub@example.com'], path)
+    assert 'bounced@example.com' in index
+    assert 'kept@example.com' not in index
+    assert index.append(['new@example.com', 'unsub@example.com']) == 1
+
+    reopened = SuppressionIndex(path)
+    assert reopened.contains_many(['new@example.com', 'kept@example.com', 'UNSUB@example.com']) == [True, False, True]
+    reopened.compact()
+    assert len(SuppressionIndex(path)) == 3
+
+
+def test_append_creates_a_new_index_only_when_asked(tmp_path):
+    path = str(tmp_path / 'fresh')
+    index = SuppressionIndex(path, create=True)
+    assert index.append(['a@x.com']) == 1
+    assert 'a@x.com' in SuppressionIndex(path)
+
+
+def test_normalized_variants_are_suppressed(tmp_path):
+    index = build_index(['john.doe@gmail.com'], str(tmp_path / 'index'))
+    assert 'JohnDoe+promo@googlemail.com' in index
+
+
+def test_filter_batches_reports_losses(tmp_path):
+    index = build_index(['b@x.com'], str(tmp_path / 'index'))
+    batches = [{'batch_name': 'B1', 'recipient_count': 2,
+                'recipients': [{'address': 'a@x.com'}, {'address': 'b@x.com'}]}]
+    email_batch = [{'address': 'b@x.com'}, {'address': 'c@x.com'}]
+    assert filter_batches(index, batches, email_batch) == ({'B1': 1}, 1)
+    assert batches[0]['recipients'] == [{'address': 'a@x.com'}]
+    assert email_batch == [{'address': 'c@x.com'}]
@@ -1,46 +1,127 @@
-import re
+import argparse
+import json
+import os
+
+from gem_emit import (
+    DEFAULT_MSME_TEST_EMAILS, MOCK_DATA_TS, SHARD_DIR, SHARD_MANIFEST, MSME_SECTION_MODULE,
+    msme_module_path, parse_msme_test_emails, write_atomic, write_msme_module
+)
+
+
+def _split_legacy_module(file_path):
+    """
+    Move an inline MSME_TEST_EMAILS export out of an older gem-mock-data.ts.
+
+    Older modules end with the array itself; it is written to the section
+    module and replaced by a re-export. This rewrites the module once, after
+    which updates only touch the section module.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    start = content.rfind('export const MSME_TEST_EMAILS')
+    if start == -1:
+        return list(DEFAULT_MSME_TEST_EMAILS)
+    end = content.index('];', start) + 2
+    entries = parse_msme_test_emails(content[start:end])
+
+    write_msme_module(entries, file_path)
+    reexport = f"export {{ MSME_TEST_EMAILS }} from './{MSME_SECTION_MODULE}';"
+    write_atomic(file_path, content[:start] + reexport + content[end:])
+    return entries
+
+
+def load_msme_test_emails(file_path=MOCK_DATA_TS):
+    """Return the current MSME test recipients, splitting them out of an older module if needed."""
+    section_path = msme_module_path(file_path)
+    if os.path.exists(section_path):
+        with open(section_path, 'r', encoding='utf-8') as f:
+            return parse_msme_test_emails(f.read())
+    return _split_legacy_module(file_path)
+
+
+def edit_msme_test_emails(add=(), remove=(), first=None, file_path=MOCK_DATA_TS, shard_dir=SHARD_DIR):
+    """
+    Apply several edits to MSME_TEST_EMAILS and commit them in one atomic write.
+
+    `remove` lists addresses to drop (case-insensitive), `add` lists
+    (email, name) pairs to append (an address already present gets the new
+    name), and `first` is an optional (email, name) that replaces the first
+    entry. Ids are renumbered msme1..msmeN. Only the section module is
+    rewritten; the sharded manifest, if present, is updated to match.
+    """
+    entries = load_msme_test_emails(file_path)
+
+    removed = {email.strip().lower() for email in remove}
+    entries = [entry for entry in entries if entry["email"].lower() not in removed]
+
+    if first:
+        email, name = first
+        if entries:
+            entries[0] = dict(entries[0], email=email, name=name)
+        else:
+            entries.append({"email": email, "name": name})
+
+    positions = {entry["email"].lower(): i for i, entry in enumerate(entries)}
+    for email, name in add:
+        i = positions.get(email.lower())
+        if i is None:
+            positions[email.lower()] = len(entries)
+            entries.append({"email": email, "name": name})
+        else:
+            entries[i] = dict(entries[i], name=name)
+
+    entries = [
+        {"id": f"msme{i+1}", "email": entry["email"], "name": entry["name"]}
+        for i, entry in enumerate(entries)
+    ]
+    write_msme_module(entries, file_path)
+
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest["msme_test_emails"] = entries
+        write_atomic(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False))
+    return entries
+
 
 def update_msme_emails(your_email, your_name="Your Name"):
     """
     Update the MSME_TEST_EMAILS array in the gem-mock-data.ts file
     with the user's preferred email.
-    
+
     Args:
         your_email (str): The email to add to the MSME test emails
         your_name (str): The name to associate with the email
     """
     try:
-        file_path = 'src/app/(dashboard)/email-marketing/gem-mock-data.ts'
-        
-        # Read the current file
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Create the new MSME_TEST_EMAILS array with your email as the first one
-        new_msme_emails = f"""export const MSME_TEST_EMAILS = [
-  {{ "id": "msme1", "email": "{your_email}", "name": "{your_name}" }},
-  {{ "id": "msme2", "email": "test@example.com", "name": "Test User" }},
-  {{ "id": "msme3", "email": "msme-test@quickbid.co.in", "name": "MSME Test" }},
-  {{ "id": "msme4", "email": "info@msme-test.com", "name": "MSME Info" }},
-  {{ "id": "msme5", "email": "contact@msme-sample.com", "name": "MSME Contact" }}
-];"""
-        
-        # Replace the existing MSME_TEST_EMAILS array with the new one
-        pattern = r"export const MSME_TEST_EMAILS = \[\s*\{.*?\}\s*\];"
-        updated_content = re.sub(pattern, new_msme_emails, content, flags=re.DOTALL)
-        
-        # Write the updated content back to the file
-        with open(file_path, 'w') as f:
-            f.write(updated_content)
-        
+        edit_msme_test_emails(first=(your_email, your_name))
         print(f"Successfully updated MSME_TEST_EMAILS with {your_email}")
-        
+
     except Exception as e:
         print(f"Error updating MSME_TEST_EMAILS: {e}")
 
 if __name__ == "__main__":
-    # Replace this with your actual email and name
-    YOUR_EMAIL = "your.actual.email@example.com"  # <-- PUT YOUR EMAIL HERE
-    YOUR_NAME = "Your Full Name"  # <-- PUT YOUR NAME HERE
-    
-    update_msme_emails(YOUR_EMAIL, YOUR_NAME) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Edit the MSME test recipients of the generated GeM data")
+    parser.add_argument('email', nargs='?', help="Address that replaces the first test recipient")
+    parser.add_argument('name', nargs='?', default="Your Name", help="Name for that address")
+    parser.add_argument('--add', nargs=2, action='append', default=[], metavar=('EMAIL', 'NAME'),
+                        help="Add a test recipient (repeatable)")
+    parser.add_argument('--remove', action='append', default=[], metavar='EMAIL',
+                        help="Remove a test recipient (repeatable)")
+    parser.add_argument('--file', default=MOCK_DATA_TS, help="Generated gem-mock-data.ts")
+    args = parser.parse_args()
+
+    if not (args.email or args.add or args.remove):
+        parser.error("give an email, --add or --remove")
+
+    try:
+        first = (args.email, args.name) if args.email else None
+        entries = edit_msme_test_emails(args.add, args.remove, first, args.file)
+        print(f"MSME_TEST_EMAILS now has {len(entries)} recipients:")
+        for entry in entries:
+            print(f"  {entry['id']}: {entry['email']} - {entry['name']}")
+    except Exception as e:
+        print(f"Error updating MSME_TEST_EMAILS: {e}")
+        raise SystemExit(1)